@@ -3,6 +3,9 @@ from os import walk
 from os.path import join
 from pathlib import Path
 from dataclasses import dataclass, field
+from collections import OrderedDict
+
+from settings import ROTATION_ANGLE_STEP, TRANSFORM_CACHE_MAX_ENTRIES
 
 @dataclass
 class FolderDir:
@@ -11,10 +14,62 @@ class FolderDir:
     loaded: bool = False
 
 
+@dataclass
+class AnimationAtlas:
+    '''every frame of an animation in both facing directions, flipped once at load time rather than every frame'''
+    left: dict[str, list[pg.Surface]] # as drawn
+    right: dict[str, list[pg.Surface]]
+
+    def get_frame(self, state: str, frame_idx: float, facing_left: bool) -> pg.Surface:
+        frames = (self.left if facing_left else self.right)[state]
+        return frames[int(frame_idx) % len(frames)]
+
+
+class TransformCache:
+    '''least recently used cache of rotated/mirrored surfaces keyed by (surface id, quantized angle, flip, smooth)'''
+    def __init__(self, angle_step: float=ROTATION_ANGLE_STEP, max_entries: int=TRANSFORM_CACHE_MAX_ENTRIES):
+        self.angle_step = angle_step
+        self.max_entries = max_entries
+        # each entry keeps its source surface alive so the id in its key can't be reused by another surface
+        self.surfs: OrderedDict[tuple[int, int, bool, bool], tuple[pg.Surface, pg.Surface]] = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_rotation(self, image: pg.Surface, angle: float, flip_x: bool=False, smooth: bool=False) -> pg.Surface:
+        '''image mirrored (if flip_x) then rotated counterclockwise by angle, smooth uses rotozoom's filtering'''
+        step = round(angle / self.angle_step) % round(360 / self.angle_step)
+        key = (id(image), step, flip_x, smooth)
+        if (entry := self.surfs.get(key)) is not None:
+            self.hits += 1
+            self.surfs.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        surf = pg.transform.flip(image, True, False) if flip_x else image
+        if step:
+            surf = pg.transform.rotozoom(surf, step * self.angle_step, 1) if smooth else pg.transform.rotate(surf, step * self.angle_step)
+        self.surfs[key] = (image, surf)
+        if len(self.surfs) > self.max_entries:
+            self.surfs.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def get_stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.surfs),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
 class AssetManager:
     def __init__(self):
         self.graphics_folders_loaded_at_runtime = {'backgrounds', 'player', 'terrain', 'weather'} 
         self.image_lookup: dict[str, pg.Surface | None] = {}
+        self.animations: dict[str, AnimationAtlas] = {} # keyed by folder path, shared by every sprite using the same frames
+        self.transform_cache = TransformCache()
         self.graphics_dir_root = Path('..') / 'graphics'
         self.graphics = {
             folder.name: self.load_subfolders(
@@ -59,6 +114,14 @@ class AssetManager:
                 frames.append(self.load_image(join(path, file)))
         return frames
 
+    def get_animation(self, dir_path: str) -> AnimationAtlas:
+        '''each subfolder of dir_path holds one state's numbered frames'''
+        if (atlas := self.animations.get(str(dir_path))) is None:
+            left = {folder.name: self.load_frames(folder) for folder in Path(dir_path).iterdir() if folder.is_dir()}
+            right = {state: [pg.transform.flip(frame, True, False) for frame in frames] for state, frames in left.items()}
+            atlas = self.animations[str(dir_path)] = AnimationAtlas(left, right)
+        return atlas
+
     def load_subfolders(self, dir_path: str, load_files: bool=False) -> FolderDir:
         folder_dir = FolderDir(loaded=load_files)
         if load_files:
@@ -0,0 +1,716 @@
+'''
+micro-benchmarks for the hot paths in world generation & rendering
+run from the code folder: python benchmarks.py [name ...] (runs everything when no names are given)
+these only time things, whether the optimized paths still match the originals is checked by the tests (python -m pytest -q tests)
+'''
+import os
+import sys
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from settings import MAP_SIZE, BIOMES, RES, TILE_SIZE
+
+def time_call(fn: callable, repeats: int=3) -> float:
+    '''best wall-clock time of a few runs, in seconds'''
+    best = float('inf')
+    for _ in range(repeats):
+        start = perf_counter()
+        fn()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def bench_noise() -> None:
+    '''per-sample noise.pnoise1/pnoise2 calls vs the vectorized PerlinNoise kernel over a full map'''
+    import noise
+    from perlin_noise import PerlinNoise
+
+    kernel = PerlinNoise(3638)
+    xs = np.arange(MAP_SIZE[0])
+    grid_x, grid_y = (a.ravel() for a in np.meshgrid(xs, np.arange(MAP_SIZE[1]), indexing='ij'))
+    print(f'noise: {MAP_SIZE[0]} columns, {grid_x.size} tiles, base={kernel.base}')
+    for biome, data in BIOMES.items():
+        h, c = data['height map'], data['cave map']
+        per_call_1d = lambda: np.array([
+            noise.pnoise1(x / h['scale'], h['octaves'], h['persistence'], h['lacunarity'], base=kernel.base) for x in xs
+        ], dtype=np.float32)
+        vectorized_1d = lambda: kernel.pnoise1(xs / h['scale'], h['octaves'], h['persistence'], h['lacunarity'])
+        per_call_2d = lambda: np.array([
+            noise.pnoise2(x / c['scale'], y / c['scale'], c['octaves'], c['persistence'], c['lacunarity'], repeatx=-1, repeaty=-1, base=kernel.base)
+            for x, y in zip(grid_x, grid_y)
+        ], dtype=np.float32)
+        vectorized_2d = lambda: kernel.pnoise2(
+            grid_x / c['scale'], grid_y / c['scale'], c['octaves'], c['persistence'], c['lacunarity'], repeat_x=-1, repeat_y=-1
+        )
+        t_1d, t_1d_vec = time_call(per_call_1d), time_call(vectorized_1d)
+        t_2d, t_2d_vec = time_call(per_call_2d, 1), time_call(vectorized_2d)
+        print(
+            f'  {biome:<10} pnoise1 {t_1d * 1000:8.2f}ms -> {t_1d_vec * 1000:7.2f}ms ({t_1d / t_1d_vec:5.1f}x) | '
+            f'pnoise2 {t_2d * 1000:8.1f}ms -> {t_2d_vec * 1000:7.1f}ms ({t_2d / t_2d_vec:5.1f}x)'
+        )
+
+
+def init_headless_display() -> None:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame as pg
+    pg.init()
+    pg.display.set_mode(RES)
+
+
+def get_synthetic_tile_imgs(names: list[str], oversized: set[str]=frozenset()) -> dict[str, 'pg.Surface']:
+    '''random rgba tiles standing in for the graphics folder, with some translucent pixels to exercise alpha blending'''
+    import pygame as pg
+    rng = np.random.default_rng(0)
+    imgs = {}
+    for name in names:
+        size = (TILE_SIZE * 2, TILE_SIZE * 2) if name in oversized else (TILE_SIZE, TILE_SIZE)
+        img = pg.Surface(size, pg.SRCALPHA)
+        pixels = rng.integers(0, 256, (*size, 4), dtype=np.uint8)
+        pixels[..., 3] = np.where(rng.random(size) < 0.8, 255, pixels[..., 3])
+        pg.surfarray.pixels3d(img)[...] = pixels[..., :3]
+        pg.surfarray.pixels_alpha(img)[...] = pixels[..., 3]
+        imgs[name] = img
+    return imgs
+
+
+def get_chunk_manager(tile_map: np.ndarray) -> 'ChunkManager':
+    '''a ChunkManager wired to synthetic assets instead of a running game'''
+    import pygame as pg
+    from chunk_manager import ChunkManager
+    from proc_gen import ProcGen
+
+    names_to_ids, ids_to_names, ramp_ids = ProcGen.get_tile_ids()
+    imgs = get_synthetic_tile_imgs(list(names_to_ids), oversized={'burner furnace', 'assembler'})
+    game_obj = SimpleNamespace(
+        screen=pg.display.get_surface(),
+        cam=SimpleNamespace(offset=pg.Vector2(), velocity=pg.Vector2()),
+        asset_manager=SimpleNamespace(get_image=imgs.__getitem__),
+        proc_gen=SimpleNamespace(tile_map=tile_map, names_to_ids=names_to_ids, ids_to_names=ids_to_names, ramp_ids=ramp_ids, tile_listeners=[]),
+        sprite_manager=SimpleNamespace(mining=SimpleNamespace(mining_map={})),
+    )
+    chunk_manager = ChunkManager(game_obj)
+    chunk_manager.get_mined_tile_img = lambda x, y: imgs['stone']
+    return chunk_manager
+
+
+def bake_chunk_per_tile(chunk_manager: 'ChunkManager', chunk: tuple[int, int]) -> 'pg.Surface':
+    '''the original baking loop: one lookup, get_image & blit per tile'''
+    import pygame as pg
+    topleft_x, topleft_y = chunk[0] * chunk_manager.num_chunk_tiles, chunk[1] * chunk_manager.num_chunk_tiles
+    tiles_w = min(chunk_manager.num_chunk_tiles, MAP_SIZE[0] - topleft_x)
+    tiles_h = min(chunk_manager.num_chunk_tiles, MAP_SIZE[1] - topleft_y)
+    surf = pg.Surface((tiles_w * TILE_SIZE, tiles_h * TILE_SIZE), pg.SRCALPHA)
+    for x in range(tiles_w):
+        for y in range(tiles_h):
+            if (tile_img := chunk_manager.get_tile_img((topleft_x + x, topleft_y + y))) is not None:
+                surf.blit(tile_img, (x * TILE_SIZE, y * TILE_SIZE))
+    return surf
+
+
+def bench_chunk_bake() -> None:
+    '''per-tile blits vs the atlas/surfarray path for baking one chunk surface'''
+    init_headless_display()
+    from proc_gen import ProcGen
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(1)
+    single_tile_ids = [i for name, i in names_to_ids.items() if name not in {'burner furnace', 'assembler'}]
+    tile_map = rng.choice(single_tile_ids, MAP_SIZE)
+    tile_map[:, :MAP_SIZE[1] // 4] = names_to_ids['air'] # sky
+    for x, y in zip(rng.integers(0, MAP_SIZE[0] - 1, 200), rng.integers(0, MAP_SIZE[1] - 1, 200)): # 2x2 machines
+        tile_map[x:x + 2, y:y + 2] = names_to_ids['item extended']
+        tile_map[x, y] = names_to_ids['burner furnace']
+    chunk_manager = get_chunk_manager(tile_map)
+    chunk_manager.mining_map.update({(int(x), int(y)): {} for x, y in zip(rng.integers(0, 200, 50), rng.integers(0, MAP_SIZE[1], 50))})
+
+    sample = [(x, y) for x in range(chunk_manager.num_chunks_x) for y in range(chunk_manager.num_chunks_y)][::7]
+    t_per_tile = time_call(lambda: [bake_chunk_per_tile(chunk_manager, chunk) for chunk in sample]) / len(sample)
+    t_atlas = time_call(lambda: [chunk_manager.get_chunk_img(chunk) for chunk in sample]) / len(sample)
+    print(
+        f'chunk bake ({chunk_manager.num_chunk_tiles}x{chunk_manager.num_chunk_tiles} tiles): '
+        f'per-tile {t_per_tile * 1000:.3f}ms -> atlas {t_atlas * 1000:.3f}ms per chunk ({t_per_tile / t_atlas:.1f}x)'
+    )
+
+
+def bench_chunk_prefetch(num_frames: int=600, px_per_frame: float=12.0) -> None:
+    '''frames that had to bake chunks synchronously while panning across the map, with & without the prefetch thread'''
+    import pygame as pg
+    init_headless_display()
+    from time import sleep
+    from proc_gen import ProcGen
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(2)
+    tile_map = rng.choice([i for name, i in names_to_ids.items() if name not in {'burner furnace', 'assembler'}], MAP_SIZE)
+    for prefetch in (False, True):
+        chunk_manager = get_chunk_manager(tile_map)
+        chunk_manager.cam.velocity = pg.Vector2(px_per_frame, px_per_frame / 4) if prefetch else pg.Vector2()
+        stall_frames = 0
+        for frame in range(num_frames):
+            chunk_manager.cam_offset.update(frame * px_per_frame, (frame * px_per_frame / 4) % (MAP_SIZE[1] * TILE_SIZE - RES[1]))
+            num_stalls = chunk_manager.num_stalls
+            chunk_manager.render_chunks()
+            stall_frames += chunk_manager.num_stalls > num_stalls
+            sleep(1 / 120) # leave the worker some of the frame, as the rest of the game loop would
+        chunk_manager.prefetcher.stop()
+        stats = chunk_manager.prefetcher.get_stats()
+        print(
+            f'chunk prefetch {"on " if prefetch else "off"}: {stall_frames}/{num_frames} frames stalled, '
+            f'{stats["stalls"]} chunks baked in-frame ({stats["stall ms"]:.1f}ms), {stats["prefetched"]} prefetched, {stats["discarded"]} discarded'
+        )
+
+
+def bench_sprite_index(num_sprites: int=5000, num_queries: int=200) -> None:
+    '''linear scan + sort over every sprite vs the spatially-hashed group for the per-frame render query'''
+    import pygame as pg
+    from settings import Z_LAYERS, SPRITE_CELL_SIZE
+    from spatial_index import SpatialGroup
+
+    rng = np.random.default_rng(3)
+    group = SpatialGroup(SPRITE_CELL_SIZE)
+    for x, y, z in zip(rng.integers(0, MAP_SIZE[0] * TILE_SIZE, num_sprites), rng.integers(0, MAP_SIZE[1] * TILE_SIZE, num_sprites), rng.choice(list(Z_LAYERS.values()), num_sprites)):
+        sprite = pg.sprite.Sprite(group)
+        sprite.rect, sprite.z = pg.Rect(int(x), int(y), TILE_SIZE, TILE_SIZE * 2), int(z)
+    points = list(zip(rng.integers(0, MAP_SIZE[0] * TILE_SIZE, num_queries), rng.integers(0, MAP_SIZE[1] * TILE_SIZE, num_queries)))
+    x_dist, y_dist = RES[0] // 2, RES[1] // 2
+
+    linear = lambda: [
+        sorted((s for s in group if abs(s.rect.centerx - x) < x_dist and abs(s.rect.centery - y) < y_dist), key=lambda s: s.z) for x, y in points
+    ]
+    indexed = lambda: [group.get_sprites_in_radius((x, y), x_dist, y_dist) for x, y in points]
+    t_linear, t_indexed = time_call(linear) / num_queries, time_call(indexed) / num_queries
+    print(
+        f'sprite index ({num_sprites} sprites, {SPRITE_CELL_SIZE}px cells): '
+        f'scan + sort {t_linear * 1000:.3f}ms -> indexed {t_indexed * 1000:.3f}ms per query ({t_linear / t_indexed:.1f}x)'
+    )
+
+
+def bench_rotation(num_frames: int=2000) -> None:
+    '''per-frame pg.transform.rotate of a swinging tool vs the transform cache at a few angle steps'''
+    import pygame as pg
+    from math import sin
+    from asset_manager import TransformCache
+
+    image = get_synthetic_tile_imgs(['pickaxe'])['pickaxe']
+    angles = [45 * sin(frame / 6) for frame in range(num_frames)] # a swing lasting ~38 frames
+    t_rotate = time_call(lambda: [pg.transform.rotate(image, angle) for angle in angles])
+    print(f'rotation ({num_frames} frames): pg.transform.rotate {t_rotate * 1000:.1f}ms')
+    for step in (1, 3, 5):
+        cache = TransformCache(angle_step=step)
+        t_cached = time_call(lambda: [cache.get_rotation(image, angle) for angle in angles])
+        stats = cache.get_stats()
+        print(f'  {step} degree step: {t_cached * 1000:.1f}ms ({t_rotate / t_cached:.1f}x), {stats["entries"]} entries, hit rate {stats["hit rate"]:.1%}')
+
+
+def gen_rect_map(tile_map: np.ndarray, air_id: int) -> dict[tuple[int, int], list['pg.Rect']]:
+    '''the original CollisionMap.generate_map: a rect per occupied tile, bucketed into 10x10 tile cells'''
+    import pygame as pg
+    from collections import defaultdict
+    rect_map = defaultdict(list)
+    for x in range(MAP_SIZE[0]):
+        for y in range(MAP_SIZE[1]):
+            if tile_map[x, y] != air_id:
+                rect_map[(x // 10, y // 10)].append(pg.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+    return rect_map
+
+
+def search_rect_map(rect_map: dict[tuple[int, int], list['pg.Rect']], sprite: 'pg.sprite.Sprite') -> list['pg.Rect']:
+    '''the original CollisionMap.search_map'''
+    rects = []
+    for cell_x in range(sprite.rect.left // TILE_SIZE // 10, sprite.rect.right // TILE_SIZE // 10 + 1):
+        for cell_y in range(sprite.rect.top // TILE_SIZE // 10, sprite.rect.bottom // TILE_SIZE // 10 + 1):
+            if (cell_x, cell_y) in rect_map:
+                rects.extend(rect_map[(cell_x, cell_y)])
+    return rects
+
+
+def get_cave_tile_map(seed: int) -> np.ndarray:
+    '''dirt & stone under a band of sky, with a fifth of the tiles dug out'''
+    from proc_gen import ProcGen
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(seed)
+    tile_map = rng.choice([names_to_ids['dirt'], names_to_ids['stone']], MAP_SIZE).astype(np.uint8)
+    tile_map[:, :MAP_SIZE[1] // 3] = names_to_ids['air']
+    tile_map[rng.random(MAP_SIZE) < 0.2] = names_to_ids['air'] # caves
+    return tile_map
+
+
+def bench_collision_map() -> None:
+    '''startup time, memory & query time of the per-tile rect CollisionMap vs the dense occupancy grid'''
+    import pygame as pg
+    import tracemalloc
+    from proc_gen import ProcGen
+    from collision_detection import CollisionMap
+
+    names_to_ids, ids_to_names, _ = ProcGen.get_tile_ids()
+    rng = np.random.default_rng(4)
+    tile_map = get_cave_tile_map(4)
+    physics_engine = SimpleNamespace(tile_map=tile_map, names_to_ids=names_to_ids, ids_to_names=ids_to_names, tile_listeners=[])
+    results = {}
+    for name, build in (('rects', lambda: gen_rect_map(tile_map, names_to_ids['air'])), ('grid', lambda: CollisionMap(physics_engine))):
+        tracemalloc.start()
+        start = perf_counter()
+        obj = build()
+        elapsed = perf_counter() - start
+        results[name] = (obj, elapsed, tracemalloc.get_traced_memory()[0] / 1e6)
+        tracemalloc.stop()
+
+    rect_map, grid = results['rects'][0], results['grid'][0]
+    sprites = [
+        SimpleNamespace(rect=pg.Rect(int(x), int(y), 24, 40))
+        for x, y in zip(rng.integers(0, (MAP_SIZE[0] - 2) * TILE_SIZE, 1000), rng.integers(0, (MAP_SIZE[1] - 3) * TILE_SIZE, 1000))
+    ]
+    t_rects = time_call(lambda: [[r for r in search_rect_map(rect_map, s) if s.rect.colliderect(r)] for s in sprites]) / len(sprites)
+    t_grid = time_call(lambda: [[r for r in grid.search_map(s) if s.rect.colliderect(r)] for s in sprites]) / len(sprites)
+    print(f'collision map ({int((tile_map != names_to_ids["air"]).sum())} solid tiles):')
+    print(f'  startup {results["rects"][1] * 1000:.0f}ms -> {results["grid"][1] * 1000:.1f}ms, memory {results["rects"][2]:.1f}MB -> {results["grid"][2]:.2f}MB')
+    print(f'  query {t_rects * 1e6:.1f}us -> {t_grid * 1e6:.1f}us per sprite')
+
+
+def get_physics_engine(tile_map: np.ndarray) -> SimpleNamespace:
+    '''the parts of PhysicsEngine that collision & movement read, without a running game'''
+    import pygame as pg
+    from proc_gen import ProcGen
+    from physics_engine import PhysicsEngine
+    from collision_detection import CollisionMap, CollisionDetection
+    from sprite_movement import SpriteMovement
+    from body_system import BodySystem
+    from liquid_flow import LiquidFlow
+    from loose_tiles import LooseTiles
+
+    names_to_ids, ids_to_names, _ = ProcGen.get_tile_ids()
+    physics_engine = SimpleNamespace(
+        tile_map=tile_map, names_to_ids=names_to_ids, ids_to_names=ids_to_names, tile_listeners=[], cam_offset=pg.Vector2(),
+        key_bindings={'move left': pg.K_a, 'move right': pg.K_d, 'jump': pg.K_SPACE}
+    )
+    physics_engine.notify_tile_listeners = lambda tiles, source=None: ProcGen.notify_tile_listeners(physics_engine, tiles, source)
+    physics_engine.step_over_tile = lambda sprite, x, y: PhysicsEngine.step_over_tile(physics_engine, sprite, x, y)
+    physics_engine.collision_map = CollisionMap(physics_engine)
+    physics_engine.collision_detection = CollisionDetection(physics_engine)
+    physics_engine.sprite_movement = SpriteMovement(physics_engine)
+    physics_engine.sprite_movement.sprite_index = SimpleNamespace(move=lambda sprite: None)
+    physics_engine.body_system = BodySystem(physics_engine)
+    physics_engine.liquid_flow = LiquidFlow(physics_engine)
+    physics_engine.loose_tiles = LooseTiles(physics_engine)
+    return physics_engine
+
+
+def bench_bodies(num_bodies: int=500, num_ticks: int=180) -> None:
+    '''per-sprite SpriteMovement.move_sprite vs the batched BodySystem for falling item drops'''
+    import pygame as pg
+    from proc_gen import ProcGen
+    from settings import GRAVITY
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(5)
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    surface = 100 + (10 * np.sin(np.arange(MAP_SIZE[0]) / 15)).astype(int)
+    for x, y in enumerate(surface):
+        tile_map[x, y:] = names_to_ids['stone']
+    tile_map[rng.integers(0, MAP_SIZE[0], 300), rng.integers(60, 90, 300)] = names_to_ids['dirt'] # floating one-tile ledges
+    xs, ys = rng.integers(0, MAP_SIZE[0] * TILE_SIZE, num_bodies), rng.integers(0, 50 * TILE_SIZE, num_bodies)
+    directions = [pg.Vector2(int(dx), 1) for dx in rng.integers(-1, 2, num_bodies)]
+    dt = 1 / 60
+
+    class Drop(pg.sprite.Sprite): # the original ItemDrop movement
+        def __init__(self, x: int, y: int, direction: pg.Vector2):
+            super().__init__()
+            self.rect, self.direction = pg.Rect(x, y, TILE_SIZE, TILE_SIZE), pg.Vector2(direction)
+            self.move_speed, self.gravity = 1, GRAVITY // 3
+
+    def run_sprites() -> None:
+        sprite_movement = get_physics_engine(tile_map.copy()).sprite_movement
+        drops = [Drop(x, y, d) for x, y, d in zip(xs, ys, directions)]
+        for _ in range(num_ticks):
+            for drop in drops:
+                sprite_movement.move_sprite(drop, drop.direction.x, dt)
+                if drop.direction.x and int(drop.direction.y) == 0:
+                    drop.direction.x = 0
+
+    def run_batched() -> None:
+        nonlocal physics_engine
+        physics_engine = get_physics_engine(tile_map.copy())
+        body_system = physics_engine.body_system
+        drops = [pg.sprite.Sprite() for _ in range(num_bodies)]
+        for drop, x, y, d in zip(drops, xs, ys, directions):
+            drop.rect = pg.Rect(int(x), int(y), TILE_SIZE, TILE_SIZE)
+            body_system.add(drop, d, GRAVITY // 3, 1)
+        for _ in range(num_ticks):
+            body_system.step(dt)
+
+    physics_engine = None
+    t_sprites, t_batched = time_call(run_sprites, 1) / num_ticks, time_call(run_batched, 1) / num_ticks
+    print(
+        f'bodies ({num_bodies} drops): per-sprite {t_sprites * 1000:.2f}ms -> batched {t_batched * 1000:.2f}ms per tick '
+        f'({t_sprites / t_batched:.1f}x)'
+    )
+
+    # once everything has landed the bodies sleep until the ground under them changes
+    body_system = physics_engine.body_system
+    stats = body_system.get_stats()
+    t_settled = time_call(lambda: body_system.step(dt), 100)
+    print(f'  settled: {stats["awake"]} awake / {stats["asleep"]} asleep, {t_settled * 1000:.3f}ms per tick')
+
+
+def get_lakes_tile_map(num_lakes: int, liquid: str='water') -> np.ndarray:
+    '''stone basins filled to the brim, the first one's right wall is column 40'''
+    from proc_gen import ProcGen
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    tile_map[:, 120:] = names_to_ids['stone']
+    spacing = MAP_SIZE[0] // num_lakes
+    for i in range(num_lakes):
+        left = i * spacing + 10
+        tile_map[left - 1:left + 31, 100:120] = names_to_ids['stone']
+        tile_map[left:left + 30, 101:120] = names_to_ids[liquid]
+    return tile_map
+
+
+def bench_liquids(num_lakes: int=40, max_flow_ticks: int=3600) -> None:
+    '''liquid simulation cost with only the disturbed lake awake vs stepping every chunk of the map'''
+    from proc_gen import ProcGen
+    from settings import LIQUID_CHUNK_SIZE
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    tile_map = get_lakes_tile_map(num_lakes)
+    physics_engine = get_physics_engine(tile_map)
+    liquid_flow = physics_engine.liquid_flow
+    settle_ticks = 0
+    while liquid_flow.active_chunks:
+        liquid_flow.step()
+        settle_ticks += 1
+
+    # breach the first basin's right wall
+    wall = [(40, y) for y in range(100, 120)]
+    tile_map[40, 100:120] = names_to_ids['air']
+    physics_engine.notify_tile_listeners(wall)
+    notified = []
+    physics_engine.tile_listeners.append(notified.extend)
+    flow_ticks, max_chunks, start = 0, 0, perf_counter()
+    while liquid_flow.active_chunks and flow_ticks < max_flow_ticks:
+        max_chunks = max(max_chunks, len(liquid_flow.active_chunks))
+        liquid_flow.step()
+        flow_ticks += 1
+    t_flowing = (perf_counter() - start) / flow_ticks
+    if liquid_flow.active_chunks: # the per-tick time would be of a lake that never settles, see tests/test_liquids.py
+        raise AssertionError(f'the breached lake was still awake after {max_flow_ticks} ticks ({len(liquid_flow.active_chunks)} chunks)')
+
+    all_chunks = {(x, y) for x in range(liquid_flow.num_chunks_x) for y in range(liquid_flow.num_chunks_y)}
+    def step_all() -> None:
+        liquid_flow.active_chunks.update(all_chunks)
+        liquid_flow.step()
+    t_all = time_call(step_all, 10)
+    print(
+        f'liquids ({num_lakes} lakes, {LIQUID_CHUNK_SIZE}-tile chunks): settled in {settle_ticks} ticks, '
+        f'a breached lake flows for {flow_ticks} ticks at {t_flowing * 1000:.3f}ms per tick (up to {max_chunks} chunks awake, {len(notified)} tile edits sent to listeners) '
+        f'vs {t_all * 1000:.1f}ms to step all {len(all_chunks)} chunks'
+    )
+
+
+def bench_loose_tiles(num_ticks: int=120) -> None:
+    '''sand collapsing into a dug out cave, frontier updates vs scanning the whole map for tiles that can fall'''
+    from proc_gen import ProcGen
+
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    tile_map[:, 100:] = names_to_ids['sand']
+    tile_map[:, 160:] = names_to_ids['stone']
+    physics_engine = get_physics_engine(tile_map)
+    loose_tiles = physics_engine.loose_tiles
+    cave = [(x, y) for x in range(1000, 1040) for y in range(130, 160)]
+    tile_map[1000:1040, 130:160] = names_to_ids['air']
+
+    start = perf_counter()
+    physics_engine.notify_tile_listeners(cave)
+    for _ in range(num_ticks):
+        loose_tiles.step()
+    t_frontier = (perf_counter() - start) / num_ticks
+
+    def scan() -> None: # what finding falling tiles would cost without a frontier, before moving any of them
+        np.nonzero(loose_tiles.is_loose[tile_map[:, :-1]] & loose_tiles.can_fall_into[tile_map[:, 1:]])
+    t_scan = time_call(scan, 10)
+    print(
+        f'loose tiles ({len(cave)} tiles dug out under sand): {t_frontier * 1000:.3f}ms per tick incl. listener updates '
+        f'vs {t_scan * 1000:.2f}ms per tick just to scan the map for tiles that can fall'
+    )
+
+
+def find_pairs_per_item(all_sprites: 'SpatialGroup', colonists: 'FlagGroup', items: 'FlagGroup') -> set[tuple]:
+    '''the original ItemDrop.update -> SpriteManager.pick_up_item, each item querying the sprite index around itself'''
+    pairs = set()
+    for item in items:
+        for colonist in all_sprites.get_sprites_in_radius(item.rect.center, item.rect.width + TILE_SIZE * 2, item.rect.height + TILE_SIZE * 2):
+            if colonist in colonists and colonist.rect.colliderect(item.rect):
+                pairs.add((colonist, item))
+    return pairs
+
+
+def get_crowded_groups(num_items: int, num_colonists: int, num_other: int, seed: int) -> tuple['SpatialGroup', 'FlagGroup', 'FlagGroup']:
+    '''items, colonists & other sprites packed into a quarter of the map, plus a few wide drops touching colonists'''
+    import pygame as pg
+    from settings import SPRITE_CELL_SIZE
+    from spatial_index import SpatialGroup
+    from sprite_groups import FlagGroup, COLONIST, ITEM
+
+    rng = np.random.default_rng(seed)
+    all_sprites, colonists, items = SpatialGroup(SPRITE_CELL_SIZE), FlagGroup(COLONIST), FlagGroup(ITEM)
+    area = (MAP_SIZE[0] * TILE_SIZE // 4, MAP_SIZE[1] * TILE_SIZE) # crowded enough for some overlaps
+    for groups, num, size in (((all_sprites, items), num_items, (TILE_SIZE, TILE_SIZE)), ((all_sprites, colonists), num_colonists, (TILE_SIZE * 2, TILE_SIZE * 3)), ((all_sprites,), num_other, (TILE_SIZE * 3, TILE_SIZE * 6))):
+        for x, y in zip(rng.integers(0, area[0], num), rng.integers(0, area[1], num)):
+            sprite = pg.sprite.Sprite(*groups)
+            sprite.rect, sprite.z = pg.Rect(int(x), int(y), *size), 0
+    for colonist in list(colonists)[:5]: # drops much larger than a tile, their centers are far from the colonists they touch
+        sprite = pg.sprite.Sprite()
+        sprite.rect, sprite.z = pg.Rect(colonist.rect.right - 1, colonist.rect.top, TILE_SIZE * 8, TILE_SIZE), 0
+        sprite.add(all_sprites, items)
+    return all_sprites, colonists, items
+
+
+def bench_broadphase(num_items: int=2000, num_colonists: int=20, num_other: int=3000) -> None:
+    '''each item drop querying the sprite index for colonists it overlaps vs 1 broadphase pass over the colonist/item pairs'''
+    from spatial_index import Broadphase
+
+    all_sprites, colonists, items = get_crowded_groups(num_items, num_colonists, num_other, 6)
+    broadphase = Broadphase(all_sprites)
+    found = set()
+    broadphase.register(colonists, items, lambda colonist, item: found.add((colonist, item)))
+    broadphase.step()
+    t_per_item = time_call(lambda: find_pairs_per_item(all_sprites, colonists, items))
+    t_broadphase = time_call(broadphase.step)
+    print(
+        f'broadphase ({num_items} items, {num_colonists} colonists, {num_other} other sprites): '
+        f'per-item queries {t_per_item * 1000:.2f}ms -> broadphase {t_broadphase * 1000:.3f}ms per tick ({t_per_item / t_broadphase:.0f}x), '
+        f'{broadphase.get_stats()["tests"]} rect tests for {len(found)} pairs'
+    )
+
+
+def get_world_save_data() -> dict[str, any]:
+    '''a save of a fully generated map with a few hundred sprites, arrays as numpy like ProcGen.make_save returns them'''
+    from settings import BIOMES
+
+    rng = np.random.default_rng(7)
+    tile_map = rng.integers(2, 40, MAP_SIZE).astype(np.uint8)
+    tile_map[:, :60] = 0
+    return {
+        'tile map': tile_map,
+        'height map': rng.random(MAP_SIZE[0]).astype(np.float32) * 20 + 50,
+        'tree map': [[int(x), 60] for x in rng.integers(0, MAP_SIZE[0], 300)],
+        'cave maps': {biome: rng.random(MAP_SIZE) > 0.6 for biome in list(BIOMES)[:-1]},
+        'biome order': {biome: i for i, biome in enumerate(list(BIOMES)[:-1])},
+        'current biome': 'forest',
+        'ui': {'visited tiles': rng.random(MAP_SIZE) > 0.5},
+        'weather': {'sky rgb': [150, 200, 255], 'sky rgb update': -1, 'sky tint alpha': 0, 'sky tint update': 1},
+        'sprites': {'tree': [{'current strength': 50}] * 300, 'item drop': [{'xy': [int(x), 900]} for x in range(200)]},
+    }
+
+
+def bench_save() -> None:
+    '''json with the arrays as nested lists (the original format) vs the binary container with memory-mapped arrays'''
+    import json, os, tempfile
+    from save_file import SaveFile
+
+    data = get_world_save_data()
+    def to_lists(value: any) -> any:
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        return {k: to_lists(v) for k, v in value.items()} if isinstance(value, dict) else value
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, bin_path = os.path.join(tmp, 'save.json'), os.path.join(tmp, 'save.bin')
+        def save_json() -> None:
+            with open(json_path, 'w') as f:
+                json.dump(to_lists(data), f)
+        def load_json() -> None: # + the np.array calls in ProcGen.load_save_data etc.
+            with open(json_path, 'r') as f:
+                loaded = json.load(f)
+            np.array(loaded['tile map'], dtype=np.uint8), np.array(loaded['height map'], dtype=np.float32), np.array(loaded['ui']['visited tiles'])
+            [np.array(arr) for arr in loaded['cave maps'].values()]
+
+        def load_bin(touch: bool) -> None:
+            loaded = SaveFile.read(bin_path)
+            if touch: # read every page rather than just the ones the game ends up using
+                int(loaded['tile map'].sum()), float(loaded['height map'].sum()), int(loaded['ui']['visited tiles'].sum())
+                [int(arr.sum()) for arr in loaded['cave maps'].values()]
+
+        t_save_json, t_save_bin = time_call(save_json, 1), time_call(lambda: SaveFile.write(bin_path, data), 3)
+        t_load_json, t_open_bin, t_load_bin = time_call(load_json, 1), time_call(lambda: load_bin(False)), time_call(lambda: load_bin(True))
+        t_read_bin = time_call(lambda: SaveFile.read(bin_path, in_memory=True)) # how the game loads save.bin
+        print(
+            f'save ({MAP_SIZE[0]}x{MAP_SIZE[1]} map): json {os.path.getsize(json_path) / 1024 ** 2:.1f}MB -> binary {os.path.getsize(bin_path) / 1024 ** 2:.1f}MB, '
+            f'save {t_save_json * 1000:.0f}ms -> {t_save_bin * 1000:.0f}ms, load {t_load_json * 1000:.0f}ms -> {t_open_bin * 1000:.2f}ms mapped '
+            f'({t_load_bin * 1000:.0f}ms reading every page, {t_read_bin * 1000:.0f}ms read into memory)'
+        )
+
+
+def bench_delta_save(num_saves: int=100, edits_per_save: int=10) -> None:
+    '''rewriting the whole save vs appending the edited chunks & sprite records, repeated until the file gets compacted'''
+    import os, tempfile
+    from types import SimpleNamespace
+    from save_file import SaveFile, SaveTracker
+
+    rng = np.random.default_rng(8)
+    data = get_world_save_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'save.bin')
+        tracker = SaveTracker(SimpleNamespace(save_data=None, proc_gen=SimpleNamespace(tile_listeners=[])))
+        full_bytes = tracker.save(path, data)['bytes written']
+        t_full = time_call(lambda: SaveFile.write(os.path.join(tmp, 'full.bin'), data))
+
+        num_bytes, num_compactions, t_delta = 0, 0, 0.0
+        for i in range(num_saves):
+            tiles = list(zip(rng.integers(0, MAP_SIZE[0], edits_per_save).tolist(), rng.integers(0, MAP_SIZE[1], edits_per_save).tolist()))
+            for xy in tiles: # mining
+                data['tile map'][xy] = 0
+            tracker.update_tiles(tiles)
+            x = int(rng.integers(0, MAP_SIZE[0] - 40)) # the camera moving over new ground
+            data['ui']['visited tiles'][x:x + 40, 50:90] = True
+            tracker.update_region('ui/visited tiles', x, 50, x + 40, 90)
+            data['sprites']['item drop'] = [*data['sprites']['item drop'], {'xy': [x, 900]}]
+            start = perf_counter()
+            stats = tracker.save(path, data)
+            t_delta += perf_counter() - start
+            num_bytes += stats['bytes written']
+            num_compactions += stats['compacted']
+
+        print(
+            f'delta save ({edits_per_save} tile edits per save): full save {full_bytes / 1024:.0f}KB in {t_full * 1000:.1f}ms -> '
+            f'{num_bytes / num_saves / 1024:.0f}KB in {t_delta / num_saves * 1000:.1f}ms per delta save on average, '
+            f'{num_compactions}/{num_saves} saves compacted, file {os.path.getsize(path) / 1024:.0f}KB'
+        )
+
+
+def bench_autosave(num_saves: int=20, edits_per_save: int=10) -> None:
+    '''time the game is paused by an autosave (taking the snapshot) vs saving on the main thread, with the world edited while the worker writes'''
+    import os, tempfile
+    from types import SimpleNamespace
+    from save_file import SaveFile, SaveTracker, Autosave
+
+    rng = np.random.default_rng(9)
+    data = get_world_save_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'save.bin')
+        game_obj = SimpleNamespace(save_data=None, proc_gen=SimpleNamespace(tile_listeners=[]), get_world_save_data=lambda: data)
+        game_obj.save_tracker = SaveTracker(game_obj)
+        autosave = Autosave(game_obj, path, interval=0)
+        t_sync = time_call(lambda: SaveFile.write(os.path.join(tmp, 'sync.bin'), data))
+
+        t_pause, t_write = [], []
+        for i in range(num_saves):
+            tiles = list(zip(rng.integers(0, MAP_SIZE[0], edits_per_save).tolist(), rng.integers(0, MAP_SIZE[1], edits_per_save).tolist()))
+            for xy in tiles:
+                data['tile map'][xy] = i % 200 + 1
+            game_obj.save_tracker.update_tiles(tiles)
+            autosave.update(0)
+            data['tile map'][:, :10] = i % 200 + 1 # the game keeps editing while the worker writes
+            game_obj.save_tracker.update_region('tile map', 0, 0, MAP_SIZE[0], 10)
+            autosave.thread.join()
+            autosave.finish()
+            t_pause.append(autosave.stats['snapshot ms'])
+            t_write.append(autosave.stats['write ms'])
+
+        print(
+            f'autosave: saving on the main thread {t_sync * 1000:.1f}ms -> paused {np.median(t_pause):.2f}ms '
+            f'(max {max(t_pause):.2f}ms) taking the snapshot, {np.median(t_write):.1f}ms writing on the worker thread'
+        )
+
+
+def bench_sprite_records(num_drops: int=5000, num_drills: int=200, num_furnaces: int=200) -> None:
+    '''a json dict per sprite (drills with a copy of the terrain below them) vs a set of columns per class, encoded & decoded by SaveFile'''
+    from save_file import SaveFile
+    from sprite_records import SpriteRecords
+    from item_drop import ItemDrop
+    from drills import Drill
+    from furnaces import Furnace
+
+    rng = np.random.default_rng(10)
+    names = ['wood', 'stone', 'iron', 'copper', 'coal']
+    slot = lambda: {'item': str(rng.choice(names)) if rng.random() < 0.8 else None, 'amount': int(rng.integers(0, 50))}
+    drops = [{'xy': [int(x), int(y)], 'name': str(rng.choice(names)), 'amount': int(a)} for x, y, a in rng.integers(0, 10000, (num_drops, 3))]
+    furnaces = [
+        {'xy': [int(x), int(y)], 'active': bool(x % 2), 'inv': {'input burn fuel': slot(), 'input smelt': slot(), 'output': slot()}} 
+        for x, y in rng.integers(0, 10000, (num_furnaces, 2))
+    ]
+    drills = [
+        {**furnace, 'ore data': {'iron': {'amount': 40, 'locations': [[1, 2], [2, 5]]}}, 'target ore': 'iron', 'num ore available': 40, 'ore col': 1, 'ore row': 3}
+        for furnace in furnaces[:num_drills]
+    ]
+    terrain = rng.integers(0, 20, (2, RES[1] // 4)).tolist() # the 'map slice' each drill used to save
+    old = {'item drop': drops, 'burner drill': [{**d, 'map slice': terrain} for d in drills], 'burner furnace': furnaces}
+    new = {
+        'item drop': SpriteRecords.encode(ItemDrop.save_columns, drops),
+        'burner drill': SpriteRecords.encode(Drill.save_columns, drills),
+        'burner furnace': SpriteRecords.encode(Furnace.save_columns, furnaces)
+    }
+    for sprites in (old, new):
+        sprites['payloads'] = {key: SaveFile.encode_record(value) for key, value in sprites.items()}
+
+    t_old = time_call(lambda: SpriteRecords.decode_all({k: SaveFile.decode_record(p, SaveFile.version) for k, p in old['payloads'].items()}))
+    t_new = time_call(lambda: SpriteRecords.decode_all({k: SaveFile.decode_record(p, SaveFile.version) for k, p in new['payloads'].items()}))
+    size = lambda sprites: sum(len(p) for p in sprites['payloads'].values())
+    print(
+        f'sprite records ({num_drops} item drops, {num_drills} drills, {num_furnaces} furnaces): '
+        f'{size(old) / 1024:.0f}KB -> {size(new) / 1024:.0f}KB, decoded in {t_old * 1000:.1f}ms -> {t_new * 1000:.1f}ms'
+    )
+
+
+def get_proc_gen(world_cache: object, gen_workers: int=1) -> object:
+    from proc_gen import ProcGen
+    return ProcGen(SimpleNamespace(screen=None, cam=SimpleNamespace(offset=None), save_data=None, world_cache=world_cache, gen_workers=gen_workers))
+
+
+def bench_world_cache() -> None:
+    '''generating the world vs mapping the arrays of the identical world cached by an earlier launch'''
+    import tempfile
+    from world_cache import WorldCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        world_cache = WorldCache(tmp)
+        start = perf_counter()
+        get_proc_gen(world_cache) # stores the world on the way out
+        t_gen = perf_counter() - start
+        t_load = time_call(lambda: get_proc_gen(world_cache))
+        print(f'world cache ({MAP_SIZE[0]}x{MAP_SIZE[1]} map): generated in {t_gen * 1000:.0f}ms -> {t_load * 1000:.1f}ms mapped from the cache')
+
+
+def bench_world_gen(worker_counts: tuple[int, ...]=(1, 2, 4, 8)) -> None:
+    '''world generation time per number of processes, the share of a single-process run that can be spread across processes is shown too'''
+    from world_cache import WorldCache
+
+    worlds, times = {}, {}
+    for num_workers in worker_counts:
+        times[num_workers] = time_call(lambda: worlds.__setitem__(num_workers, get_proc_gen(WorldCache(enabled=False), num_workers)), 2)
+    terrain = worlds[worker_counts[0]].terrain # redo the stages the pool takes over to time them
+    t_parallel = time_call(lambda: [terrain.cave_gen.gen_map(terrain.current_biome), *map(terrain.gen_band, terrain.biome_order)], 1)
+    print(
+        f'world gen ({MAP_SIZE[0]}x{MAP_SIZE[1]} map, {os.cpu_count()} cores): ' + 
+        ', '.join(f'{n} worker{"s" if n > 1 else ""} {t * 1000:.0f}ms' for n, t in times.items()) + 
+        f', {t_parallel / times[1]:.0%} of a single-process run is split across the workers'
+    )
+
+
+BENCHMARKS = {
+    'noise': bench_noise,
+    'chunk_bake': bench_chunk_bake,
+    'chunk_prefetch': bench_chunk_prefetch,
+    'sprite_index': bench_sprite_index,
+    'rotation': bench_rotation,
+    'collision_map': bench_collision_map,
+    'bodies': bench_bodies,
+    'liquids': bench_liquids,
+    'loose_tiles': bench_loose_tiles,
+    'broadphase': bench_broadphase,
+    'save': bench_save,
+    'delta_save': bench_delta_save,
+    'autosave': bench_autosave,
+    'sprite_records': bench_sprite_records,
+    'world_cache': bench_world_cache,
+    'world_gen': bench_world_gen,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
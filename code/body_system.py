@@ -0,0 +1,271 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from physics_engine import PhysicsEngine
+    from collision_detection import CollisionMap
+    from sprite_movement import SpriteMovement
+
+import pygame as pg
+import numpy as np
+
+from settings import TILE_SIZE, MAP_SIZE, MAX_PX_X, MAX_PX_Y
+
+class BodySystem:
+    '''
+    structure-of-arrays integrator for simple bodies (item drops etc.),
+    every body is moved & collided against the tile grid in one vectorized pass per tick and its sprite only mirrors the result for rendering
+    '''
+    def __init__(self, physics_engine: PhysicsEngine, capacity: int=256):
+        self.tile_map: np.ndarray = physics_engine.tile_map
+        self.collision_map: CollisionMap = physics_engine.collision_map
+        self.sprite_movement: SpriteMovement = physics_engine.sprite_movement
+
+        self.xy = np.zeros((capacity, 2), dtype=np.float64) # topleft, snapped to whole pixels every step like the pg.Rect it mirrors
+        self.velocity = np.zeros((capacity, 2), dtype=np.float64) # x is a direction scaled by move_speed like SpriteMovement, y is px/s
+        self.size = np.zeros((capacity, 2), dtype=np.int64)
+        self.half_gravity = np.zeros(capacity, dtype=np.float64)
+        self.move_speed = np.zeros(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.asleep = np.zeros(capacity, dtype=bool) # resting on the ground, skipped until a nearby tile changes
+        self.moving = np.zeros(capacity, dtype=bool) # changed pixel position last step, so the sprite is being interpolated
+        self.sprites: list[pg.sprite.Sprite | None] = [None] * capacity
+        self.free_idxs: list[int] = list(range(capacity - 1, -1, -1))
+        physics_engine.tile_listeners.append(self.update_tiles)
+
+        # 0 = not a ramp, 1 = left ramp, 2 = right ramp
+        self.ramp_lut = np.zeros(max(physics_engine.ids_to_names) + 1, dtype=np.int8)
+        for tile_id in self.collision_map.ramp_ids:
+            self.ramp_lut[tile_id] = 1 if 'left' in physics_engine.ids_to_names[tile_id] else 2
+
+    def add(self, sprite: pg.sprite.Sprite, direction: pg.Vector2, gravity: int, move_speed: float) -> None:
+        if not self.free_idxs:
+            self.grow()
+        idx = sprite.body_idx = self.free_idxs.pop()
+        self.xy[idx] = sprite.rect.topleft
+        self.velocity[idx] = direction
+        self.size[idx] = sprite.rect.size
+        self.half_gravity[idx] = gravity // 2 # SpriteMovement averages the velocity by applying half of the gravity before & after moving
+        self.move_speed[idx] = move_speed
+        self.alive[idx] = True
+        self.asleep[idx] = self.moving[idx] = False
+        self.sprites[idx] = sprite
+
+    def remove(self, sprite: pg.sprite.Sprite) -> None:
+        if (idx := getattr(sprite, 'body_idx', None)) is not None:
+            self.alive[idx] = self.asleep[idx] = self.moving[idx] = False
+            self.sprites[idx] = None
+            self.free_idxs.append(idx)
+            sprite.body_idx = None
+
+    def grow(self) -> None:
+        capacity = len(self.alive)
+        for name in ('xy', 'velocity', 'size', 'half_gravity', 'move_speed', 'alive', 'asleep', 'moving'):
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate((arr, np.zeros_like(arr))))
+        self.sprites.extend([None] * capacity)
+        self.free_idxs.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def step(self, dt: float) -> None:
+        idxs = np.flatnonzero(self.alive & ~self.asleep)
+        if not idxs.size:
+            return
+        xy, velocity, size = self.xy[idxs], self.velocity[idxs], self.size[idxs]
+        prev_xy = np.floor(xy).astype(np.int64)
+
+        xy[:, 0] = self.round_px(xy[:, 0] + velocity[:, 0] * self.move_speed[idxs] * dt)
+        xy[:, 0] = np.clip(xy[:, 0], 0, MAX_PX_X - size[:, 0]) # prevent moving off the map horizontally
+        self.sweep_x(prev_xy, xy, velocity, size)
+        grounded = self.resolve_ramps(xy, velocity, size)[0]
+
+        half_gravity = self.half_gravity[idxs]
+        velocity[:, 1] += half_gravity * dt
+        prev_y = xy[:, 1].astype(np.int64)
+        xy[:, 1] = self.round_px(xy[:, 1] + velocity[:, 1] * dt)
+        velocity[:, 1] += half_gravity * dt
+        xy[:, 1] = np.minimum(xy[:, 1], MAX_PX_Y - size[:, 1])
+        grounded |= self.sweep_y(prev_y, xy, velocity, size)
+        landed, under_ramp = self.resolve_ramps(xy, velocity, size)
+        grounded |= landed
+
+        velocity[(velocity[:, 0] != 0) & (velocity[:, 1].astype(np.int64) == 0), 0] = 0 # landed bodies stop sliding
+        self.xy[idxs], self.velocity[idxs] = xy, velocity
+        self.sync_sprites(idxs, prev_xy, xy.astype(np.int64))
+        # a body resting beside a ramp it overlaps gets lifted onto it once it starts falling again next step
+        self.sleep(idxs[grounded & ~under_ramp & (velocity == 0).all(axis=1)])
+
+    @staticmethod
+    def round_px(px: np.ndarray) -> np.ndarray:
+        '''round half away from zero, the same way pg.Rect stores a float coordinate'''
+        return np.trunc(px + np.copysign(0.5, px))
+
+    def sleep(self, idxs: np.ndarray) -> None:
+        self.asleep[idxs] = True
+        self.moving[idxs] = False
+        for idx in idxs.tolist():
+            sprite = self.sprites[idx]
+            sprite.prev_xy = sprite.rect.topleft # otherwise rendering keeps interpolating from the last step's position
+
+    def wake(self, idxs: np.ndarray) -> None:
+        self.asleep[idxs] = False
+        self.velocity[idxs] = 0
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        '''wake every sleeping body that's touching or directly next to a changed tile'''
+        if not (idxs := np.flatnonzero(self.asleep)).size:
+            return
+        left, top = (np.floor(self.xy[idxs]).astype(np.int64) // TILE_SIZE - 1).T
+        right, bottom = ((np.floor(self.xy[idxs]).astype(np.int64) + self.size[idxs] - 1) // TILE_SIZE + 1).T
+        tiles = np.asarray(tiles, dtype=np.int64).reshape(-1, 2)
+        touched = np.zeros(len(idxs), dtype=bool)
+        for i in range(0, len(tiles), 256): # keeps the bodies x tiles comparison small when a whole region changes at once
+            x, y = tiles[i:i + 256, 0], tiles[i:i + 256, 1]
+            touched |= (
+                (x >= left[:, None]) & (x <= right[:, None]) & (y >= top[:, None]) & (y <= bottom[:, None])
+            ).any(axis=1)
+        self.wake(idxs[touched])
+
+    def get_stats(self) -> dict[str, int]:
+        return {'awake': int((self.alive & ~self.asleep).sum()), 'asleep': int((self.alive & self.asleep).sum())}
+
+    def sweep_x(self, prev_xy: np.ndarray, xy: np.ndarray, velocity: np.ndarray, size: np.ndarray) -> None:
+        '''stop each body at the first tile column with a solid tile that its leading edge crossed'''
+        left, prev_left = np.floor(xy[:, 0]).astype(np.int64), prev_xy[:, 0]
+        right, prev_right = left + size[:, 0], prev_left + size[:, 0]
+        moving_right = left > prev_left
+        first_col = np.where(moving_right, (prev_right - 1) // TILE_SIZE + 1, prev_left // TILE_SIZE - 1)
+        last_col = np.where(moving_right, (right - 1) // TILE_SIZE, left // TILE_SIZE)
+        num_cols = np.where(left != prev_left, np.abs(last_col - first_col) + 1, 0)
+        num_cols[(last_col - first_col) * np.where(moving_right, 1, -1) < 0] = 0
+        if not num_cols.any():
+            return
+
+        top_row = prev_xy[:, 1] // TILE_SIZE
+        bottom_row = (prev_xy[:, 1] + size[:, 1] - 1) // TILE_SIZE
+        step = np.where(moving_right, 1, -1)
+        hit, hit_col = np.zeros(len(xy), dtype=bool), np.zeros(len(xy), dtype=np.int64)
+        for i in range(num_cols.max()):
+            col = first_col + step * i
+            active = (i < num_cols) & ~hit & (col >= 0) & (col < MAP_SIZE[0])
+            blocked = np.zeros(len(xy), dtype=bool)
+            for j in range((bottom_row - top_row).max() + 1):
+                row = top_row + j
+                mask = active & (row <= bottom_row) & (row >= 0) & (row < MAP_SIZE[1])
+                blocked[mask] |= self.collision_map.solid[col[mask], row[mask]]
+            newly_hit = active & blocked
+            hit_col[newly_hit] = col[newly_hit]
+            hit |= newly_hit
+
+        xy[hit & moving_right, 0] = hit_col[hit & moving_right] * TILE_SIZE - size[hit & moving_right, 0]
+        xy[hit & ~moving_right, 0] = (hit_col[hit & ~moving_right] + 1) * TILE_SIZE
+        velocity[hit, 0] = 0
+
+    def sweep_y(self, prev_y: np.ndarray, xy: np.ndarray, velocity: np.ndarray, size: np.ndarray) -> np.ndarray:
+        '''stop each body at the first solid tile row or ramp surface that its leading edge crossed, returns which bodies landed'''
+        top, prev_top = np.floor(xy[:, 1]).astype(np.int64), prev_y
+        bottom, prev_bottom = top + size[:, 1], prev_top + size[:, 1]
+        falling = top > prev_top
+        first_row = np.where(falling, (prev_bottom - 1) // TILE_SIZE + 1, prev_top // TILE_SIZE - 1)
+        last_row = np.where(falling, (bottom - 1) // TILE_SIZE, top // TILE_SIZE)
+        num_rows = np.where(top != prev_top, np.abs(last_row - first_row) + 1, 0)
+        num_rows[(last_row - first_row) * np.where(falling, 1, -1) < 0] = 0
+        if not num_rows.any():
+            return np.zeros(len(xy), dtype=bool)
+
+        left = np.floor(xy[:, 0]).astype(np.int64)
+        left_col, right_col = left // TILE_SIZE, (left + size[:, 0] - 1) // TILE_SIZE
+        center_x = left + size[:, 0] // 2
+        center_col = center_x // TILE_SIZE
+        step = np.where(falling, 1, -1)
+        hit, surface_y = np.zeros(len(xy), dtype=bool), np.zeros(len(xy), dtype=np.int64) # the y the leading edge stops at
+        for i in range(num_rows.max()):
+            row = first_row + step * i
+            active = (i < num_rows) & ~hit & (row >= 0) & (row < MAP_SIZE[1])
+            blocked = np.zeros(len(xy), dtype=bool)
+            for j in range((right_col - left_col).max() + 1):
+                col = left_col + j
+                mask = active & (col <= right_col) & (col >= 0) & (col < MAP_SIZE[0])
+                # ramps only act as floors under a body's center, rising into one is blocked like any other tile
+                blocked[mask] |= np.where(
+                    falling[mask],
+                    self.collision_map.solid[col[mask], row[mask]],
+                    self.collision_map.map[col[mask], row[mask]] & ~self.collision_map.liquid[col[mask], row[mask]]
+                )
+            newly_hit = active & blocked
+            surface_y[newly_hit] = np.where(falling[newly_hit], row[newly_hit] * TILE_SIZE, (row[newly_hit] + 1) * TILE_SIZE)
+            hit |= newly_hit
+
+            ramp_mask = active & ~blocked & falling & (center_col >= 0) & (center_col < MAP_SIZE[0])
+            ramp_dir = np.zeros(len(xy), dtype=np.int8)
+            ramp_dir[ramp_mask] = self.ramp_lut[self.tile_map[center_col[ramp_mask], row[ramp_mask]]]
+            if ramp_dir.any(): # same surface as CollisionDetection.get_ramp_y
+                tile_left = center_col * TILE_SIZE
+                ramp_y = np.where(
+                    ramp_dir == 1,
+                    row * TILE_SIZE + TILE_SIZE - np.clip(center_x - tile_left, 0, TILE_SIZE),
+                    row * TILE_SIZE + np.clip(center_x - (tile_left + TILE_SIZE), 0, TILE_SIZE)
+                )
+                on_ramp = (ramp_dir > 0) & (bottom > ramp_y)
+                surface_y[on_ramp] = ramp_y[on_ramp]
+                hit |= on_ramp
+
+        xy[hit & falling, 1] = surface_y[hit & falling] - size[hit & falling, 1]
+        xy[hit & ~falling, 1] = surface_y[hit & ~falling]
+        velocity[hit, 1] = 0
+        return hit & falling
+
+    def resolve_ramps(self, xy: np.ndarray, velocity: np.ndarray, size: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        the ramps a body overlaps after a sweep, handled like CollisionDetection.ramp_collision in the same tile order,
+        returns which bodies were set down on a ramp & which are still below the surface of a ramp they overlap
+        '''
+        left, top = xy[:, 0].astype(np.int64), xy[:, 1].astype(np.int64)
+        left_col, top_row = left // TILE_SIZE, top // TILE_SIZE
+        right_col, bottom_row = (left + size[:, 0]) // TILE_SIZE, (top + size[:, 1]) // TILE_SIZE # the same tile range as search_map
+        landed, under_ramp = np.zeros(len(xy), dtype=bool), np.zeros(len(xy), dtype=bool)
+        for i in range((right_col - left_col).max() + 1):
+            col = left_col + i
+            for j in range((bottom_row - top_row).max() + 1):
+                row = top_row + j
+                mask = (col <= right_col) & (row <= bottom_row) & (col < MAP_SIZE[0]) & (row < MAP_SIZE[1])
+                ramp_dir = np.zeros(len(xy), dtype=np.int8)
+                ramp_dir[mask] = self.ramp_lut[self.tile_map[col[mask], row[mask]]]
+                if not ramp_dir.any():
+                    continue
+                top = xy[:, 1].astype(np.int64) # an earlier ramp may have moved the body
+                tile_left, tile_top = col * TILE_SIZE, row * TILE_SIZE
+                overlap = (ramp_dir > 0) & (left < tile_left + TILE_SIZE) & (left + size[:, 0] > tile_left) \
+                    & (top < tile_top + TILE_SIZE) & (top + size[:, 1] > tile_top)
+                center_x = left + size[:, 0] // 2
+                ramp_y = np.where( # same surface as CollisionDetection.get_ramp_y
+                    ramp_dir == 1,
+                    tile_top + TILE_SIZE - np.clip(center_x - tile_left, 0, TILE_SIZE),
+                    tile_top + np.clip(center_x - (tile_left + TILE_SIZE), 0, TILE_SIZE)
+                )
+                below = overlap & (top + size[:, 1] > ramp_y)
+                lifted = below & (velocity[:, 1] > 0)
+                xy[lifted, 1] = ramp_y[lifted] - size[lifted, 1]
+                rising = overlap & (velocity[:, 1] < 0)
+                xy[rising, 1] = tile_top[rising] + TILE_SIZE
+                velocity[lifted | rising, 1] = 0
+                velocity[overlap, 0] = 0
+                landed |= lifted
+                under_ramp |= below & ~lifted
+        return landed, under_ramp
+
+    def sync_sprites(self, idxs: np.ndarray, prev_xy: np.ndarray, xy: np.ndarray) -> None:
+        '''
+        copy the new positions onto the sprites whose pixel position changed,
+        the bodies set their sprites' previous position for render interpolation themselves so only moving sprites are visited
+        '''
+        moved = (xy != prev_xy).any(axis=1)
+        stopped = np.flatnonzero(self.moving[idxs] & ~moved) # still being interpolated towards where they stopped
+        self.moving[idxs] = moved
+        moved = np.flatnonzero(moved)
+        for i, x, y in zip(moved.tolist(), xy[moved, 0].tolist(), xy[moved, 1].tolist()):
+            sprite = self.sprites[idxs[i]]
+            sprite.prev_xy = sprite.rect.topleft
+            sprite.rect.topleft = (x, y)
+            self.sprite_movement.sprite_index.move(sprite)
+        for i in stopped.tolist():
+            sprite = self.sprites[idxs[i]]
+            sprite.prev_xy = sprite.rect.topleft
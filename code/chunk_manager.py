@@ -2,18 +2,23 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
-    import numpy as np
     from asset_manager import AssetManager
+    from graphics_engine import Camera
 
-from settings import TILE_SIZE, RES, LIQUIDS, MAX_PX_X, MAX_PX_Y, MAP_SIZE
+from settings import TILE_SIZE, RES, LIQUIDS, MAP_SIZE, CHUNK_CACHE_MAX_MB
 from math import ceil
+from collections import OrderedDict, defaultdict
+from time import perf_counter
+import threading
 
 import pygame as pg
+import numpy as np
 
 class ChunkManager:
     '''divides the map into chunks of tiles to only render when they come into view'''
     def __init__(self, game_obj: Main) -> None:
         self.screen: pg.Surface = game_obj.screen
+        self.cam: Camera = game_obj.cam
         self.cam_offset: pg.Vector2 = game_obj.cam.offset
         self.asset_manager: AssetManager = game_obj.asset_manager
 
@@ -25,54 +30,278 @@ class ChunkManager:
 
         self.num_chunk_tiles = 24
         self.chunk_px_size = self.num_chunk_tiles * TILE_SIZE
+        self.num_chunks_x = ceil(MAP_SIZE[0] / self.num_chunk_tiles)
+        self.num_chunks_y = ceil(MAP_SIZE[1] / self.num_chunk_tiles)
+        # +1 since a screen that isn't aligned with the chunk grid overlaps a partial chunk on both edges
         self.num_screen_chunks_x = ceil(RES[0] / self.chunk_px_size) + 1
         self.num_screen_chunks_y = ceil(RES[1] / self.chunk_px_size) + 1
-        self.visible_chunks: list[list[tuple[int, int]]] = []
-        self.chunk_img_cache: dict[tuple[int, int], pg.Surface] = {} # making a collage of tile images within a chunk
+        self.visible_chunks: list[tuple[int, int]] = [] # chunk grid coordinates, the topleft tile is (x * num_chunk_tiles, y * num_chunk_tiles)
+        self.chunk_img_cache = ChunkCache(
+            max_bytes=CHUNK_CACHE_MAX_MB * 1024 ** 2,
+            min_bytes=self.num_screen_chunks_x * self.num_screen_chunks_y * self.chunk_px_size ** 2 * 4 # never evict a chunk that's still on screen
+        )
         self.get_mined_tile_img: callable = None # initialized in TerrainGraphics
-        
-    # TODO: cache this for visited chunks
-    def get_chunk(self, topleft_x: int, topleft_y: int) -> list[tuple[int, int]]:
+
+        # tile images are copied into the atlas the first time their id is baked, index 0 is left transparent for ignored tiles
+        self.tile_atlas = np.zeros((1, TILE_SIZE, TILE_SIZE), dtype=np.uint32) # pixels mapped to the SRCALPHA surface format
+        self.atlas_idxs = np.full(len(self.ids_to_names), -1, dtype=np.int32) # -1 = not looked up yet
+        self.oversized_ids: set[int] = set() # machines etc. whose image spans multiple tiles, blitted individually after the atlas pass
+        self.atlas_lock = threading.Lock() # both the render loop & the prefetch thread may add entries
+
+        self.chunk_versions: defaultdict[tuple[int, int], int] = defaultdict(int) # incremented on tile edits to discard bakes that started before the edit
+        self.num_stalls = 0 # visible chunks that had to be baked within the frame
+        self.stall_ms = self.last_frame_stall_ms = 0.0
+        self.prefetcher = ChunkPrefetcher(self)
+        game_obj.proc_gen.tile_listeners.append(self.update_tiles)
+
+    def get_chunk(self, chunk_x: int, chunk_y: int) -> list[tuple[int, int]]:
+        '''returns the coordinates of every tile within a chunk, clipped to the map borders'''
+        topleft_x, topleft_y = chunk_x * self.num_chunk_tiles, chunk_y * self.num_chunk_tiles
         return [
-            (x + topleft_x, y + topleft_y) 
-            for x in range(self.num_chunk_tiles) 
-            for y in range(self.num_chunk_tiles)
+            (x, y)
+            for x in range(topleft_x, min(topleft_x + self.num_chunk_tiles, MAP_SIZE[0]))
+            for y in range(topleft_y, min(topleft_y + self.num_chunk_tiles, MAP_SIZE[1]))
         ]
-        
+
+    def get_chunks_in_view(self, offset: pg.Vector2, span: pg.Vector2=pg.Vector2()) -> list[tuple[int, int]]:
+        '''chunks overlapping the screen at the given camera offset, extended by span (px) to cover where the camera is heading'''
+        # snapping to the chunk grid keeps the same keys in the cache while the camera moves within a chunk
+        min_x = int(min(offset.x, offset.x + span.x) // self.chunk_px_size)
+        min_y = int(min(offset.y, offset.y + span.y) // self.chunk_px_size)
+        max_x = int((max(offset.x, offset.x + span.x) + RES[0]) // self.chunk_px_size)
+        max_y = int((max(offset.y, offset.y + span.y) + RES[1]) // self.chunk_px_size)
+        return [
+            (x, y)
+            for x in range(max(0, min_x), min(max_x + 1, self.num_chunks_x))
+            for y in range(max(0, min_y), min(max_y + 1, self.num_chunks_y))
+        ]
+
     def update_chunks(self) -> None:
         '''adds/removes chunks as the camera offset shifts'''
-        self.visible_chunks.clear()
-        for x in range(self.num_screen_chunks_x):
-            for y in range(self.num_screen_chunks_y):
-                chunk_x = (x * self.num_chunk_tiles) + (self.cam_offset.x // TILE_SIZE)
-                chunk_y = (y * self.num_chunk_tiles) + (self.cam_offset.y // TILE_SIZE)
-                target_x = max(0, min(chunk_x, MAX_PX_X - 1))
-                target_y = max(0, min(chunk_y, MAX_PX_Y - 1))
-                self.visible_chunks.append(self.get_chunk(int(target_x), int(target_y)))
+        self.visible_chunks[:] = self.get_chunks_in_view(self.cam_offset)
 
     def render_chunks(self) -> None:
         self.update_chunks()
-        print(self.visible_chunks[-1][0][0] - self.visible_chunks[0][0][0])
+        self.last_frame_stall_ms = 0.0
         for chunk in self.visible_chunks:
-            topleft_tile = chunk[0]
-            if topleft_tile in self.chunk_img_cache:
-                img = self.chunk_img_cache[topleft_tile]
+            img = self.chunk_img_cache.get(chunk)
+            if img is None: # the prefetcher didn't get to it in time
+                start = perf_counter()
+                img = self.get_chunk_img(chunk)
+                self.num_stalls += 1
+                self.last_frame_stall_ms += (perf_counter() - start) * 1000
+            self.screen.blit(img, (chunk[0] * self.chunk_px_size, chunk[1] * self.chunk_px_size) - self.cam_offset)
+        self.stall_ms += self.last_frame_stall_ms
+        self.prefetcher.schedule(self.cam_offset, self.cam.velocity)
+
+    def get_chunk_img(self, chunk: tuple[int, int]) -> pg.Surface:
+        img = self.bake_chunk(chunk)
+        self.chunk_img_cache.add(chunk, img)
+        return img
+
+    def bake_chunk(self, chunk: tuple[int, int]) -> pg.Surface:
+        '''combines a chunk's individual tile images into one surface, safe to call from the prefetch thread'''
+        topleft_x, topleft_y = chunk[0] * self.num_chunk_tiles, chunk[1] * self.num_chunk_tiles
+        chunk_ids = self.tile_map[topleft_x:topleft_x + self.num_chunk_tiles, topleft_y:topleft_y + self.num_chunk_tiles] # view, clipped at the map borders
+        tiles_w, tiles_h = chunk_ids.shape
+        # read the indices before the atlas, update_atlas only publishes an index after the atlas containing it
+        atlas_idxs = self.atlas_idxs[chunk_ids]
+        if (atlas_idxs < 0).any():
+            self.update_atlas(np.unique(chunk_ids))
+            atlas_idxs = self.atlas_idxs[chunk_ids]
+
+        blit_surf = pg.Surface((tiles_w * TILE_SIZE, tiles_h * TILE_SIZE), pg.SRCALPHA) # canvas representing the entire chunk space
+        # gather every tile's pixels in one pass, viewing the surface as (tile x, px x, tile y, px y) avoids an intermediate reshape copy
+        pg.surfarray.pixels2d(blit_surf).reshape(tiles_w, TILE_SIZE, tiles_h, TILE_SIZE)[...] = np.take(
+            self.tile_atlas, atlas_idxs, axis=0
+        ).transpose(0, 2, 1, 3)
+
+        for x, y in self.get_unbatched_tiles(chunk_ids, topleft_x, topleft_y):
+            tile_coord = (topleft_x + x, topleft_y + y)
+            blit_surf.fill((0, 0, 0, 0), (x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+            if tile_img := self.get_tile_img(tile_coord):
+                blit_surf.blit(tile_img, (x * TILE_SIZE, y * TILE_SIZE))
+        return blit_surf
+
+    def update_atlas(self, tile_ids: np.ndarray) -> None:
+        with self.atlas_lock:
+            new_entries, new_idxs = [], {}
+            for tile_id in (int(i) for i in tile_ids if self.atlas_idxs[i] < 0):
+                if tile_id in self.tile_types_ignore:
+                    self.atlas_idxs[tile_id] = 0
+                    continue
+                tile_img = self.asset_manager.get_image(self.ids_to_names[tile_id])
+                if tile_img.get_size() != (TILE_SIZE, TILE_SIZE):
+                    self.oversized_ids.add(tile_id)
+                    self.atlas_idxs[tile_id] = 0
+                    continue
+                # store the result of blitting onto a transparent tile rather than the raw image so alpha blending matches a per-tile bake
+                entry = pg.Surface((TILE_SIZE, TILE_SIZE), pg.SRCALPHA)
+                entry.blit(tile_img, (0, 0))
+                new_idxs[tile_id] = len(self.tile_atlas) + len(new_entries)
+                new_entries.append(pg.surfarray.array2d(entry))
+            if new_entries:
+                self.tile_atlas = np.concatenate((self.tile_atlas, np.stack(new_entries)))
+                for tile_id, idx in new_idxs.items():
+                    self.atlas_idxs[tile_id] = idx
+
+    def get_unbatched_tiles(self, chunk_ids: np.ndarray, topleft_x: int, topleft_y: int) -> list[tuple[int, int]]:
+        '''tiles within the chunk (relative to its topleft) that the atlas can't represent'''
+        tiles = [(int(x), int(y)) for x, y in np.argwhere(np.isin(chunk_ids, list(self.oversized_ids)))] if self.oversized_ids else []
+        tiles_w, tiles_h = chunk_ids.shape
+        for x, y in list(self.mining_map): # copied since the prefetch thread may read it while mining adds/removes tiles
+            if 0 <= x - topleft_x < tiles_w and 0 <= y - topleft_y < tiles_h:
+                tiles.append((x - topleft_x, y - topleft_y))
+        return tiles
+
+    def get_tile_img(self, tile_coord: tuple[int, int]) -> pg.Surface | None:
+        if self.tile_map[tile_coord] in self.tile_types_ignore:
+            return None
+        if tile_coord in self.mining_map:
+            return self.get_mined_tile_img(*tile_coord)
+        return self.asset_manager.get_image(self.ids_to_names[self.tile_map[tile_coord]])
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        '''patch the cached surfaces of chunks containing edited tiles rather than re-baking them'''
+        chunk_tiles = defaultdict(list) # grouped so a bulk edit bumps each chunk's version & looks up its surface once
+        for tile_coord in tiles:
+            chunk_tiles[(tile_coord[0] // self.num_chunk_tiles, tile_coord[1] // self.num_chunk_tiles)].append(tile_coord)
+        for chunk, chunk_coords in chunk_tiles.items():
+            self.chunk_versions[chunk] += 1
+            if (surf := self.chunk_img_cache.peek(chunk)) is None: # baked with the new tiles once it comes into view
+                continue
+            for tile_coord in chunk_coords:
+                xy = ((tile_coord[0] % self.num_chunk_tiles) * TILE_SIZE, (tile_coord[1] % self.num_chunk_tiles) * TILE_SIZE)
+                surf.fill((0, 0, 0, 0), (*xy, TILE_SIZE, TILE_SIZE)) # clear to transparent before blitting, the tile images may have transparent pixels
+                if tile_img := self.get_tile_img(tile_coord):
+                    surf.blit(tile_img, xy)
+
+
+class ChunkCache:
+    '''least recently used cache of baked chunk surfaces, bounded by the memory their pixels occupy'''
+    def __init__(self, max_bytes: int, min_bytes: int=0):
+        self.max_bytes = max(max_bytes, min_bytes)
+        self.surfs: OrderedDict[tuple[int, int], pg.Surface] = OrderedDict() # ordered from least to most recently used
+        self.num_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.RLock() # surfaces are published from the prefetch thread
+
+    def get(self, chunk: tuple[int, int]) -> pg.Surface | None:
+        with self.lock:
+            surf = self.surfs.get(chunk)
+            if surf is None:
+                self.misses += 1
             else:
-                img = self.get_chunk_img(chunk, topleft_tile)
-            self.screen.blit(img, (topleft_tile[0] * TILE_SIZE, topleft_tile[1] * TILE_SIZE) - self.cam_offset)
-
-    def get_chunk_img(self, chunk: list[tuple[int, int]], topleft_tile: tuple[int, int]) -> pg.Surface:
-        '''combines a chunk's individual tile images into one surface'''
-        img_w = min(self.chunk_px_size, MAX_PX_X - topleft_tile[0])
-        img_h = min(self.chunk_px_size, MAX_PX_Y - topleft_tile[1])
-        blit_surf = pg.Surface((img_w, img_h), pg.SRCALPHA) # canvas representing the entire chunk space where individual tile images will be blitted
-        for x in range(img_w // TILE_SIZE):
-            for y in range(img_h // TILE_SIZE):
-                tile_coord = (min(topleft_tile[0] + x, MAP_SIZE[0] - 1), min(topleft_tile[1] + y, MAP_SIZE[1] - 1))
-                if self.tile_map[tile_coord] not in self.tile_types_ignore:
-                    tile_img = self.asset_manager.get_image(self.ids_to_names[self.tile_map[tile_coord]])
-                    if tile_coord in self.mining_map:
-                        tile_img = self.get_mined_tile_img(tile_coord, tile_img)
-                    blit_surf.blit(tile_img, (x * TILE_SIZE, y * TILE_SIZE))
-        self.chunk_img_cache[topleft_tile] = blit_surf
-        return blit_surf
\ No newline at end of file
+                self.hits += 1
+                self.surfs.move_to_end(chunk)
+            return surf
+
+    def peek(self, chunk: tuple[int, int]) -> pg.Surface | None:
+        '''get without counting a lookup or refreshing the chunk's position'''
+        with self.lock:
+            return self.surfs.get(chunk)
+
+    def add(self, chunk: tuple[int, int], surf: pg.Surface) -> None:
+        with self.lock:
+            self.remove(chunk)
+            self.surfs[chunk] = surf
+            self.num_bytes += self.get_surf_bytes(surf)
+            while self.num_bytes > self.max_bytes and len(self.surfs) > 1:
+                _, evicted = self.surfs.popitem(last=False)
+                self.num_bytes -= self.get_surf_bytes(evicted)
+                self.evictions += 1
+
+    def remove(self, chunk: tuple[int, int]) -> None:
+        with self.lock:
+            if (surf := self.surfs.pop(chunk, None)) is not None:
+                self.num_bytes -= self.get_surf_bytes(surf)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.surfs.clear()
+            self.num_bytes = 0
+
+    def __contains__(self, chunk: tuple[int, int]) -> bool:
+        return chunk in self.surfs
+
+    @staticmethod
+    def get_surf_bytes(surf: pg.Surface) -> int:
+        return surf.get_pitch() * surf.get_height()
+
+    def get_stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            'chunks': len(self.surfs),
+            'mb used': self.num_bytes / 1024 ** 2,
+            'mb budget': self.max_bytes / 1024 ** 2,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ChunkPrefetcher:
+    '''bakes the chunks the camera is moving towards on a worker thread so render_chunks rarely has to bake within a frame'''
+    def __init__(self, chunk_manager: ChunkManager, lookahead_frames: int=45):
+        self.chunk_manager = chunk_manager
+        self.cache: ChunkCache = chunk_manager.chunk_img_cache
+        self.lookahead_frames = lookahead_frames # how far ahead to extrapolate the camera's velocity
+
+        self.queue: list[tuple[int, int]] = [] # replaced on every schedule() so a change in direction drops outdated requests
+        self.condition = threading.Condition()
+        self.running = True
+        self.num_baked = self.num_discarded = 0
+        self.thread = threading.Thread(target=self.run, daemon=True) # pygame releases the GIL while blitting/filling
+        self.thread.start()
+
+    def schedule(self, cam_offset: pg.Vector2, cam_velocity: pg.Vector2) -> None:
+        if not cam_velocity:
+            return
+        visible = set(self.chunk_manager.visible_chunks)
+        chunks = [
+            c for c in self.chunk_manager.get_chunks_in_view(cam_offset, cam_velocity * self.lookahead_frames)
+            if c not in visible and self.cache.peek(c) is None
+        ]
+        if chunks:
+            screen_center = (cam_offset + pg.Vector2(RES) / 2) // self.chunk_manager.chunk_px_size
+            chunks.sort(key=lambda c: screen_center.distance_squared_to(c)) # the nearest chunks enter the view first
+            with self.condition:
+                self.queue = chunks
+                self.condition.notify()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                chunk = self.queue.pop(0)
+
+            if self.cache.peek(chunk) is not None:
+                continue
+            version = self.chunk_manager.chunk_versions[chunk]
+            img = self.chunk_manager.bake_chunk(chunk)
+            with self.cache.lock: # check & publish atomically so a tile edit or an in-frame bake can't be overwritten
+                if self.chunk_manager.chunk_versions[chunk] != version or chunk in self.cache:
+                    self.num_discarded += 1
+                else:
+                    self.cache.add(chunk, img)
+                    self.num_baked += 1
+
+    def stop(self) -> None:
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+    def get_stats(self) -> dict[str, int | float]:
+        return {
+            'prefetched': self.num_baked,
+            'discarded': self.num_discarded,
+            'queued': len(self.queue),
+            'stalls': self.chunk_manager.num_stalls,
+            'stall ms': self.chunk_manager.stall_ms,
+            'last frame stall ms': self.chunk_manager.last_frame_stall_ms,
+        }
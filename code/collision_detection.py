@@ -2,12 +2,11 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Sequence
 if TYPE_CHECKING:
     from physics_engine import PhysicsEngine
-    import numpy as np
     
 import pygame as pg
-from collections import defaultdict
+import numpy as np
 
-from settings import TILE_SIZE, MAP_SIZE
+from settings import TILE_SIZE, MAP_SIZE, LIQUIDS
 
 class CollisionDetection:
     def __init__(self, physics_engine: PhysicsEngine):
@@ -18,16 +17,19 @@ class CollisionDetection:
         self.cam_offset: pg.Vector2 = physics_engine.cam_offset
         self.step_over_tile: callable = physics_engine.step_over_tile
 
-        self.ramp_ids = {self.names_to_ids[tile] for tile in self.names_to_ids if 'ramp' in tile}
-        self.liquid_ids = {self.names_to_ids['water']} # TODO: add lava
+        self.ramp_ids: set[int] = self.collision_map.ramp_ids
+        self.liquid_ids: set[int] = self.collision_map.liquid_ids
 
-    def tile_collision_update(self, spr: pg.sprite.Sprite, axis: str) -> None:
+    def tile_collision_update(self, spr: pg.sprite.Sprite, axis: str, prev_rect: pg.Rect) -> None:
+        '''prev_rect is the sprite's rect before it moved along the axis'''
+        self.sweep_x(spr, prev_rect) if axis == 'x' else self.sweep_y(spr, prev_rect)
         tiles_near = self.collision_map.search_map(spr)
         if not tiles_near: # surrounded by air
             spr.grounded = False
             spr.state = 'jumping' # the jumping graphic applies to both jumping/falling
             return
         has_underwater_attr = hasattr(spr, 'underwater')
+        # the sweep stops the sprite short of solid tiles, resolving overlaps still covers ramps & tiles placed onto a sprite
         for tile in tiles_near:
             if spr.rect.colliderect(tile):
                 tile_id = self.tile_map[tile.x // TILE_SIZE, tile.y // TILE_SIZE]
@@ -39,8 +41,58 @@ class CollisionDetection:
                             self.tile_collision_x(spr, tile, 'right' if spr.direction.x > 0 else 'left')
                         elif axis == 'y' and spr.direction.y:
                             self.tile_collision_y(spr, tile, 'up' if spr.direction.y < 0 else 'down')
-                if has_underwater_attr:
-                        self.check_spr_underwater(spr)
+        if has_underwater_attr:
+            self.check_spr_underwater(spr)
+
+    def sweep_x(self, spr: pg.sprite.Sprite, prev_rect: pg.Rect) -> None:
+        '''walk the tile columns the sprite's leading edge crossed & stop it at the first one with a solid tile'''
+        if spr.rect.x == prev_rect.x:
+            return
+        top_row, bottom_row = max(0, spr.rect.top // TILE_SIZE), min(MAP_SIZE[1], (spr.rect.bottom - 1) // TILE_SIZE + 1)
+        if spr.rect.x > prev_rect.x:
+            cols, direction = range((prev_rect.right - 1) // TILE_SIZE + 1, (spr.rect.right - 1) // TILE_SIZE + 1), 'right'
+        else:
+            cols, direction = range(prev_rect.left // TILE_SIZE - 1, spr.rect.left // TILE_SIZE - 1, -1), 'left'
+        for col in cols:
+            if 0 <= col < MAP_SIZE[0] and (rows := np.flatnonzero(self.collision_map.solid[col, top_row:bottom_row])).size:
+                tile = pg.Rect(col * TILE_SIZE, (top_row + int(rows[0])) * TILE_SIZE, TILE_SIZE, TILE_SIZE) # topmost, like the overlap order
+                if direction == 'right':
+                    spr.rect.right = tile.left
+                else:
+                    spr.rect.left = tile.right
+                self.tile_collision_x(spr, tile, direction)
+                return
+
+    def sweep_y(self, spr: pg.sprite.Sprite, prev_rect: pg.Rect) -> None:
+        '''walk the tile rows the sprite's leading edge crossed & stop it at the first solid tile or ramp surface'''
+        if spr.rect.y == prev_rect.y:
+            return
+        left_col, right_col = max(0, spr.rect.left // TILE_SIZE), min(MAP_SIZE[0], (spr.rect.right - 1) // TILE_SIZE + 1)
+        center_col = spr.rect.centerx // TILE_SIZE
+        falling = spr.rect.y > prev_rect.y
+        if falling:
+            rows = range((prev_rect.bottom - 1) // TILE_SIZE + 1, (spr.rect.bottom - 1) // TILE_SIZE + 1)
+        else:
+            rows = range(prev_rect.top // TILE_SIZE - 1, spr.rect.top // TILE_SIZE - 1, -1)
+        solid, occupied, liquid = self.collision_map.solid, self.collision_map.map, self.collision_map.liquid
+        for row in (r for r in rows if 0 <= r < MAP_SIZE[1]):
+            # ramps only act as floors under the sprite's center, rising into one is blocked like any other tile
+            row_tiles = solid[left_col:right_col, row] if falling else occupied[left_col:right_col, row] & ~liquid[left_col:right_col, row]
+            if (cols := np.flatnonzero(row_tiles)).size:
+                tile = pg.Rect((left_col + int(cols[0])) * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                if falling:
+                    spr.rect.bottom = tile.top
+                    self.tile_collision_y(spr, tile, 'down')
+                else:
+                    spr.rect.top = tile.bottom
+                    self.tile_collision_y(spr, tile, 'up')
+                return
+            if falling and 0 <= center_col < MAP_SIZE[0] and (tile_id := self.tile_map[center_col, row]) in self.ramp_ids:
+                tile = pg.Rect(center_col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                ramp_direction = 'left' if 'left' in self.ids_to_names[tile_id] else 'right'
+                if spr.rect.bottom > self.get_ramp_y(spr, tile, ramp_direction):
+                    self.ramp_collision(spr, tile, ramp_direction)
+                    return
     
     def tile_collision_x(self, sprite: pg.sprite.Sprite, tile: pg.Rect, direction: str) -> None:
         if not self.step_over_tile(sprite, tile.x // TILE_SIZE, tile.y // TILE_SIZE):
@@ -75,15 +127,17 @@ class CollisionDetection:
         sprite.direction.y = 0
     
     @staticmethod
-    def ramp_collision(sprite: pg.sprite.Sprite, tile: pg.Rect, ramp_direction: str) -> None:
+    def get_ramp_y(sprite: pg.sprite.Sprite, tile: pg.Rect, ramp_direction: str) -> int:
+        '''height of the ramp's surface below the sprite's center'''
         if ramp_direction == 'left':
             rel_x = max(0, min(sprite.rect.centerx - tile.left, TILE_SIZE)) # sprite coords relative to the ramp
-            ramp_y = tile.top + (TILE_SIZE - rel_x)
+            return tile.top + (TILE_SIZE - rel_x)
         
-        elif ramp_direction == 'right':
-            rel_x = max(0, min(sprite.rect.centerx - tile.right, TILE_SIZE))
-            ramp_y = tile.top + rel_x
-    
+        rel_x = max(0, min(sprite.rect.centerx - tile.right, TILE_SIZE))
+        return tile.top + rel_x
+
+    def ramp_collision(self, sprite: pg.sprite.Sprite, tile: pg.Rect, ramp_direction: str) -> None:
+        ramp_y = self.get_ramp_y(sprite, tile, ramp_direction)
         if sprite.direction.y > 0:
             if sprite.rect.bottom > ramp_y:
                 sprite.rect.bottom = ramp_y
@@ -118,55 +172,35 @@ class CollisionDetection:
 
 
 class CollisionMap:
+    '''dense grids of which tiles are occupied (non-air) & which of those block movement, indexed like the tile map'''
     def __init__(self, physics_engine: PhysicsEngine):
         self.tile_map: np.ndarray = physics_engine.tile_map
         self.names_to_ids: dict[str, int] = physics_engine.names_to_ids
-
-        self.cell_size = 10
-        self.map = defaultdict(list)
-        self.generate_map()
-
-    def generate_map(self) -> None:
-        '''precompute rects with the coordinates of solid tiles'''
-        for x in range(MAP_SIZE[0]):
-            for y in range(MAP_SIZE[1]):
-                if self.tile_map[x, y] != self.names_to_ids['air']: 
-                    cell_coords = (x // self.cell_size, y // self.cell_size)
-                    self.map[cell_coords].append(pg.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        self.air_id = self.names_to_ids['air']
+        self.ramp_ids = {self.names_to_ids[tile] for tile in self.names_to_ids if 'ramp' in tile}
+        self.liquid_ids = {self.names_to_ids[liquid] for liquid in LIQUIDS}
+        # indexed by tile id so a batch of edited tiles can be looked up at once
+        self.liquid_lut = np.zeros(len(physics_engine.ids_to_names), dtype=bool)
+        self.liquid_lut[list(self.liquid_ids)] = True
+        self.solid_lut = np.ones(len(physics_engine.ids_to_names), dtype=bool)
+        self.solid_lut[[self.air_id, *self.liquid_ids, *self.ramp_ids]] = False
+
+        self.map: np.ndarray = self.tile_map != self.air_id
+        self.liquid: np.ndarray = self.liquid_lut[self.tile_map]
+        self.solid: np.ndarray = self.solid_lut[self.tile_map] # stops swept movement
+        physics_engine.tile_listeners.append(self.update_tiles) # mined/placed/converted tiles update their cell directly
 
     def search_map(self, sprite: pg.sprite.Sprite) -> list[pg.Rect]:
-        '''extract the rects within the current cell for collision detection'''
-        rects = []
-        # determine which collision map cell(s) the player is within
-        min_tile_x = sprite.rect.left // TILE_SIZE
-        max_tile_x = sprite.rect.right // TILE_SIZE
-
-        min_tile_y = sprite.rect.top // TILE_SIZE
-        max_tile_y = sprite.rect.bottom // TILE_SIZE
-
-        min_cell_x = min_tile_x // self.cell_size
-        max_cell_x = max_tile_x // self.cell_size
-
-        min_cell_y = min_tile_y // self.cell_size
-        max_cell_y = max_tile_y // self.cell_size
-        
-        for cell_x in range(min_cell_x, max_cell_x + 1):
-            for cell_y in range(min_cell_y, max_cell_y + 1): 
-                if (cell_x, cell_y) in self.map:
-                    rects.extend(self.map[(cell_x, cell_y)])
-
-        return rects
-
-    # update tiles that have been mined/placed, will also have to account for the use of explosives and perhaps weather altering the terrain
-    def update_map(self, tile_coords: tuple[int, int], add_tile: bool = False, remove_tile: bool = False) -> None:
-        cell_coords = (tile_coords[0] // self.cell_size, tile_coords[1] // self.cell_size)
-        rect = pg.Rect(tile_coords[0] * TILE_SIZE, tile_coords[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)    
-        if cell_coords in self.map: # false if you're up in the stratosphere
-            if add_tile and rect not in self.map[cell_coords]:
-                self.map[cell_coords].append(rect)
-            
-            elif remove_tile and rect in self.map[cell_coords]:
-                # sprites could occasionally pass through tiles whose graphic was still being rendered
-                # removing the associated rectangle only after the tile ID update is confirmed appears to fix the issue
-                if self.tile_map[tile_coords] == self.names_to_ids['air']:
-                    self.map[cell_coords].remove(rect)
\ No newline at end of file
+        '''rects of the occupied tiles within the tile range the sprite's rect overlaps'''
+        left, top = max(0, sprite.rect.left // TILE_SIZE), max(0, sprite.rect.top // TILE_SIZE)
+        right = min(MAP_SIZE[0], sprite.rect.right // TILE_SIZE + 1)
+        bottom = min(MAP_SIZE[1], sprite.rect.bottom // TILE_SIZE + 1)
+        xs, ys = np.nonzero(self.map[left:right, top:bottom])
+        return [pg.Rect((left + x) * TILE_SIZE, (top + y) * TILE_SIZE, TILE_SIZE, TILE_SIZE) for x, y in zip(xs.tolist(), ys.tolist())]
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        xs, ys = np.asarray(tiles, dtype=np.int64).reshape(-1, 2).T
+        tile_ids = self.tile_map[xs, ys]
+        self.map[xs, ys] = tile_ids != self.air_id
+        self.liquid[xs, ys] = self.liquid_lut[tile_ids]
+        self.solid[xs, ys] = self.solid_lut[tile_ids]
@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
-    from asset_manager import AssetManager
+    from asset_manager import AssetManager, AnimationAtlas
     from sprite_manager import SpriteManager
     from input_manager import Keyboard, Mouse
 
@@ -16,11 +16,14 @@ from settings import Z_LAYERS, GRAVITY, TILE_SIZE, BIOME_WIDTH
 from alarm import Alarm
 
 class Colonist(AnimatedSprite):
+    save_columns = { # see SpriteRecords
+        'xy': 'xy', 'current biome': 'str', 'inventory data': 'inventory', 'facing left': 'bool', 'hp': 'int', 'oxygen lvl': 'int', 'item holding': 'str'
+    }
     def __init__(
         self,
         game_obj: Main,
         xy: pg.Vector2,
-        frames: dict[str, pg.Surface],
+        frames: AnimationAtlas,
         sprite_groups: list[pg.sprite.Group],
         move_speed: int=500,
         animation_speed: dict[str, int]={'walking': 8, 'mining': 4, 'jumping': 0},
@@ -105,7 +108,7 @@ class Colonist(AnimatedSprite):
                 self.rect.center,
                 self.graphics[item_name],
                 Z_LAYERS['main'],
-                [self.sprite_manager.all_sprites, self.sprite_manager.active_sprites],
+                [self.sprite_manager.all_sprites, self.sprite_manager.item_sprites],
                 self.sprite_manager,
                 pg.Vector2(choice((-1, 1)), 1),
                 item_name,
@@ -136,5 +139,6 @@ class Colonist(AnimatedSprite):
             'inventory data': {'contents': self.inventory.contents, 'index': self.inventory.index},
             'facing left': self.facing_left, 
             'hp': self.hp, 
+            'oxygen lvl': self.oxygen_lvl, 
             'item holding': self.item_holding
         }
\ No newline at end of file
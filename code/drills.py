@@ -16,6 +16,8 @@ from machine_sprite_base import Machine, Inv, InvSlot
 from settings import TILE_SIZE, TILE_ORE_RATIO, MAP_SIZE, RES, Z_LAYERS
 
 class Drill(Machine, ABC):
+    save_columns = {**Machine.save_columns, 'ore data': 'json', 'target ore': 'str', 'num ore available': 'int', 'ore col': 'int', 'ore row': 'int'}
+
     def __init__(
         self, 
         save_data: dict[str, any],
@@ -28,6 +30,7 @@ class Drill(Machine, ABC):
         super().__init__(save_data=save_data, xy=xy, image=image, sprite_groups=sprite_groups, game_obj=game_obj, ui=ui)
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
         self.ids_to_names: dict[int, str] = game_obj.proc_gen.ids_to_names
+        self.set_tile: callable = game_obj.proc_gen.set_tile
 
         self.inv = Inv(input_slots=None) # only burners have an input slot (for fuel)
 
@@ -37,7 +40,7 @@ class Drill(Machine, ABC):
         max_y = min_y + min(MAP_SIZE[1] - min_y, RES[1] // 4)
         self.span_x = max_x - min_x
         self.span_y = max_y - min_y
-        self.map_slice = save_data['map slice'] if save_data else self.tile_map[min_x:max_x, min_y:max_y]
+        self.map_slice = self.tile_map[min_x:max_x, min_y:max_y] # a view, so saves only need the drill's position
 
         self.ignore_ids = {self.names_to_ids[name] for name in ('air', 'dirt', 'item extended')} # keep above self.ore_data, get_ore_data() references it
         self.ore_data = save_data['ore data'] if save_data else self.get_ore_data()
@@ -82,16 +85,16 @@ class Drill(Machine, ABC):
         if dirs := self.get_neighbor_dirs(tile_xy):
             neighbor_id_counter = Counter(self.tile_map[tile_xy + xy] for xy in dirs)
         else:
-            self.tile_map[tile_xy] = self.names_to_ids['air']
+            self.set_tile(tile_xy, self.names_to_ids['air'])
             return
         (ids, freqs) = zip(*neighbor_id_counter.most_common())
         f0, f1, f2, f3 = (list(freqs) + [0, 0, 0])[:4] # adding zeros to follow in case the original list has less than 4 elements
         if f0 > f1:
-            self.tile_map[tile_xy] = ids[0]
+            self.set_tile(tile_xy, ids[0])
         elif f0 == f1 and f1 != f2: # f0 & f1 have the majority
-            self.tile_map[tile_xy] = choice(ids[:2])
+            self.set_tile(tile_xy, choice(ids[:2]))
         else: # all indices store different tiles
-            self.tile_map[tile_xy] = choice(ids)
+            self.set_tile(tile_xy, choice(ids))
 
     def get_neighbor_dirs(self, tile_xy: tuple[int, int]) -> list[tuple[int, int]]:
         dirs = [(0, -1), (1, 0), (0, 1), (-1, 0)]
@@ -135,14 +138,12 @@ class Drill(Machine, ABC):
         
     def get_save_data(self) -> dict[str, list|dict]:
         return {
-            'xy': list(self.rect.topleft), 
-            'map slice': self.map_slice.tolist(), 
+            **super().get_save_data(), 
             'ore data': self.ore_data, 
             'target ore': self.target_ore, 
             'num ore available': self.num_ore_available, 
             'ore col': self.ore_col, 
-            'ore row': self.ore_row, 
-            'output': self.output
+            'ore row': self.ore_row
         }
 
 
@@ -165,6 +166,7 @@ class BurnerDrill(Drill):
         }
         self.max_capacity = {'fuel': 50, 'output': 99}
         self.inv.input_slots = {'fuel': InvSlot(valid_inputs=self.fuel_sources.keys(), max_capacity=self.max_capacity['fuel'])}
+        self.load_inv(save_data)
         self.alarms['burn fuel'] = Alarm(
             2000 * self.speed_factor * self.extract_time_factor * (self.ore_row + 1), 
             self.burn_fuel, 
@@ -193,4 +195,5 @@ class ElectricDrill(Drill):
         super().__init__(save_data=save_data, xy=xy, image=image, sprite_groups=sprite_groups, game_obj=game_obj, ui=ui)
         self.variant = 'electric'
         self.fuel_sources = {'electric poles'}
+        self.load_inv(save_data)
         self.init_ui(DrillUI)  
\ No newline at end of file
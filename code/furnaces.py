@@ -70,14 +70,6 @@ class Furnace(Machine, ABC):
         for alarm in self.alarms.values():
             alarm.update()
 
-    def get_save_data(self) -> dict[str, list|str]:
-        return {
-            'xy': list(self.rect.topleft), 
-            'smelt input': self.smelt_input, 
-            'fuel input': self.fuel_input, 
-            'output': self.output
-        }
-
     def update(self, dt: float) -> None:
         self.ui.update()
         self.update_active_state()
@@ -103,6 +95,7 @@ class BurnerFurnace(Furnace):
         self.variant = 'burner'
         self.recipe = PRODUCTION['burner furnace']['recipe']
         self.speed_factor = 1
+        self.load_inv(save_data)
         self.init_ui(FurnaceUI)
 
 
@@ -122,4 +115,5 @@ class ElectricFurnace(Furnace):
         self.inv = Inventory(input_slots={'smelt': InvSlot(valid_inputs=self.can_smelt.keys())})
         self.fuel_sources = {'electric poles'}
         self.speed_factor = 2.5
+        self.load_inv(save_data)
         self.init_ui(FurnaceUI)
\ No newline at end of file
@@ -2,11 +2,12 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
-    from asset_manager import AssetManager
+    from asset_manager import AssetManager, TransformCache
     from proc_gen import ProcGen
     from sprite_manager import SpriteManager
     from chunk_manager import ChunkManager
     from player import Player
+    from liquid_flow import LiquidFlow
     import numpy as np
     
 import pygame as pg
@@ -15,6 +16,7 @@ from math import floor, ceil, sin
 
 from settings import *
 from weather import Weather
+from sprite_groups import ANIMATED, COLONIST
 
 class GraphicsEngine:
     def __init__(self, game_obj: Main):
@@ -35,11 +37,14 @@ class GraphicsEngine:
         
         self.terrain_graphics = TerrainGraphics(game_obj)
 
-        self.tool_animation = ToolAnimation(self.screen, self.render_item_held)
+        self.transform_cache: TransformCache = game_obj.asset_manager.transform_cache
+        self.tool_animation = ToolAnimation(self.screen, self.render_item_held, self.transform_cache)
 
         self.weather = Weather(self.screen, game_obj.save_data['weather'] if game_obj.save_data else None)
 
         # only render an equipped item while the sprite is in a given state
+        self.render_alpha = 1.0 # fraction of a simulation step the current frame is past the last one
+
         self.item_render_states = {
             'pickaxe': {'mining', 'fighting'},
             'axe': {'chopping', 'fighting'}
@@ -50,30 +55,35 @@ class GraphicsEngine:
             spr.frame_index += spr.animation_speed[spr.state] * dt
             if self.flip_sprite_x(spr):
                 spr.facing_left = not spr.facing_left
-            spr.image = pg.transform.flip(spr.frames[spr.state][int(spr.frame_index % len(spr.frames[spr.state]))], not spr.facing_left, False)
+            spr.image = spr.frames.get_frame(spr.state, spr.frame_index, spr.facing_left)
         else:
-            image = spr.frames['idle'][0]
             # added 'and sprite.facing_left' to prevent flipping left after lifting the right key
-            spr.image = image if not self.flip_sprite_x(spr) and spr.facing_left else pg.transform.flip(image, True, False)
+            spr.image = spr.frames.get_frame('idle', 0, not self.flip_sprite_x(spr) and spr.facing_left)
         
+    @staticmethod
+    def get_render_xy(spr: pg.sprite.Sprite, alpha: float) -> pg.Vector2:
+        '''the sprite's topleft interpolated between the last 2 simulation steps'''
+        if (prev_xy := getattr(spr, 'prev_xy', None)) is None: # static or not simulated
+            return pg.Vector2(spr.rect.topleft)
+        return pg.Vector2(prev_xy).lerp(spr.rect.topleft, alpha)
+
     @staticmethod
     def flip_sprite_x(sprite: pg.sprite.Sprite) -> bool:
         return sprite.facing_left and sprite.direction.x > 0 or not sprite.facing_left and sprite.direction.x < 0
         
-    def render_sprites(self, dt: float) -> None:
-        for spr in sorted(
-            self.sprite_manager.get_sprites_in_radius(self.player.rect, self.sprite_manager.all_sprites), 
-            key=lambda spr: spr.z
-        ): 
-            self.screen.blit(spr.image, spr.rect.topleft - self.cam.offset)
-            if groups := self.sprite_manager.get_sprite_groups(spr): # the sprite isn't just a member of all_sprites
-                self.render_group_action(groups, spr, dt)
+    def render_sprites(self, dt: float, alpha: float=1.0) -> None:
+        # already ordered by z, the index walks its z buckets in order
+        self.render_alpha = alpha # also read by render_item_held
+        for spr in self.sprite_manager.get_sprites_in_radius(self.player.rect, self.sprite_manager.all_sprites): 
+            self.screen.blit(spr.image, self.get_render_xy(spr, alpha) - self.cam.offset)
+            if flags := getattr(spr, 'flags', 0): # the sprite isn't just a member of all_sprites
+                self.render_group_action(flags, spr, dt)
             
-    def render_group_action(self, groups: set[pg.sprite.Group], sprite: pg.sprite.Sprite, dt: float) -> None:
-        if self.sprite_manager.animated_sprites in groups:
+    def render_group_action(self, flags: int, sprite: pg.sprite.Sprite, dt: float) -> None:
+        if flags & ANIMATED:
             self.animate_sprite(sprite, dt)
         # TODO: this may need to be updated if more sprites can also hold objects
-        if self.sprite_manager.colonist_sprites in groups:
+        if flags & COLONIST:
             self.render_item_held(dt)
 
     def render_item_held(self, dt: float) -> None:
@@ -83,9 +93,10 @@ class GraphicsEngine:
                 item_category = self.get_item_category(sprite)
                 if item_category:
                     if item_category in self.item_render_states.keys() and sprite.state in self.item_render_states[item_category]:
-                        image = pg.transform.flip(self.graphics[item_category][sprite.item_holding], sprite.facing_left, False)
+                        image = self.transform_cache.get_rotation(self.graphics[item_category][sprite.item_holding], 0, flip_x=sprite.facing_left)
                         image_frame = self.get_item_animation(sprite, item_category, image, dt) # get the item's animation when in use
-                        coords = sprite.rect.center - self.cam.offset + self.get_item_offset(item_category, sprite.facing_left)
+                        center = self.get_render_xy(sprite, self.render_alpha) + pg.Vector2(sprite.rect.size) / 2
+                        coords = center - self.cam.offset + self.get_item_offset(item_category, sprite.facing_left)
                         rect = image_frame.get_rect(center = coords) if image_frame else image.get_rect(center = coords)
                         self.screen.blit(image_frame if image_frame else image, rect)
 
@@ -110,8 +121,8 @@ class GraphicsEngine:
             case 'axe':
                 return pg.Vector2(2 if facing_left else -2, -4)
 
-    def update(self, dt: float) -> None:
-        self.cam.update(pg.Vector2(self.player.rect.center))
+    def update(self, dt: float, alpha: float=1.0) -> None:
+        self.cam.update(self.get_render_xy(self.player, alpha) + pg.Vector2(self.player.rect.size) / 2)
         self.weather.update() # update the weather before the terrain to keep the sky behind the rest of the world
         self.terrain_graphics.update(self.player.current_biome)
         
@@ -122,10 +133,13 @@ class Camera:
         self.offset = pg.Vector2()
         self.max_x = (MAP_SIZE[0] * TILE_SIZE) - (RES[0] // 2)
         self.max_y = (MAP_SIZE[1] * TILE_SIZE) - (RES[1] // 2)
+        self.velocity = pg.Vector2() # px/frame, used to predict which chunks will scroll into view
 
     def update(self, target: pg.Vector2) -> None:
+        prev_center = pg.Vector2(self.center)
         self.center += (target - self.center) * 0.05
         self.center = pg.Vector2(max(RES[0] // 2, min(self.center.x, self.max_x)), min(self.center.y, self.max_y)) # not adding a minimum limit until the space biome (if one is to exist) is configured 
+        self.velocity = self.center - prev_center
         self.offset.x, self.offset.y = round(self.center.x) - (RES[0] // 2), round(self.center.y) - (RES[1] // 2)
 
 
@@ -142,6 +156,7 @@ class TerrainGraphics:
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
         self.ids_to_names: dict[int, str] = game_obj.proc_gen.ids_to_names
         self.mining_map: dict[tuple[int, int], dict[str, int]] = game_obj.sprite_manager.mining.mining_map
+        self.liquid_flow: LiquidFlow = game_obj.physics_engine.liquid_flow
 
         self.current_biome: str = game_obj.proc_gen.current_biome
         self.biome_order: dict[str, int] = game_obj.proc_gen.biome_order
@@ -211,14 +226,24 @@ class TerrainGraphics:
                         self.screen.blit(img, (x_offset + (img_width * x), base_y + (img_height * y)) - self.cam_offset)
     
     # in a separate method from render_tiles to render in front of the player
-    def render_water(self) -> None:
-        for chunk in self.chunk_manager.visible_chunks:
-            for (x, y) in chunk:
-                if self.tile_map[x, y] == self.names_to_ids['water']:
-                    self.screen.blit(
-                        self.asset_manager.get_image('water'), 
-                        pg.Vector2(x * TILE_SIZE, y * TILE_SIZE) - self.cam_offset
-                    )
+    def render_liquids(self) -> None:
+        '''draw each liquid cell in view filled up to its level'''
+        left, top = max(0, int(self.cam_offset.x // TILE_SIZE)), max(0, int(self.cam_offset.y // TILE_SIZE))
+        right = min(MAP_SIZE[0], int((self.cam_offset.x + RES[0]) // TILE_SIZE) + 1)
+        bottom = min(MAP_SIZE[1], int((self.cam_offset.y + RES[1]) // TILE_SIZE) + 1)
+        liquid_types = self.liquid_flow.liquid_type[left:right, top:bottom]
+        xs, ys = liquid_types.nonzero()
+        if not xs.size:
+            return
+        levels = self.liquid_flow.level[left:right, top:bottom][xs, ys].tolist()
+        liquid_names = self.liquid_flow.liquid_names
+        for x, y, liquid_type, level in zip((xs + left).tolist(), (ys + top).tolist(), liquid_types[xs, ys].tolist(), levels):
+            height = ceil(level * TILE_SIZE)
+            self.screen.blit(
+                self.asset_manager.get_image(liquid_names[liquid_type - 1]),
+                (x * TILE_SIZE - self.cam_offset.x, (y + 1) * TILE_SIZE - height - self.cam_offset.y), 
+                (0, 0, TILE_SIZE, height) # the surface of the liquid is the top of its image
+            )
 
     def get_mined_tile_img(self, x: int, y: int) -> None:
         '''reduce the opacity of a given tile as it's mined away'''
@@ -294,11 +319,11 @@ class BiomeTransition:
 
 
 class ToolAnimation:
-    def __init__(self, screen: pg.Surface, render_item_held: callable):
+    def __init__(self, screen: pg.Surface, render_item_held: callable, transform_cache: TransformCache):
         self.screen = screen
         self.render_item_held = render_item_held
+        self.transform_cache = transform_cache
 
-    @staticmethod
-    def get_rotation(sprite: pg.sprite.Sprite, image: pg.Surface, dt: float) -> pg.Surface:
+    def get_rotation(self, sprite: pg.sprite.Sprite, image: pg.Surface, dt: float) -> pg.Surface:
         angle = 45 * sin(dt * 10)
-        return pg.transform.rotate(image, -angle if not sprite.facing_left else angle) # negative angles rotate clockwise
\ No newline at end of file
+        return self.transform_cache.get_rotation(image, -angle if not sprite.facing_left else angle) # negative angles rotate clockwise
\ No newline at end of file
@@ -38,10 +38,21 @@ class Keyboard:
             'drop item': pg.K_z,
             'rotate item': pg.K_r
         }
+        # presses read by the fixed-step simulation, a frame can run no ticks so they're held until a tick consumes them
+        self.tick_keys: set[int] = {self.key_bindings['jump']}
+        self.latched_keys: set[int] = set()
 
     def update(self) -> None:
         self.held_keys = pg.key.get_pressed()
         self.pressed_keys = pg.key.get_just_pressed()
+        self.latched_keys.update(key for key in self.tick_keys if self.pressed_keys[key])
+
+    def consume(self, key: int) -> bool:
+        '''whether the key was pressed since the last tick that read it'''
+        if key in self.latched_keys:
+            self.latched_keys.remove(key)
+            return True
+        return False
 
 
 class Mouse:
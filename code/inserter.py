@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from input_manager import InputManager
     from player import Player
+    from asset_manager import TransformCache
 
 import pygame as pg
 import math
@@ -45,6 +46,7 @@ class Inserter(TransportSprite):
         self.rotate_speed = 1250
         self.rotate_dir = None
         self.original_img = self.image
+        self.transform_cache: TransformCache = self.game_obj.asset_manager.transform_cache
         self.alarms = {
             'transfer': Alarm(length=self.rotate_speed / self.speed_factor, fn=self.transfer, auto=True, loop=True),
             'receive item': Alarm(length=200, fn=self.receive_item, auto=False, loop=False),
@@ -102,7 +104,7 @@ class Inserter(TransportSprite):
         if not reset:
             dxy = pg.Vector2(self.rect.center) - pg.Vector2(target_obj.rect.center)
             angle = -math.degrees(math.atan2(dxy.y, dxy.x)) + 135 # negative since rotozoom rotates counterclockwise
-            self.image = pg.transform.rotozoom(self.original_img, angle, 1) 
+            self.image = self.transform_cache.get_rotation(self.original_img, angle, smooth=True)
             center = self.rect.center # preserve the original center
             self.rect = self.image.get_rect(center=center)
         else:
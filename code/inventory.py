@@ -16,6 +16,7 @@ class SpriteInventory:
         if save_data:
             self.contents = save_data['contents']
             self.index = save_data['index']
+            self.last_idx_with_item = max((data['index'] for data in self.contents.values()), default=0)
         else:
             if default_contents:
                 self.contents = default_contents
@@ -10,6 +10,7 @@ from sprite_base_classes import Sprite
 from settings import Z_LAYERS, GRAVITY
 
 class ItemDrop(Sprite):
+    save_columns = {'xy': 'xy', 'name': 'str', 'amount': 'int'}
     def __init__(
         self, 
         xy: pg.Vector2,
@@ -19,24 +20,23 @@ class ItemDrop(Sprite):
         sprite_manager: SpriteManager,
         direction: pg.Vector2,
         name: str,
-        sprite: pg.sprite.Sprite=None
+        sprite: pg.sprite.Sprite=None,
+        amount: int=None
     ):
-        super().__init__(xy, image, z, sprite_groups)
-        self.sprite_movement = sprite_manager.sprite_movement
-        self.pick_up_item = sprite_manager.pick_up_item
-        self.direction = direction
+        super().__init__(xy=xy, image=image, sprite_groups=sprite_groups, z=z)
+        self.body_system = sprite_manager.body_system
         self.name = name
-        self.amount = sprite.inventory.contents[name]['amount'] if sprite else 1
+        if amount is None:
+            amount = sprite.inventory.contents[name]['amount'] if sprite else 1
+        self.amount = amount
 
         self.move_speed = 1
         self.gravity = GRAVITY // 3
+        self.body_system.add(self, direction, self.gravity, self.move_speed) # moved by the body system, the sprite only renders it
 
-    def update(self, dt: float) -> None:
-        self.sprite_movement.move_sprite(self, self.direction.x, dt)
-        if self.direction.x and int(self.direction.y) == 0:
-            self.direction.x = 0
-        
-        self.pick_up_item(obj=self, name=self.name, amount=self.amount)
+    def kill(self) -> None:
+        self.body_system.remove(self)
+        super().kill()
 
     def get_save_data(self) -> dict[str, list]:
-        return {'xy': list(self.rect.topleft)}
\ No newline at end of file
+        return {'xy': self.rect.topleft, 'name': self.name, 'amount': self.amount}
\ No newline at end of file
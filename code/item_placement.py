@@ -27,7 +27,7 @@ class ItemPlacement:
         self.tile_map: np.ndarray = game_obj.proc_gen.tile_map
         self.height_map: np.ndarray = game_obj.proc_gen.height_map
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
-        self.collision_map: dict[tuple[int, int], pg.Rect] = game_obj.physics_engine.collision_map
+        self.set_tile: callable = game_obj.proc_gen.set_tile
 
         self.keyboard: Keyboard = game_obj.input_manager.keyboard
         self.mouse: Mouse = game_obj.input_manager.mouse
@@ -99,8 +99,7 @@ class ItemPlacement:
         return False
 
     def place_single_tile_item(self, tile_xy: tuple[int, int], sprite: pg.sprite.Sprite, old_pipe_idx: int=None) -> None: # passing the item name if a class needs to be initialized
-        self.tile_map[tile_xy] = self.names_to_ids[sprite.item_holding]
-        self.collision_map.update_map(tile_xy, add_tile=True)
+        self.set_tile(tile_xy, self.names_to_ids[sprite.item_holding])
         sprite.inventory.remove_item()
         if sprite.item_holding in OBJ_ITEMS:
             self.init_obj(sprite.item_holding, [tile_xy])  
@@ -109,13 +108,11 @@ class ItemPlacement:
         obj = sprite.item_holding in OBJ_ITEMS
         for i, xy in enumerate(tiles_covered):
             if i == 0:
-                self.tile_map[xy] = self.names_to_ids[sprite.item_holding] # only store the topleft as the item ID to avoid rendering multiple surfaces
+                self.set_tile(xy, self.names_to_ids[sprite.item_holding]) # only store the topleft as the item ID to avoid rendering multiple surfaces
                 if obj:
                     self.init_obj(sprite.item_holding, tiles_covered)
             else:
-                self.tile_map[xy] = self.names_to_ids['item extended'] 
-
-            self.collision_map.update_map(xy, add_tile=True)
+                self.set_tile(xy, self.names_to_ids['item extended'])
             
         sprite.inventory.remove_item(sprite.item_holding)
 
@@ -134,8 +131,8 @@ class ItemPlacement:
         tint_image.set_alpha(25)
         self.screen.blit(tint_image, tint_image.get_rect(topleft=icon_rect.topleft))
 
-    def init_obj(self, name: str, tiles_covered: list[tuple[int, int]]) -> None:
+    def init_obj(self, name: str, tiles_covered: list[tuple[int, int]], save_idx: int=None) -> None:
         obj = self.items_init_when_placed[name if 'pipe' not in name else name.split(' ')[0]]
-        obj_instance = obj(**self.sprite_manager.get_cls_init_params(name, tiles_covered)) # don't add the pipe index here, they all use the same Pipe class
+        obj_instance = obj(**self.sprite_manager.get_cls_init_params(name, tiles_covered, save_idx)) # don't add the pipe index here, they all use the same Pipe class
         for xy in tiles_covered:
             self.obj_map[xy] = obj_instance
\ No newline at end of file
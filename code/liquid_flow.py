@@ -0,0 +1,158 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from physics_engine import PhysicsEngine
+
+import numpy as np
+from math import ceil
+
+from settings import MAP_SIZE, LIQUIDS, LIQUID_FLOW_RATES, LIQUID_MIN_LEVEL, LIQUID_TILE_LEVEL, LIQUID_CHUNK_SIZE, LIQUID_SETTLE_DIFF, LIQUID_SETTLE_VOLUME, LIQUID_SETTLE_TICKS
+
+class LiquidFlow:
+    '''
+    cellular automaton tracking how full each tile is with a liquid,
+    only chunks where something is still flowing are simulated & a chunk sleeps once nothing in it changes,
+    or once its volume has stayed (nearly) the same for LIQUID_SETTLE_TICKS ticks so a slowly creeping surface can't keep it awake for minutes
+    '''
+    def __init__(self, physics_engine: PhysicsEngine):
+        self.tile_map: np.ndarray = physics_engine.tile_map
+        self.names_to_ids: dict[str, int] = physics_engine.names_to_ids
+        self.notify_tile_listeners: callable = physics_engine.notify_tile_listeners
+
+        self.liquid_names = sorted(LIQUIDS) # index + 1 is the liquid's type, 0 = empty
+        self.type_to_id = np.array([self.names_to_ids['air'], *[self.names_to_ids[name] for name in self.liquid_names]], dtype=self.tile_map.dtype)
+        self.id_to_type = np.zeros(len(physics_engine.ids_to_names), dtype=np.uint8)
+        self.id_to_type[self.type_to_id[1:]] = np.arange(1, len(self.type_to_id))
+        self.can_hold = np.zeros(len(physics_engine.ids_to_names), dtype=bool) # liquids only flow into air & other liquid tiles
+        self.can_hold[self.type_to_id] = True
+        self.flow_rates = np.array([0, *[LIQUID_FLOW_RATES[name] / 3 for name in self.liquid_names]], dtype=np.float32) # a third so a cell never gives away more than it has
+
+        self.liquid_type = self.id_to_type[self.tile_map]
+        self.level = (self.liquid_type > 0).astype(np.float32) # generated liquids start out full
+
+        self.num_chunks_x = ceil(MAP_SIZE[0] / LIQUID_CHUNK_SIZE)
+        self.num_chunks_y = ceil(MAP_SIZE[1] / LIQUID_CHUNK_SIZE)
+        xs, ys = np.nonzero(self.liquid_type)
+        self.active_chunks: set[tuple[int, int]] = set(zip((xs // LIQUID_CHUNK_SIZE).tolist(), (ys // LIQUID_CHUNK_SIZE).tolist())) # let generated lakes settle
+        # ticks each chunk's volume has stayed within LIQUID_SETTLE_VOLUME of its volume when the count started
+        self.settle_ticks = np.zeros((self.num_chunks_x, self.num_chunks_y), dtype=np.int32)
+        self.settle_volume = np.zeros((self.num_chunks_x, self.num_chunks_y))
+        physics_engine.tile_listeners.append(self.update_tiles)
+
+    def step(self) -> None:
+        edited_tiles = {} # tile -> its id before this step, chunks share their border tiles so one may be edited & reverted within a step
+        for chunk in list(self.active_chunks):
+            self.step_chunk(*chunk, edited_tiles)
+        if edited_tiles:
+            tiles = [xy for xy, tile_id in edited_tiles.items() if self.tile_map[xy] != tile_id]
+            if tiles:
+                self.notify_tile_listeners(tiles, source=self.update_tiles) # waking & resetting the chunks around them would keep a creeping surface awake
+
+    def step_chunk(self, chunk_x: int, chunk_y: int, edited_tiles: dict[tuple[int, int], int]) -> None:
+        '''flow the liquid within a chunk down, then sideways, into the chunk & a 1-tile border around it'''
+        left, top = chunk_x * LIQUID_CHUNK_SIZE, chunk_y * LIQUID_CHUNK_SIZE
+        right, bottom = min(left + LIQUID_CHUNK_SIZE, MAP_SIZE[0]), min(top + LIQUID_CHUNK_SIZE, MAP_SIZE[1])
+        x0, y0, x1, y1 = max(left - 1, 0), max(top - 1, 0), min(right + 1, MAP_SIZE[0]), min(bottom + 1, MAP_SIZE[1])
+        prev_level = self.level[x0:x1, y0:y1].copy()
+        level, liquid_type = prev_level.copy(), self.liquid_type[x0:x1, y0:y1].copy()
+        open_cells = self.can_hold[self.tile_map[x0:x1, y0:y1]]
+        source = np.zeros(level.shape, dtype=bool) # cells of the border belong to neighboring chunks & only receive liquid here
+        source[left - x0:right - x0, top - y0:bottom - y0] = True
+        source &= liquid_type > 0
+
+        # down, as much as fits into the cell below
+        src, dst = np.s_[:, :-1], np.s_[:, 1:]
+        can_flow = source[src] & open_cells[dst] & ((liquid_type[dst] == 0) | (liquid_type[dst] == liquid_type[src]))
+        can_flow &= 1 - level[dst] >= LIQUID_MIN_LEVEL # a nearly full cell counts as full, otherwise float error keeps trickling into it
+        flow = np.where(can_flow, np.minimum(level[src], 1 - level[dst]), 0)
+        level[src] -= flow
+        level[dst] += flow
+        liquid_type[dst] = np.where(flow > 0, liquid_type[src], liquid_type[dst])
+
+        # sideways, towards the lower neighbor on either side once the cell below can't take any more
+        supported = np.ones(level.shape, dtype=bool) # the bottom row of the map counts as a floor
+        supported[:, :-1] = ~open_cells[:, 1:] | (1 - level[:, 1:] < LIQUID_MIN_LEVEL) | ((liquid_type[:, 1:] != liquid_type[:, :-1]) & (liquid_type[:, 1:] > 0))
+        rate = self.flow_rates[liquid_type]
+        flows = []
+        for src, dst in ((np.s_[1:, :], np.s_[:-1, :]), (np.s_[:-1, :], np.s_[1:, :])): # left, right
+            can_flow = (source & supported)[src] & open_cells[dst] & ((liquid_type[dst] == 0) | (liquid_type[dst] == liquid_type[src]))
+            diff = level[src] - level[dst]
+            flow = diff * rate[src]
+            flow = np.where(can_flow & (diff >= LIQUID_SETTLE_DIFF) & (flow >= LIQUID_MIN_LEVEL), flow, 0) # smaller flows would evaporate, so a settled slope stops spreading
+            flows.append((src, dst, flow))
+        for src, dst, flow in flows: # both directions are computed from the same levels so a cell can't give away more than it has
+            level[src] -= flow
+            level[dst] += flow
+            liquid_type[dst] = np.where(flow > 0, liquid_type[src], liquid_type[dst])
+
+        level[level < LIQUID_MIN_LEVEL] = 0
+        liquid_type[level == 0] = 0
+        self.level[x0:x1, y0:y1], self.liquid_type[x0:x1, y0:y1] = level, liquid_type
+
+        changed = level != prev_level
+        if not changed.any():
+            self.active_chunks.discard((chunk_x, chunk_y))
+            return
+        interior = np.s_[left - x0:right - x0, top - y0:bottom - y0]
+        volume = float(level[interior].sum(dtype=np.float64))
+        if abs(volume - self.settle_volume[chunk_x, chunk_y]) < LIQUID_SETTLE_VOLUME:
+            self.settle_ticks[chunk_x, chunk_y] += 1
+        else: # still filling or draining
+            self.settle_ticks[chunk_x, chunk_y] = 0
+            self.settle_volume[chunk_x, chunk_y] = volume
+        settled = self.settle_ticks[chunk_x, chunk_y] >= LIQUID_SETTLE_TICKS # not reset by waking, only by a net change or an edit
+        if settled:
+            self.active_chunks.discard((chunk_x, chunk_y))
+        else:
+            xs, ys = np.nonzero(changed)
+            self.wake_chunks(int(xs.min()) + x0 - 1, int(ys.min()) + y0 - 1, int(xs.max()) + x0 + 1, int(ys.max()) + y0 + 1) # neighbors may now flow into what changed
+
+        # the tile map only follows liquid_type once a tile fills past LIQUID_TILE_LEVEL or empties completely
+        shown = self.id_to_type[self.tile_map[x0:x1, y0:y1]]
+        tile_type = np.where((shown == 0) & (level < LIQUID_TILE_LEVEL), 0, liquid_type)
+        edited = np.nonzero(tile_type != shown)
+        if edited[0].size:
+            xs, ys = edited[0] + x0, edited[1] + y0
+            for xy, tile_id in zip(zip(xs.tolist(), ys.tolist()), self.tile_map[xs, ys].tolist()):
+                edited_tiles.setdefault(xy, tile_id)
+            self.tile_map[xs, ys] = self.type_to_id[tile_type[edited]]
+
+    def wake_chunks(self, left: int, top: int, right: int, bottom: int) -> None:
+        '''wake every chunk overlapping the tile region (inclusive)'''
+        min_x, max_x = max(left, 0) // LIQUID_CHUNK_SIZE, min(right, MAP_SIZE[0] - 1) // LIQUID_CHUNK_SIZE
+        min_y, max_y = max(top, 0) // LIQUID_CHUNK_SIZE, min(bottom, MAP_SIZE[1] - 1) // LIQUID_CHUNK_SIZE
+        self.active_chunks.update((x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1))
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        '''keeps the levels in sync with tiles edited outside of the simulation (mining, placing items) & wakes the liquid around them'''
+        xs, ys = np.asarray(tiles, dtype=np.int64).reshape(-1, 2).T
+        liquid_type = self.id_to_type[self.tile_map[xs, ys]]
+        mismatched = liquid_type != self.liquid_type[xs, ys]
+        mismatched &= (self.tile_map[xs, ys] != self.type_to_id[0]) | (self.level[xs, ys] >= LIQUID_TILE_LEVEL) # a thin film isn't on the tile map yet
+        if mismatched.any():
+            xs_, ys_ = xs[mismatched], ys[mismatched]
+            self.liquid_type[xs_, ys_] = liquid_type[mismatched]
+            self.level[xs_, ys_] = (liquid_type[mismatched] > 0).astype(np.float32) # covered liquid is displaced, new liquid tiles start out full
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)): # liquid next to an edited tile may be able to flow into it now
+            chunk_xs = np.clip(xs + dx, 0, MAP_SIZE[0] - 1) // LIQUID_CHUNK_SIZE
+            chunk_ys = np.clip(ys + dy, 0, MAP_SIZE[1] - 1) // LIQUID_CHUNK_SIZE
+            self.active_chunks.update(zip(chunk_xs.tolist(), chunk_ys.tolist()))
+            self.settle_ticks[chunk_xs, chunk_ys] = 0
+
+    def drain(self, tile_xy: tuple[int, int], volume: float) -> float:
+        '''remove up to volume from the tile, returns how much was actually removed'''
+        drained = min(float(self.level[tile_xy]), volume)
+        if drained:
+            self.level[tile_xy] -= drained
+            if self.level[tile_xy] < LIQUID_MIN_LEVEL:
+                self.level[tile_xy] = 0
+                self.liquid_type[tile_xy] = 0
+                self.tile_map[tile_xy] = self.names_to_ids['air']
+                self.notify_tile_listeners([tile_xy])
+            else:
+                self.wake_chunks(tile_xy[0] - 1, tile_xy[1] - 1, tile_xy[0] + 1, tile_xy[1] + 1)
+                self.settle_ticks[tile_xy[0] // LIQUID_CHUNK_SIZE, tile_xy[1] // LIQUID_CHUNK_SIZE] = 0 # so the liquid around flows back in
+        return drained
+
+    def get_stats(self) -> dict[str, int | float]:
+        return {'active chunks': len(self.active_chunks), 'volume': float(self.level.sum(dtype=np.float64))}
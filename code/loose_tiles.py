@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from physics_engine import PhysicsEngine
+    from liquid_flow import LiquidFlow
+
+import numpy as np
+
+from settings import MAP_SIZE, LIQUIDS, LOOSE_TILES, LOOSE_TILES_MAX_MOVES
+
+class LooseTiles:
+    '''
+    gravity for loose tile types (sand etc.), only tiles at or above a recent edit are checked,
+    every tile that can fall drops 1 tile per tick & the edits are sent to the tile listeners as 1 batch
+    '''
+    def __init__(self, physics_engine: PhysicsEngine):
+        self.tile_map: np.ndarray = physics_engine.tile_map
+        self.notify_tile_listeners: callable = physics_engine.notify_tile_listeners
+        self.liquid_flow: LiquidFlow = physics_engine.liquid_flow
+        self.air_id = physics_engine.names_to_ids['air']
+
+        self.is_loose = np.zeros(len(physics_engine.ids_to_names), dtype=bool)
+        self.is_loose[[physics_engine.names_to_ids[name] for name in LOOSE_TILES]] = True
+        self.can_fall_into = np.zeros(len(physics_engine.ids_to_names), dtype=bool) # liquids are displaced upwards
+        self.can_fall_into[[self.air_id, *[physics_engine.names_to_ids[name] for name in LIQUIDS]]] = True
+
+        self.frontier: set[tuple[int, int]] = set() # tiles that may be able to fall since something at or below them changed
+        physics_engine.tile_listeners.append(self.update_tiles)
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        for x, y in tiles:
+            self.frontier.add((x, y)) # a loose tile placed over air
+            if y > 0:
+                self.frontier.add((x, y - 1)) # a loose tile resting on what changed
+        
+    def step(self) -> None:
+        if not self.frontier:
+            return
+        xs, ys = np.array(list(self.frontier), dtype=np.int64).reshape(-1, 2).T
+        self.frontier.clear()
+        in_map = ys < MAP_SIZE[1] - 1
+        xs, ys = xs[in_map], ys[in_map]
+        falling = self.is_loose[self.tile_map[xs, ys]] & self.can_fall_into[self.tile_map[xs, ys + 1]]
+        xs, ys = xs[falling], ys[falling]
+        if len(xs) > LOOSE_TILES_MAX_MOVES: # the lowest tiles go first so the rest can follow, the others are checked again next tick
+            order = np.argsort(-ys, kind='stable')
+            self.frontier.update(zip(xs[order[LOOSE_TILES_MAX_MOVES:]].tolist(), ys[order[LOOSE_TILES_MAX_MOVES:]].tolist()))
+            xs, ys = xs[order[:LOOSE_TILES_MAX_MOVES]], ys[order[:LOOSE_TILES_MAX_MOVES]]
+        if not xs.size:
+            return
+
+        # each destination is directly below exactly 1 moving tile, so all the swaps can be done at once
+        loose_ids, below_ids = self.tile_map[xs, ys], self.tile_map[xs, ys + 1]
+        self.tile_map[xs, ys] = below_ids
+        self.tile_map[xs, ys + 1] = loose_ids
+        for arr in (self.liquid_flow.level, self.liquid_flow.liquid_type): # move the displaced liquid along with its tile so no volume is created
+            arr[xs, ys] = arr[xs, ys + 1]
+            arr[xs, ys + 1] = 0
+        # the listeners patch the collision map, chunk surfaces etc. & this class's own listener queues the tiles to check next tick
+        self.notify_tile_listeners(list(zip(xs.tolist(), ys.tolist())) + list(zip(xs.tolist(), (ys + 1).tolist())))
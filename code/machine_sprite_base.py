@@ -36,6 +36,8 @@ class Inv:
 
 
 class Machine(Sprite, ABC):
+    save_columns = {'xy': 'xy', 'active': 'bool', 'inv': 'inv slots'}
+
     def __init__(
         self, 
         save_data: dict[str, any],
@@ -70,13 +72,36 @@ class Machine(Sprite, ABC):
             self.gen_bg: callable = ui.gen_bg
             self.render_item_amount: callable = ui.render_item_amount
 
-            self.fuel_input = save_data['fuel input'] if save_data else {'item': None, 'amount': 0}
-            self.output = save_data['output'] if save_data else {'item': None, 'amount': 0}
+            # what inserters hand items to/take from, the contents themselves are in self.inv
+            self.fuel_input = {'item': None, 'amount': 0}
+            self.output = {'item': None, 'amount': 0}
 
             self.pipe_connections = {}
             
         self.active: bool = False if not save_data else save_data['active']
 
+    def get_save_data(self) -> dict[str, any]:
+        return {
+            'xy': self.rect.topleft, 
+            'active': self.active, 
+            'inv': {name: {'item': slot.item, 'amount': slot.amount} for name, slot in self.get_inv_slots().items()}
+        }
+
+    def get_inv_slots(self) -> dict[str, InvSlot]:
+        '''every slot of self.inv, keyed by the name it's saved under'''
+        slots = {f'input {name}': slot for name, slot in (self.inv.input_slots or {}).items()}
+        slots['output'] = self.inv.output_slot
+        slots.update({f'liquid {name}': slot for name, slot in getattr(self.inv, 'liquid_storage', {}).items()})
+        return slots
+
+    def load_inv(self, save_data: dict[str, any]) -> None:
+        '''called by each machine once its inv is complete, saves from before the slots were saved keep an empty inv'''
+        if save_data and 'inv' in save_data:
+            slots = self.get_inv_slots()
+            for name, data in save_data['inv'].items():
+                if name in slots:
+                    slots[name].item, slots[name].amount = data['item'], data['amount']
+
     def add_to_inv(self, slot: InvSlot, item: str, amount: int=1) -> None:
         if (item == slot.item or not slot.item) and slot.amount + amount <= slot.max_capacity:
             slot.item = item
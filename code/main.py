@@ -6,8 +6,9 @@ import json
 from collections import defaultdict
 import cProfile
 import pstats
+import argparse
 
-from settings import RES, FPS, MAP_SIZE, MAP_SIZE, TILE_SIZE
+from settings import RES, FPS, MAP_SIZE, MAP_SIZE, TILE_SIZE, SIM_RATE, MAX_SIM_STEPS, WORLD_GEN_WORKERS
 from proc_gen import ProcGen
 from player import Player
 from graphics_engine import GraphicsEngine, Camera
@@ -18,13 +19,18 @@ from sprite_manager import SpriteManager
 from input_manager import InputManager
 from ui import UI
 from item_placement import ItemPlacement
+from save_file import SaveFile, SaveTracker, Autosave
+from sprite_records import SpriteRecords
+from world_cache import WorldCache
 
 class Main:
-    def __init__(self):
+    def __init__(self, world_cache: WorldCache | None=None, gen_workers: int=WORLD_GEN_WORKERS):
         pg.init()
         pg.display.set_caption('matrioshka')
         self.running = True
         self.clock = pg.time.Clock()
+        self.sim_dt = 1 / SIM_RATE
+        self.sim_accumulator = 0.0 # frame time not yet consumed by simulation steps
         self.screen = pg.display.set_mode(RES)
       
         self.save_data = self.get_save_data()
@@ -36,7 +42,11 @@ class Main:
 
         self.cam = Camera(center=player_xy if self.save_data else (pg.Vector2(MAP_SIZE) * TILE_SIZE) // 2)
 
+        self.world_cache = world_cache if world_cache is not None else WorldCache()
+        self.gen_workers = gen_workers
         self.proc_gen = ProcGen(self)
+        self.save_tracker = SaveTracker(self)
+        self.autosave = Autosave(self)
 
         self.input_manager = InputManager(self.cam)
 
@@ -46,7 +56,7 @@ class Main:
         self.player = Player( 
             self,
             player_xy if self.save_data else self.proc_gen.player_spawn_point,
-            self.asset_manager.get_subfolder(join('..', 'graphics', 'player')),
+            self.asset_manager.get_animation(join('..', 'graphics', 'player')),
             [getattr(self.sprite_manager, group) for group in ('all_sprites', 'active_sprites', 'colonist_sprites', 'animated_sprites')],
             player_save if self.save_data else None
         )
@@ -61,38 +71,50 @@ class Main:
         self.sprite_manager.ui = self.ui
 
         self.item_placement = ItemPlacement(self)
+        self.sprite_manager.init_saved_sprites()
 
     def make_save(self, file: str) -> None:
-        visited_tiles = self.ui.mini_map.visited_tiles
+        self.save_tracker.save(file, self.get_world_save_data()) # only the chunks & sprite records edited since the last save are written
+
+    def get_world_save_data(self) -> dict[str, any]:
         data = defaultdict(list, {
             **self.proc_gen.make_save(), 
             'current biome': self.player.current_biome, 
-            'visited tiles': visited_tiles if isinstance(visited_tiles, list) else visited_tiles.tolist(), 
+            'ui': {'visited tiles': self.ui.mini_map.visited_tiles},
             'weather': self.graphics_engine.weather.sky.make_save(), 
-            'sprites': defaultdict(list) 
+            'sprites': self.sprite_manager.sprite_records.collect(self.sprite_manager.all_sprites) # one set of columns per class
         })
-        self.load_sprite_data(data)
-        with open(file, 'w') as f:
-            json.dump(data, f)
-
-    def load_sprite_data(self, data: dict[str, list]) -> None:
-        for sprite in [s for s in self.sprite_manager.all_sprites if hasattr(s, 'get_save_data')]:
-            data['sprites'][self.sprite_manager.cls_name_to_str(sprite)].append(sprite.get_save_data())
+        return data
 
     def get_save_data(self) -> dict[str, list|dict] | None:
         data = None
-        if os.path.exists('save.json'):
+        if os.path.exists('save.bin'):
+            data = SaveFile.read('save.bin', in_memory=True) # the saves made while playing replace this file
+        elif os.path.exists('save.json'): # saved before the binary format
             with open('save.json', 'r') as f:
                 data = json.load(f)
+        if data is not None:
+            data['sprites'] = defaultdict(list, SpriteRecords.decode_all(data['sprites'])) # back to a dict per instance for the constructors
         return data
     
+    def step(self, dt: float) -> None:
+        self.sprite_manager.save_prev_positions(self.player)
+        self.physics_engine.update(self.player, dt)
+        self.sprite_manager.step(self.player, dt)
+
     def update(self, dt: float) -> None:
         self.input_manager.update(self.cam.offset)
-        self.physics_engine.update(self.player, dt)
-        self.graphics_engine.update(dt) 
+        self.sim_accumulator = min(self.sim_accumulator + dt, self.sim_dt * MAX_SIM_STEPS)
+        while self.sim_accumulator >= self.sim_dt:
+            self.step(self.sim_dt)
+            self.sim_accumulator -= self.sim_dt
+        self.autosave.update(dt) # between steps so the snapshot is of a whole tick
+        alpha = self.sim_accumulator / self.sim_dt # how far the frame is between the last step & the next
+
+        self.graphics_engine.update(dt, alpha) 
         self.sprite_manager.update(self.player, dt)
-        self.graphics_engine.render_sprites(dt)
-        self.graphics_engine.terrain_graphics.render_water()
+        self.graphics_engine.render_sprites(dt, alpha)
+        self.graphics_engine.terrain_graphics.render_liquids()
         self.sprite_manager.update_ui()
         self.ui.update()
         self.proc_gen.current_biome = self.player.current_biome
@@ -101,18 +123,27 @@ class Main:
         while self.running:
             for event in pg.event.get():
                 if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
-                   # self.make_save('save.json')
                     #pg.quit()
                     #sys.exit()
                     self.running = False
             self.update(self.clock.tick(FPS) / 1000)
             pg.display.flip()
+        self.chunk_manager.prefetcher.stop()
+        self.autosave.stop() # finishes a save in progress & saves the final state
         pg.quit()
              
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-world-cache', action='store_true', help='generate the world even if an identical one was cached')
+    parser.add_argument('--clear-world-cache', action='store_true', help='delete every cached world before starting')
+    parser.add_argument('--gen-workers', type=int, default=WORLD_GEN_WORKERS, help='processes generating a new world in parallel')
+    args = parser.parse_args()
+    world_cache = WorldCache(enabled=not args.no_world_cache)
+    if args.clear_world_cache:
+        world_cache.clear()
     #profiler = cProfile.Profile()
     #profiler.enable()
-    main = Main()
+    main = Main(world_cache, args.gen_workers)
     main.run()
     #profiler.disable()
     #stats = pstats.Stats(profiler)
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
     from ui import UI
+    from save_file import SaveTracker
 
 import pygame as pg
 import numpy as np
@@ -15,14 +16,14 @@ class MiniMap:
         self.cam_offset: pg.Vector2 = game_obj.cam.offset
 
         self.gen_outline: callable = ui.gen_outline
+        self.save_tracker: SaveTracker = game_obj.save_tracker
         self.save_data: dict[str, any] | None = ui.save_data
 
         self.tile_map: np.ndarray = game_obj.proc_gen.tile_map
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
         self.ids_to_names: dict[int, str] = game_obj.proc_gen.ids_to_names
         self.get_tile_material: callable = game_obj.proc_gen.get_tile_material
-        self.visited_tiles = np.array(self.save_data['visited tiles']) if self.save_data else np.full(MAP_SIZE, False, dtype=bool) 
-        self.terrain_tiles = TILES.keys()
+        self.visited_tiles = np.asarray(self.save_data['visited tiles'], dtype=bool) if self.save_data else np.full(MAP_SIZE, False, dtype=bool) 
         self.non_tiles = {
             'air': {'rgb': (227, 242, 253)}, 
             'tree base': {'rgb': (56, 142, 60)},
@@ -40,6 +41,65 @@ class MiniMap:
 
         self.tree_px_height = 8
         self.branch_y = self.tree_px_height // 2
+        self.patch_size = 16 # tiles, edits in the same chunk of this size are repainted as 1 box
+        self.tree_base_id = self.names_to_ids['tree base']
+
+        # the whole world at 1px per tile, built once & patched where tiles change or get visited
+        self.map_surf = pg.Surface(MAP_SIZE)
+        self.unvisited_color = self.map_surf.map_rgb(pg.Color('black'))
+        self.color_lut = self.get_color_lut()
+        self.update_region(0, 0, *MAP_SIZE)
+        self.view_surf = pg.Surface((self.tiles_x, self.tiles_y)) # the tiles around the camera, scaled into scaled_surf
+        self.scaled_surf = pg.Surface((self.outline_w, self.outline_h))
+        game_obj.proc_gen.tile_listeners.append(self.update_tiles)
+
+    def get_color_lut(self) -> np.ndarray:
+        '''mapped color for each tile id'''
+        # ids without a color (machines, item extended) show the sky color rather than whatever was drawn before them
+        lut = np.full(max(self.ids_to_names) + 1, self.map_surf.map_rgb(self.non_tiles['air']['rgb']), dtype=np.uint32)
+        for tile_id, name in self.ids_to_names.items():
+            if name in self.non_tiles:
+                lut[tile_id] = self.map_surf.map_rgb(self.non_tiles[name]['rgb'])
+            elif name in TILES:
+                lut[tile_id] = self.map_surf.map_rgb(TILES[name]['rgb'])
+        return lut
+
+    def update_region(self, left: int, top: int, right: int, bottom: int) -> None:
+        '''recolor the tiles within [left, right) x [top, bottom) including any tree overlapping them'''
+        pixels = pg.surfarray.pixels2d(self.map_surf)
+        visited = self.visited_tiles[left:right, top:bottom]
+        pixels[left:right, top:bottom] = np.where(visited, self.color_lut[self.tile_map[left:right, top:bottom]], self.unvisited_color)
+        
+        # trees extend above & beside their base tile so also check the bases just outside the region
+        tree_left, tree_right = max(0, left - 1), min(MAP_SIZE[0], right + 1)
+        tree_bottom = min(MAP_SIZE[1], bottom + self.tree_px_height - 1)
+        bases = (self.tile_map[tree_left:tree_right, top:tree_bottom] == self.tree_base_id) & self.visited_tiles[tree_left:tree_right, top:tree_bottom]
+        if bases.any():
+            region = pixels[left:right, top:bottom]
+            tree_color = self.color_lut[self.tree_base_id]
+            for x, y in np.argwhere(bases) + (tree_left - left, 0):
+                top_y = max(0, y - self.tree_px_height + 1)
+                if 0 <= x < region.shape[0]:
+                    region[x, top_y:y + 1] = tree_color
+                if 0 <= y - self.branch_y < region.shape[1]:
+                    region[max(0, x - 1):max(0, x + 2), y - self.branch_y] = tree_color
+        del pixels
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        '''
+        edits are grouped by patch_size chunk & each chunk's bounding box is repainted, 
+        so edits spread across the map (liquids, sand) never merge into one box covering most of it
+        '''
+        boxes = {}
+        for x, y in tiles:
+            chunk = (x // self.patch_size, y // self.patch_size)
+            if (box := boxes.get(chunk)) is None:
+                boxes[chunk] = [x, y, x, y]
+            else:
+                box[0], box[1], box[2], box[3] = min(box[0], x), min(box[1], y), max(box[2], x), max(box[3], y)
+        for min_x, min_y, max_x, max_y in boxes.values():
+            # extended by a tree's footprint in case the edit placed/removed a tree base
+            self.update_region(max(0, min_x - 1), max(0, min_y - self.tree_px_height + 1), min(MAP_SIZE[0], max_x + 2), max_y + 1)
 
     def render_outline(self) -> None:
         if self.render:
@@ -48,84 +108,30 @@ class MiniMap:
             self.gen_outline(outline1, draw=True)
             pg.draw.rect(self.screen, 'black', outline1, 1)
 
-    def render_tiles(self) -> None:
-        tile_map, visited_map = self.get_map_slices()
-        cols, rows = tile_map.shape
-        for y in range(rows): # keep y first otherwise tree branches to the right get blitted over by the following x index
-            for x in range(cols):
-                image = pg.Surface((self.tile_px_w, self.tile_px_h))
-                if visited_map[x, y]:
-                    tile_id = tile_map[x, y]
-                    tile_name = self.ids_to_names[tile_id]
-                    if tile_name in self.non_tiles:
-                        tile_color = self.non_tiles[tile_name]['rgb']
-                        if tile_name == 'tree base':
-                            self.render_tree(image, tile_color, x, y)
-                    else:
-                        if tile_name != 'obj extended':
-                            if tile_name in self.terrain_tiles:
-                                tile_color = TILES[tile_name]['rgb']
-                            else:
-                                pass
-                        else:
-                            pass
-                else:
-                    tile_color = 'black'
-                image.fill(tile_color)
-                rect = image.get_rect(topleft = self.topleft + (x * self.tile_px_w, y * self.tile_px_h))
-                self.screen.blit(image, rect)
-
-    def render_tree(self, image: pg.Surface, tile_color: str, x: int, y: int) -> None:
-        image.fill(tile_color)
-        for i in range(self.tree_px_height):
-            rect = image.get_rect(topleft = self.topleft + (x * self.tile_px_w, (y - i) * self.tile_px_h))
-            self.screen.blit(image, rect)
-            if i == self.branch_y:
-                left_branch = image.get_rect(topleft = self.topleft + ((x - 1) * self.tile_px_w, (y - i) * self.tile_px_h))
-                right_branch = image.get_rect(topleft = self.topleft + ((x + 1) * self.tile_px_w, (y - i) * self.tile_px_h))
-                self.screen.blit(image, left_branch)
-                self.screen.blit(image, right_branch)
-
-    def get_map_slices(self) -> tuple[np.ndarray, np.ndarray]:
-        '''returns the slice of the tile map to display & the updated visited tiles map'''
-        screen_w = self.screen.get_width() // 2
-        screen_h = self.screen.get_height() // 2
-        tile_offset_x = int((self.cam_offset.x + screen_w) / TILE_SIZE) # not using int division since the camera offset is a vector2
-        tile_offset_y = int((self.cam_offset.y + screen_h) / TILE_SIZE)
-
-        left = max(0, tile_offset_x - self.border_dist_x)
-        right = min(self.tile_map.shape[0], tile_offset_x + self.border_dist_x)
-        top_default = tile_offset_y - self.border_dist_y # keeping the default in case it's negative so the top/bottom row calculation can be adjusted
-        top = max(0, top_default)
-        bottom = min(self.tile_map.shape[1], tile_offset_y + self.border_dist_y)
-        if top_default < 0:
-            bottom += abs(top_default) # prevents rows below from being occluded when the camera offset is negative 
-        
-        left_visited = max(0, tile_offset_x - self.update_radius)
-        right_visited = min(self.tile_map.shape[0], tile_offset_x + self.update_radius)
-        top_default = tile_offset_y - self.update_radius
-        top_visited = max(0, tile_offset_y - self.update_radius)
-        bottom_visited = min(self.tile_map.shape[1], tile_offset_y + self.update_radius)
-        if top_default < 0:
-            bottom_visited += abs(top_default)
-        self.visited_tiles[left_visited:right_visited, top_visited:bottom_visited] = True
-        
-        start_x = max(0, self.border_dist_x - (tile_offset_x - left))
-        start_y = max(0, self.border_dist_y - (tile_offset_y - top))
-        
-        map_slice = self.tile_map[left:right, top:bottom]
-        map_cols, map_rows = map_slice.shape
-        cols = min(map_cols, self.tiles_x - start_x) 
-        rows = min(map_rows, self.tiles_y - start_y)
+    def render_tiles(self, left: int, top: int) -> None:
+        '''left/top is the topleft tile of the view, possibly off the map'''
+        self.view_surf.fill('black')
+        self.view_surf.blit(self.map_surf, (max(0, -left), max(0, -top)), (max(0, left), max(0, top), self.tiles_x, self.tiles_y))
+        pg.transform.scale(self.view_surf, (self.outline_w, self.outline_h), self.scaled_surf)
+        self.screen.blit(self.scaled_surf, self.topleft)
 
-        full_slice = np.full((self.tiles_x, self.tiles_y), self.names_to_ids['air'], dtype = np.uint8)
-        full_slice[start_x:start_x + map_cols, start_y:start_y + map_rows] = map_slice[start_x:start_x + map_cols, start_y:start_y + map_rows]
-        
-        visited_slice = np.full((self.tiles_x, self.tiles_y), False, dtype = bool)
-        visited_slice[start_x:start_x + cols, start_y:start_y + rows] = self.visited_tiles[left:left + cols, top:top + rows]
-        
-        return full_slice, visited_slice
+    def update_visited_tiles(self) -> tuple[int, int]:
+        '''marks the tiles around the camera as visited & returns the topleft tile of the minimap's view (may be off the map)'''
+        tile_offset_x = int((self.cam_offset.x + self.screen.get_width() // 2) / TILE_SIZE) # not using int division since the camera offset is a vector2
+        tile_offset_y = int((self.cam_offset.y + self.screen.get_height() // 2) / TILE_SIZE)
+
+        left = max(0, tile_offset_x - self.update_radius)
+        right = min(MAP_SIZE[0], tile_offset_x + self.update_radius)
+        top = max(0, tile_offset_y - self.update_radius)
+        bottom = min(MAP_SIZE[1], tile_offset_y + self.update_radius)
+        if left < right and top < bottom and not self.visited_tiles[left:right, top:bottom].all():
+            self.visited_tiles[left:right, top:bottom] = True
+            self.update_region(left, top, right, bottom)
+            self.save_tracker.update_region('ui/visited tiles', left, top, right, bottom)
+        return tile_offset_x - self.border_dist_x, tile_offset_y - self.border_dist_y
 
     def update(self) -> None:
         self.render_outline()
-        self.render_tiles()
\ No newline at end of file
+        left, top = self.update_visited_tiles()
+        if self.render:
+            self.render_tiles(left, top)
\ No newline at end of file
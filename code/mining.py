@@ -8,7 +8,7 @@ if TYPE_CHECKING:
 
 import pygame as pg
 
-from settings import TILES, TILE_SIZE, TILE_REACH_RADIUS, FPS
+from settings import TILES, TILE_SIZE, TILE_REACH_RADIUS, SIM_RATE, LIQUIDS
 
 class Mining:
     def __init__(self, sprite_manager: SpriteManager):
@@ -21,14 +21,13 @@ class Mining:
         self.keyboard: Keyboard = sprite_manager.keyboard
         self.key_mine: int = sprite_manager.keyboard.key_bindings['mine']
         
-        self.update_map: callable = sprite_manager.collision_map.update_map
+        self.set_tile: callable = sprite_manager.set_tile
         self.get_tool_strength: callable = sprite_manager.get_tool_strength
-        self.pick_up_item: callable = sprite_manager.pick_up_item
         self.get_tile_material: callable = sprite_manager.get_tile_material
         self.end_action: callable = sprite_manager.end_action
         
         self.mining_map: dict[tuple[int, int]: dict[str, int]] = {}
-        self.invalid_ids = {sprite_manager.names_to_ids[k] for k in ('air', 'water', 'tree base')} # can't be mined
+        self.invalid_ids = {sprite_manager.names_to_ids[k] for k in ('air', *LIQUIDS, 'tree base')} # can't be mined
 
     def run(self, sprite: pg.sprite.Sprite, dt: float) -> None:
         if sprite.item_holding and 'pickaxe' in sprite.item_holding:
@@ -52,12 +51,11 @@ class Mining:
     # TODO: decrease the strength of the current tool as its usage accumulates    
     def update_tile(self, sprite: pg.sprite.Sprite, dt: float) -> bool:   
         tile_data = self.mining_map[self.mouse.xy_world_tile]
-        tile_data['hits'] += 1 / (FPS * dt)
+        tile_data['hits'] += dt * SIM_RATE # one hit per simulation tick
         tile_data['hardness'] = max(0, tile_data['hardness'] - (self.get_tool_strength(sprite) * tile_data['hits']))
         if tile_data['hardness'] == 0:
             sprite.inventory.add_item(self.get_tile_material(self.tile_map[self.mouse.xy_world_tile]))
-            self.tile_map[self.mouse.xy_world_tile] = self.names_to_ids['air']
-            self.update_map(self.mouse.xy_world_tile, remove_tile=True)
+            self.set_tile(self.mouse.xy_world_tile, self.names_to_ids['air'])
             del self.mining_map[self.mouse.xy_world_tile]
     
     def update(self, dt: float) -> None:
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from player import Player
     from sprite_manager import SpriteManager
+    from spatial_index import SpatialGroup
 
 import pygame as pg
 from random import randint, choice
@@ -22,23 +23,26 @@ class Cloud(Sprite):
         z: int, 
         speed: int, 
         player: Player, 
-        rect_in_sprite_radius: callable
+        sprite_index: SpatialGroup
     ):
         super().__init__(xy, image, z, sprite_groups)
         self.speed = speed
         self.player = player
-        self.rect_in_sprite_radius = rect_in_sprite_radius
+        self.sprite_index = sprite_index
 
     def move(self, dt: float) -> None:  
         self.rect.x -= self.speed * dt
         if self.rect.right <= 0:
             self.kill()
+        else:
+            self.sprite_index.move(self)
         
-    def update(self, dt: float) -> None:
+    def step(self, dt: float) -> None:
         self.move(dt)
 
 
 class Tree(Sprite):
+    save_columns = {'current strength': 'int'}
     def __init__(
         self, 
         xy: pg.Vector2, 
@@ -59,7 +63,7 @@ class Tree(Sprite):
         self.tree_obj_map = sprite_manager.tree_map
         self.wood_sprite_groups = [
             getattr(sprite_manager, group) for group in (
-                'all_sprites', 'active_sprites', 'nature_sprites', 'item_sprites'
+                'all_sprites', 'nature_sprites', 'item_sprites'
             )
         ]
         self.sprite_movement = sprite_manager.sprite_movement
@@ -75,7 +79,7 @@ class Tree(Sprite):
 
         self.delay_alarm = Alarm(length=500) # prevents cut_down() from being called every frame
 
-    def cut_down(self, sprite: pg.sprite.Sprite, get_tool_strength: callable, pick_up_item: callable) -> None:
+    def cut_down(self, sprite: pg.sprite.Sprite, get_tool_strength: callable) -> None:
         self.delay_alarm.update()
         if not self.delay_alarm.running:
             sprite.state = 'chopping'
@@ -90,11 +94,11 @@ class Tree(Sprite):
                 self.tree_obj_map.remove(self.tree_map_xy)  
                 self.kill()
                 sprite.state = 'idle'
-                self.produce_wood(sprite, pick_up_item)
+                self.produce_wood(sprite)
                 return
             self.delay_alarm.start()
     
-    def produce_wood(self, sprite: pg.sprite.Sprite, pick_up_item: callable) -> None:
+    def produce_wood(self, sprite: pg.sprite.Sprite) -> None:
         for i in range(self.total_wood):
             wood = ItemDrop(
                 pg.Vector2(
@@ -0,0 +1,132 @@
+import numpy as np
+
+# Ken Perlin's reference permutation, the same table the noise library is compiled with
+PERM = np.array([
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+    247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+    57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+    74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+    52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+    207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+    119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+    129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+    218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+    81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+    184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+    222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+] * 2, dtype=np.int32)
+
+# the x/y columns of the noise library's GRAD3 table, split to gather each component with a single np.take
+GRAD_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, -1, 0, 0], dtype=np.float32)
+GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 0, 0, -1, 1], dtype=np.float32)
+
+class PerlinNoise:
+    '''
+    vectorized port of noise.pnoise1/pnoise2, evaluates whole coordinate arrays in one call instead of one python call per sample
+    float32 math & octave handling mirror the C extension so fields match it sample for sample
+    '''
+    def __init__(self, seed: int):
+        self.seed = seed
+        # the C extension adds the base to the table index without wrapping and reads past its 512 entries once base >= 256,
+        # so the seed is folded into the range where its output is defined
+        self.base = seed % 256
+
+    @staticmethod
+    def fade(t: np.ndarray) -> np.ndarray:
+        return t * t * t * (t * (t * np.float32(6) - np.float32(15)) + np.float32(10))
+
+    @staticmethod
+    def lerp(t: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return a + t * (b - a)
+
+    @staticmethod
+    def perm(idxs: np.ndarray) -> np.ndarray:
+        return np.take(PERM, idxs & 511)
+
+    def noise1(self, x: np.ndarray, repeat: int) -> np.ndarray:
+        floor_x = np.floor(x)
+        i = np.fmod(floor_x.astype(np.int32), repeat) # fmod keeps the sign of the dividend like C's % operator
+        ii = np.fmod(i + 1, repeat)
+        i = (i & 255) + self.base
+        ii = (ii & 255) + self.base
+
+        x = x - floor_x
+        return self.lerp(self.fade(x), self.grad1(self.perm(i), x), self.grad1(self.perm(ii), x - np.float32(1))) * np.float32(0.4)
+
+    @staticmethod
+    def grad1(hashes: np.ndarray, x: np.ndarray) -> np.ndarray:
+        return np.where(hashes & 8, np.float32(-1), ((hashes & 7) + 1).astype(np.float32)) * x
+
+    def noise2(self, x: np.ndarray, y: np.ndarray, repeat_x: np.float32, repeat_y: np.float32) -> np.ndarray:
+        i = np.floor(np.fmod(x, repeat_x)).astype(np.int32)
+        j = np.floor(np.fmod(y, repeat_y)).astype(np.int32)
+        ii = np.fmod((i + 1).astype(np.float32), repeat_x).astype(np.int32)
+        jj = np.fmod((j + 1).astype(np.float32), repeat_y).astype(np.int32)
+        i, j, ii, jj = ((i & 255) + self.base), ((j & 255) + self.base), ((ii & 255) + self.base), ((jj & 255) + self.base)
+
+        x = x - np.floor(x)
+        y = y - np.floor(y)
+        fx, fy = self.fade(x), self.fade(y)
+
+        a, b = self.perm(i), self.perm(ii)
+        aa, ab, ba, bb = self.perm(a + j), self.perm(a + jj), self.perm(b + j), self.perm(b + jj)
+        one = np.float32(1)
+        return self.lerp(
+            fy,
+            self.lerp(fx, self.grad2(self.perm(aa), x, y), self.grad2(self.perm(ba), x - one, y)),
+            self.lerp(fx, self.grad2(self.perm(ab), x, y - one), self.grad2(self.perm(bb), x - one, y - one))
+        )
+
+    @staticmethod
+    def grad2(hashes: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        hashes = hashes & 15
+        return x * np.take(GRAD_X, hashes) + y * np.take(GRAD_Y, hashes)
+
+    def pnoise1(
+        self,
+        x: np.ndarray,
+        octaves: int=1,
+        persistence: float=0.5,
+        lacunarity: float=2.0,
+        repeat: int=1024
+    ) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        if octaves == 1:
+            return self.noise1(x, repeat)
+
+        freq, amp, max_amp = np.float32(1), np.float32(1), np.float32(0)
+        total = np.zeros_like(x)
+        for _ in range(octaves):
+            total += self.noise1(x * freq, int(repeat * freq)) * amp
+            max_amp += amp
+            freq *= np.float32(lacunarity)
+            amp *= np.float32(persistence)
+        return total / max_amp
+
+    def pnoise2(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        octaves: int=1,
+        persistence: float=0.5,
+        lacunarity: float=2.0,
+        repeat_x: float=1024,
+        repeat_y: float=1024
+    ) -> np.ndarray:
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float32), np.asarray(y, dtype=np.float32))
+        repeat_x, repeat_y = np.float32(repeat_x), np.float32(repeat_y)
+        if octaves == 1:
+            return self.noise2(x, y, repeat_x, repeat_y)
+
+        freq, amp, max_amp = np.float32(1), np.float32(1), np.float32(0)
+        total = np.zeros(x.shape, dtype=np.float32)
+        for _ in range(octaves):
+            total += self.noise2(x * freq, y * freq, repeat_x * freq, repeat_y * freq) * amp
+            max_amp += amp
+            freq *= np.float32(lacunarity)
+            amp *= np.float32(persistence)
+        return total / max_amp
@@ -11,12 +11,17 @@ from math import ceil
 from settings import TILE_SIZE
 from collision_detection import CollisionDetection, CollisionMap
 from sprite_movement import SpriteMovement
+from body_system import BodySystem
+from liquid_flow import LiquidFlow
+from loose_tiles import LooseTiles
 
 class PhysicsEngine:
     def __init__(self, game_obj: Main):
         self.tile_map: np.ndarray = game_obj.proc_gen.tile_map
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
         self.ids_to_names: dict[int, str] = game_obj.proc_gen.ids_to_names
+        self.tile_listeners: list[callable] = game_obj.proc_gen.tile_listeners
+        self.notify_tile_listeners: callable = game_obj.proc_gen.notify_tile_listeners
 
         self.keyboard: Keyboard = game_obj.input_manager.keyboard
         self.key_bindings: dict[str, int] = self.keyboard.key_bindings
@@ -29,6 +34,9 @@ class PhysicsEngine:
         self.collision_detection = CollisionDetection(self)
 
         self.sprite_movement = SpriteMovement(self)
+        self.body_system = BodySystem(self)
+        self.liquid_flow = LiquidFlow(self)
+        self.loose_tiles = LooseTiles(self)
 
     def step_over_tile(self, sprite, tile_x, tile_y) -> bool:
         if sprite.direction.y == 0:
@@ -40,11 +48,8 @@ class PhysicsEngine:
         return False
 
     def update(self, player: pg.sprite.Sprite, dt: float) -> None:
-        self.sprite_movement.update(player, self.keyboard.held_keys, self.keyboard.pressed_keys, dt)
+        self.sprite_movement.update(player, self.keyboard.held_keys, self.keyboard.consume(self.key_bindings['jump']), dt)
+        self.body_system.step(dt)
+        self.loose_tiles.step()
+        self.liquid_flow.step()
 
-
-class WaterFlow:
-    def __init__(self, physics_engine: PhysicsEngine):
-        self.tile_map: np.ndarray = physics_engine.tile_map
-        self.names_to_ids: dict[str, int] = physics_engine.names_to_ids
-        self.ids_to_names: dict[int, str] = physics_engine.ids_to_names
@@ -50,7 +50,7 @@ class Pipe(TransportSprite):
         if self.keyboard.pressed_keys[pg.K_r] and self.rect.collidepoint(self.mouse.world_xy) and not self.player.item_holding:
             self.variant_idx = (self.variant_idx + 1) % len(PIPE_TRANSPORT_DIRS)
             self.image = self.graphics[f'pipe {self.variant_idx}']
-            self.tile_map[self.tile_xy] = self.tile_IDs[f'pipe {self.variant_idx}']
+            self.game_obj.proc_gen.set_tile(self.tile_xy, self.names_to_ids[f'pipe {self.variant_idx}'])
             self.get_connected_objs()
 
     def transport(self) -> None:
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
+    from asset_manager import AnimationAtlas
 
 import pygame as pg
 
@@ -14,7 +15,7 @@ class Player(Colonist):
         self, 
         game_obj: Main,
         xy: pg.Vector2,
-        frames: dict[str, pg.Surface],
+        frames: AnimationAtlas,
         sprite_groups: list[pg.sprite.Sprite],
         save_data: dict[str, any],
     ):  
@@ -5,12 +5,14 @@ if TYPE_CHECKING:
 
 import pygame as pg
 import numpy as np
-import noise
-from random import randint
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
 from settings import TILES, RAMP_TILES, TILE_SIZE, MAP_SIZE, RES, BIOMES, BIOME_WIDTH, PRODUCTION, \
-ELECTRICITY, PIPE_TRANSPORT_DIRS, LOGISTICS, STORAGE, LIQUIDS
+ELECTRICITY, PIPE_TRANSPORT_DIRS, LOGISTICS, STORAGE, LIQUIDS, WORLD_SEED
+from perlin_noise import PerlinNoise
+from world_cache import WorldCache
 
 # TODO: refine the ore distribution to generate clusters of a particular gemstone rather than randomized for each tile 
 class ProcGen:
@@ -18,30 +20,47 @@ class ProcGen:
         self.screen: pg.Surface = game_obj.screen
         self.cam_offset: pg.Vector2 = game_obj.cam.offset
         self.save_data: dict[str, any] = game_obj.save_data
+        self.world_cache: WorldCache = game_obj.world_cache
+        self.seed = WORLD_SEED
         
         self.names_to_ids, self.ids_to_names, self.ramp_ids = self.get_tile_ids()
+        self.tile_listeners: list[callable] = [] # called with the coordinates of tiles edited after generation to patch anything derived from the tile map
 
         if self.save_data:
             self.load_save_data()
         else:
             self.current_biome = 'forest'
             self.biome_order, self.idxs_to_biomes = self.order_biomes()
-            self.terrain = TerrainGen(self)
-            self.tile_map = self.terrain.tile_map
-            self.height_map = self.terrain.height_map
-            self.tree_map = self.terrain.tree_gen.map
-            self.cave_maps = self.terrain.cave_gen.maps
-            self.player_spawn_point = self.get_player_spawn_point()
+            world_key = self.world_cache.get_key(self.seed, self.names_to_ids)
+            cached_world = self.world_cache.load(world_key)
+            if cached_world:
+                self.load_cached_world(cached_world)
+            else:
+                self.terrain = TerrainGen(self, game_obj.gen_workers)
+                self.tile_map = self.terrain.tile_map = self.terrain.tile_map.astype(np.uint8) # generated as int64, every tile id fits in a byte
+                self.height_map = self.terrain.height_map
+                self.tree_map = self.terrain.tree_gen.map
+                self.cave_maps = self.terrain.cave_gen.maps
+                self.player_spawn_point = self.get_player_spawn_point()
+                self.world_cache.store(world_key, {**self.make_save(), 'player spawn point': list(self.player_spawn_point)})
         
     def load_save_data(self) -> None:
-        self.tile_map = np.array(self.save_data['tile map'], dtype=np.uint8)
-        self.height_map = np.array(self.save_data['height map'], dtype=np.float32)
+        # already arrays when loaded from a binary save, only lists from a json save are copied into arrays
+        self.tile_map = np.asarray(self.save_data['tile map'], dtype=np.uint8)
+        self.height_map = np.asarray(self.save_data['height map'], dtype=np.float32)
         self.tree_map = self.save_data['tree map']
         self.cave_maps = self.save_data['cave maps']
         self.biome_order = self.save_data['biome order']
         self.idxs_to_biomes = {i: biome for biome, i in self.biome_order.items()}
         self.current_biome = self.save_data['current biome']
 
+    def load_cached_world(self, data: dict[str, any]) -> None:
+        self.tile_map = data['tile map'] # copy-on-write maps of the cache file
+        self.height_map = data['height map']
+        self.tree_map = {tuple(xy) for xy in data['tree map']}
+        self.cave_maps = data['cave maps']
+        self.player_spawn_point = tuple(data['player spawn point'])
+
     @staticmethod
     def get_tile_ids() -> tuple[dict[str, int], dict[int, str], set]:
         names_to_ids = {'air': 0, 'item extended': 1} # invisible tiles
@@ -50,7 +69,7 @@ class ProcGen:
         existing_ids = len(ids_to_names)
         for i, name in enumerate((
             *TILES.keys(), *RAMP_TILES, *[k for k in PRODUCTION if k != 'pipe'], *[f'pipe {i}' for i in range(len(PIPE_TRANSPORT_DIRS))], 
-            *ELECTRICITY, *LOGISTICS, *STORAGE, *LIQUIDS, 'tree base' 
+            *ELECTRICITY, *LOGISTICS, *STORAGE, *sorted(LIQUIDS), 'tree base' 
         )):
             id_num = existing_ids + i
             names_to_ids[name] = id_num
@@ -59,6 +78,16 @@ class ProcGen:
                 ramp_ids.add(id_num)
         return names_to_ids, ids_to_names, ramp_ids
 
+    def set_tile(self, tile_xy: tuple[int, int], tile_id: int) -> None:
+        self.tile_map[tile_xy] = tile_id
+        self.notify_tile_listeners([tile_xy])
+
+    def notify_tile_listeners(self, tiles: list[tuple[int, int]], source: callable=None) -> None:
+        '''source is the listener that made the edits, if any, it's already up to date'''
+        for listener in self.tile_listeners:
+            if listener != source:
+                listener(tiles)
+
     def get_tile_material(self, tile_id: int) -> str:
         name = self.ids_to_names[tile_id]
         return name.split(' ')[0] if tile_id in self.ramp_ids else name
@@ -87,28 +116,30 @@ class ProcGen:
             else:
                 return (center_x * TILE_SIZE, y * TILE_SIZE)
 
-    def make_save(self) -> dict[str, list | dict]:
+    def make_save(self) -> dict[str, np.ndarray | list | dict]:
         return {
-            'tile map': self.tile_map.tolist(),
-            'height map': self.height_map.tolist(),
+            'tile map': np.asarray(self.tile_map, dtype=np.uint8), # not copied, SaveFile.snapshot copies the arrays that can still be edited
+            'height map': np.asarray(self.height_map, dtype=np.float32),
             'tree map': [list(xy) for xy in self.tree_map],
-            'cave maps': {biome: arr if isinstance(arr, list) else arr.tolist() for biome, arr in self.cave_maps.items()},
+            'cave maps': {biome: np.asarray(arr, dtype=bool) for biome, arr in self.cave_maps.items()},
             'biome order': self.biome_order,
         }
 
 
 class TerrainGen:
-    def __init__(self, proc_gen: ProcGen):
+    def __init__(self, proc_gen: ProcGen, num_workers: int=1):
         self.names_to_ids: dict[str, int] = proc_gen.names_to_ids
         self.biome_order: dict[str, int] = proc_gen.biome_order 
         self.idxs_to_biomes: dict[int, str] = proc_gen.idxs_to_biomes
         self.current_biome: str = proc_gen.current_biome
         
         self.biome_names = list(self.biome_order.keys())
-        self.seed = 3638 # TODO: add the option to enter a custom seed
+        self.seed: int = proc_gen.seed
+        self.noise = PerlinNoise(self.seed)
         self.tile_map = np.zeros(MAP_SIZE, dtype=int)
         self.height_map = self.gen_height_map()
         self.surface_lvls = np.array(self.height_map).astype(int)
+        self.rng_stages = ('surface', 'underground', 'caves', 'lakes', 'trees')
         self.depth_lvls = [0.1, 0.2, 0.3, 0.4]
         self.max_depth_lvl = len(self.depth_lvls)
         self.tile_probs_max_idxs = { # limits what tiles may appear per each depth level by only slicing the tile probs dictionary up to a given index
@@ -122,9 +153,42 @@ class TerrainGen:
             self.tile_probs_max_idxs[biome]['depth 3'] = len(BIOMES[biome]['tile probs']) # all biome-specific tiles are available at this level
     
         self.cave_gen = CaveGen(self)
-        self.place_tiles()
-        self.lake_gen = LakeGen(self, proc_gen)
-        self.tree_gen = TreeGen(self, proc_gen)
+        self.lake_gen = LakeGen(self)
+        if num_workers > 1:
+            self.gen_bands_parallel(num_workers)
+        else:
+            self.cave_gen.gen_map(self.current_biome)
+            for biome in self.biome_order:
+                self.gen_band(biome)
+        self.tree_gen = TreeGen(self, proc_gen) # trees look past the band borders, so they're placed once every band is done
+
+    def __getstate__(self) -> dict[str, any]:
+        '''sent to the generation workers without the world arrays, they attach to the shared copies instead'''
+        return {k: v for k, v in self.__dict__.items() if k not in {'tile_map', 'cave_gen', 'lake_gen', 'tree_gen'}}
+
+    def gen_band(self, biome: str) -> None:
+        '''everything generated below the height map that only depends on the band's own columns'''
+        self.place_tiles(biome)
+        self.lake_gen.gen_band(biome)
+
+    def gen_bands_parallel(self, num_workers: int) -> None:
+        '''
+        the cave noise is sampled in column ranges & then each biome band is generated by a pool of processes writing into shared memory,
+        every band draws from its own random streams & the height map (including the blending at the borders) is computed up front, 
+        so the world is identical to the one generated in a single process
+        '''
+        self.cave_gen.gen_map(self.current_biome, sample=False)
+        shared = {'tile map': SharedArray(self.tile_map), 'cave map': SharedArray(self.cave_gen.maps[self.current_biome])}
+        try:
+            with ProcessPoolExecutor(num_workers, initializer=init_gen_worker, initargs=(self, {k: v.spec for k, v in shared.items()})) as pool:
+                column_ranges = np.array_split(np.arange(MAP_SIZE[0]), num_workers * 4) # smaller than the bands so every worker gets a share
+                list(pool.map(gen_cave_columns, [(int(xs[0]), int(xs[-1]) + 1) for xs in column_ranges if xs.size]))
+                list(pool.map(gen_band, self.biome_order))
+            self.tile_map = shared['tile map'].array.copy()
+            self.cave_gen.maps[self.current_biome] = shared['cave map'].array.copy()
+        finally:
+            for arr in shared.values():
+                arr.release()
 
     def gen_height_map(self) -> np.ndarray:
         height_map = np.zeros(MAP_SIZE[0], dtype=np.float32)
@@ -146,89 +210,87 @@ class TerrainGen:
                     height_map[world_x] = ((1 - rel_pos) * elevs[biome_x]) + (rel_pos * next_biome_elevs[biome_x])   
         return height_map
 
+    def get_rng(self, stage: str, biome: str) -> np.random.Generator:
+        '''
+        an independent stream for each stage & biome band derived from the seed, 
+        so what a band generates doesn't depend on the order the stages & bands run in
+        '''
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(self.rng_stages.index(stage), list(BIOMES).index(biome))))
+
     def get_biome_elevations(self, map_slice: np.ndarray, biome: str) -> np.ndarray:
         params = BIOMES[biome]['height map']
-        noise_array = np.array([
-            noise.pnoise1(
-                x / params['scale'], 
-                params['octaves'], 
-                params['persistence'], 
-                params['lacunarity'], 
-                base=self.seed
-            ) for x in map_slice
-        ], dtype=np.float32)
+        noise_array = self.noise.pnoise1(map_slice / params['scale'], params['octaves'], params['persistence'], params['lacunarity'])
 
         params = BIOMES[biome]['elevation']
         mid_lvl = (params['bottom'] - params['top']) / 2
         return params['top'] + mid_lvl + (noise_array * mid_lvl)
             
     @staticmethod
-    def get_biome_tile(current_biome: str) -> str:
+    def get_biome_tiles(current_biome: str, num_tiles: int, rng: np.random.Generator) -> np.ndarray:
+        rolls = rng.integers(0, 11, num_tiles)
         match current_biome:
             case 'forest':
-                return 'dirt' if randint(0, 10) < 8 else 'stone'
+                return np.where(rolls < 8, 'dirt', 'stone')
 
             case 'taiga':
-                return 'stone' if randint(0, 10) < 6 else 'dirt'
+                return np.where(rolls < 6, 'stone', 'dirt')
 
             case 'desert':
-                return 'sand'
+                return np.full(num_tiles, 'sand')
 
             case 'highlands':
-                return 'stone' if randint(0, 10) < 7 else 'dirt'
+                return np.where(rolls < 7, 'stone', 'dirt')
 
             case 'tundra':
-                return 'ice' if randint(0, 10) < 6 else 'dirt'
-
-    def place_tiles(self) -> None:
-        surface_tiles = np.array([self.names_to_ids[self.get_biome_tile(self.biome_names[x // BIOME_WIDTH])] for x in range(MAP_SIZE[0])])
-        self.tile_map[np.arange(MAP_SIZE[0]), self.surface_lvls] = surface_tiles
-        self.place_ramps()
-        self.place_underground_tiles(surface_tiles) 
-
-    def place_ramps(self) -> None:
+                return np.where(rolls < 6, 'ice', 'dirt')
+
+    def place_tiles(self, biome: str) -> None:
+        start_x = self.biome_order[biome] * BIOME_WIDTH
+        end_x = start_x + BIOME_WIDTH
+        rng = self.get_rng('surface', biome)
+        surface_tiles = self.get_biome_tiles(biome, BIOME_WIDTH, rng)
+        ramp_tiles = self.get_biome_tiles(biome, BIOME_WIDTH, rng) # drawn for every column so the draws don't depend on where the ramps are
+        self.tile_map[np.arange(start_x, end_x), self.surface_lvls[start_x:end_x]] = [self.names_to_ids[name] for name in surface_tiles]
+        self.place_ramps(ramp_tiles, start_x, end_x)
+        self.place_underground_tiles(biome, start_x, end_x) 
+
+    def place_ramps(self, ramp_tiles: np.ndarray, start_x: int, end_x: int) -> None:
         elev_diffs = np.diff(self.surface_lvls)
         r_ramp_x = np.where(elev_diffs > 0)[0]
         l_ramp_x = np.where(elev_diffs < 0)[0] + 1
-        self.tile_map[r_ramp_x, self.surface_lvls[r_ramp_x]] = np.array([
-            self.names_to_ids[f'{self.get_biome_tile(self.biome_names[x // BIOME_WIDTH])} ramp right'] for x in r_ramp_x
-        ])
-        self.tile_map[l_ramp_x, self.surface_lvls[l_ramp_x]] = np.array([
-            self.names_to_ids[f'{self.get_biome_tile(self.biome_names[x // BIOME_WIDTH])} ramp left'] for x in l_ramp_x
-        ])
-
-    def place_underground_tiles(self, surface_tiles: np.ndarray) -> None:
-        x_axis = np.arange(MAP_SIZE[0]).reshape(MAP_SIZE[0], 1)
+        for ramp_x, side in ((r_ramp_x, 'right'), (l_ramp_x, 'left')):
+            ramp_x = ramp_x[(ramp_x >= start_x) & (ramp_x < end_x)]
+            self.tile_map[ramp_x, self.surface_lvls[ramp_x]] = [self.names_to_ids[f'{ramp_tiles[x - start_x]} ramp {side}'] for x in ramp_x]
+
+    def place_underground_tiles(self, biome: str, start_x: int, end_x: int) -> None:
         y_axis = np.arange(MAP_SIZE[1]).reshape(1, MAP_SIZE[1])
-        surface_lvls = self.surface_lvls.reshape(MAP_SIZE[0], 1)
+        surface_lvls = self.surface_lvls[start_x:end_x].reshape(-1, 1)
         rel_depth = (y_axis.astype(float) - surface_lvls) / float(MAP_SIZE[1])
         underground_mask = y_axis > surface_lvls
-        tile_probs = {biome: BIOMES[biome]['tile probs'] for biome in self.biome_names}
-        tile_names = {biome: np.array([self.names_to_ids[tile] for tile in tile_probs[biome].keys()]) for biome in self.biome_names}
-        for biome, idx in self.biome_order.items(): 
-            biome_cols = (x_axis // BIOME_WIDTH == idx)
-            for depth_idx, mask in enumerate(self.get_depth_masks(rel_depth, underground_mask)):
-                depth_mask = mask & biome_cols 
-                if not depth_mask.any(): # doesn't represent the current depth
-                    continue
-                biome_tile_probs = list(tile_probs[biome].values())
-                biome_tile_names = tile_names[biome]
-                if depth_idx != self.max_depth_lvl: # certain tiles will be excluded
-                    max_idx = self.tile_probs_max_idxs[biome][f'depth {depth_idx}']
-                    biome_tile_probs = biome_tile_probs[:max_idx]
-                    biome_tile_names = biome_tile_names[:max_idx]
-                biome_tile_probs = [p / sum(biome_tile_probs) for p in biome_tile_probs] # scale the values to sum to 1, otherwise np.random.choice() will throw an error
-                self.tile_map[depth_mask] = np.random.choice(biome_tile_names, size=depth_mask.sum(), p=biome_tile_probs)
+        tile_probs = list(BIOMES[biome]['tile probs'].values())
+        tile_names = np.array([self.names_to_ids[tile] for tile in BIOMES[biome]['tile probs'].keys()])
+        rng = self.get_rng('underground', biome)
+        band = self.tile_map[start_x:end_x]
+        for depth_idx, depth_mask in enumerate(self.get_depth_masks(rel_depth, underground_mask, start_x, end_x)):
+            if not depth_mask.any(): # doesn't represent the current depth
+                continue
+            biome_tile_probs, biome_tile_names = tile_probs, tile_names
+            if depth_idx != self.max_depth_lvl: # certain tiles will be excluded
+                max_idx = self.tile_probs_max_idxs[biome][f'depth {depth_idx}']
+                biome_tile_probs = biome_tile_probs[:max_idx]
+                biome_tile_names = biome_tile_names[:max_idx]
+            biome_tile_probs = [p / sum(biome_tile_probs) for p in biome_tile_probs] # scale the values to sum to 1, otherwise rng.choice() will throw an error
+            band[depth_mask] = rng.choice(biome_tile_names, size=depth_mask.sum(), p=biome_tile_probs)
                 
-    def get_depth_masks(self, rel_depth: np.ndarray, underground_tiles: np.ndarray) -> list[np.ndarray]:
+    def get_depth_masks(self, rel_depth: np.ndarray, underground_tiles: np.ndarray, start_x: int, end_x: int) -> list[np.ndarray]:
         masks = []
         if self.current_biome not in self.cave_gen.maps.keys():
             self.cave_gen.gen_map(self.current_biome)
 
+        cave_mask = self.cave_gen.maps[self.current_biome][start_x:end_x]
         for i, v in enumerate(self.depth_lvls):
             below_max = rel_depth < v
             above_min = rel_depth >= (0 if i == 0 else self.depth_lvls[i - 1])
-            cave_mask = self.cave_gen.maps[self.current_biome]
             masks.append(below_max & above_min & underground_tiles & ~cave_mask)
         return masks
 
@@ -244,33 +306,36 @@ class TerrainGen:
 
 class CaveGen:
     def __init__(self, terrain: TerrainGen):
-        self.tile_map, self.height_map = terrain.tile_map, terrain.height_map
-        self.seed = terrain.seed
+        self.height_map = terrain.height_map
+        self.noise = terrain.noise
+        self.get_rng: callable = terrain.get_rng
         self.current_biome = terrain.current_biome
 
         self.maps = {}
-        self.gen_map(self.current_biome)
 
-    def gen_map(self, biome: str) -> None:
-        cave_map = np.zeros(MAP_SIZE, dtype=bool)
-        params = BIOMES[biome]['cave map']
+    def gen_map(self, biome: str, sample: bool=True) -> None:
+        '''with sample=False the map only marks the tiles below the minimum depth & gen_columns samples the noise for them'''
         screen_tiles_y = RES[1] // TILE_SIZE
-        min_y = randint(screen_tiles_y // 2, screen_tiles_y) # out of view until you dig 1 tile down at minimum
-        for x in range(MAP_SIZE[0]):
-            surface_level = int(self.height_map[x])
-            for y in range(surface_level + min_y, MAP_SIZE[1]):
-                n = noise.pnoise2(
-                    x / params['scale'], 
-                    y / params['scale'], 
-                    params['octaves'], 
-                    params['persistence'], 
-                    params['lacunarity'], 
-                    repeatx=-1, 
-                    repeaty=-1, 
-                    base=self.seed
-                )
-                cave_map[x, y] = (n + 1) / 2 > params['threshold'] # convert to a range of 0-1 before comparing
-        self.maps[biome] = cave_map
+        min_y = int(self.get_rng('caves', biome).integers(screen_tiles_y // 2, screen_tiles_y + 1)) # out of view until you dig 1 tile down at minimum
+        surface_lvls = self.height_map.astype(int).reshape(MAP_SIZE[0], 1)
+        self.maps[biome] = np.arange(MAP_SIZE[1]).reshape(1, MAP_SIZE[1]) >= surface_lvls + min_y # only sample the noise below the minimum depth
+        if sample:
+            self.gen_columns(biome, 0, MAP_SIZE[0])
+
+    def gen_columns(self, biome: str, start_x: int, end_x: int) -> None:
+        params = BIOMES[biome]['cave map']
+        cave_map = self.maps[biome][start_x:end_x]
+        xs, ys = np.nonzero(cave_map)
+        n = self.noise.pnoise2(
+            (xs + start_x) / params['scale'], 
+            ys / params['scale'], 
+            params['octaves'], 
+            params['persistence'], 
+            params['lacunarity'], 
+            repeat_x=-1, 
+            repeat_y=-1
+        )
+        cave_map[xs, ys] = (n.astype(np.float64) + 1) / 2 > params['threshold'] # convert to a range of 0-1 before comparing
 
 
 @dataclass(slots=True)
@@ -281,46 +346,49 @@ class MapSlice:
     end_y: int
 
 class LakeGen:
-    def __init__(self, terrain: TerrainGen, proc_gen: ProcGen):
+    def __init__(self, terrain: TerrainGen):
         self.tile_map, self.surface_lvls, self.seed = terrain.tile_map, terrain.surface_lvls, terrain.seed
-        self.biome_order, self.idxs_to_biomes, self.names_to_ids = proc_gen.biome_order, proc_gen.idxs_to_biomes, proc_gen.names_to_ids
+        self.get_rng: callable = terrain.get_rng
+        self.biome_order, self.idxs_to_biomes, self.names_to_ids = terrain.biome_order, terrain.idxs_to_biomes, terrain.names_to_ids
         self.ramp_ids = {self.names_to_ids[k] for k in self.names_to_ids if 'ramp' in k}
         self.map = np.zeros(MAP_SIZE, dtype=bool)
         
         self.min_width, self.max_width = 8, (RES[0] // TILE_SIZE) // 2 
         self.min_depth, self.max_depth = 4, 16
         self.lake_biomes = [b for b in self.biome_order if 'lake prob' in BIOMES[b]]
-        self.gen_map()
-        self.tile_map[self.map == True] = self.names_to_ids['water']
 
-    def gen_map(self) -> None:
-        for map_slice in self.get_valley_locations():
+    def gen_band(self, biome: str) -> None:
+        if biome not in self.lake_biomes:
+            return
+        rng = self.get_rng('lakes', biome)
+        for map_slice in self.get_valley_locations(biome, rng):
             fill_peak = max(map_slice.start_y, map_slice.end_y)
             if self.tile_map[map_slice.start_x if fill_peak == map_slice.start_y else map_slice.end_x, fill_peak] in self.ramp_ids: 
                 fill_peak += 1  # only fill the lake up to the next highest tile
-            floor = fill_peak + randint(self.min_depth, self.max_depth)
+            floor = fill_peak + int(rng.integers(self.min_depth, self.max_depth + 1))
             for x in range(map_slice.start_x, map_slice.end_x):
                 self.map[x, fill_peak:floor] = True  
                 self.tile_map[x, :fill_peak] = self.names_to_ids['air']
+        band = slice(self.biome_order[biome] * BIOME_WIDTH, (self.biome_order[biome] + 1) * BIOME_WIDTH)
+        self.tile_map[band][self.map[band]] = self.names_to_ids['water']
 
-    def get_valley_locations(self) -> list[MapSlice]:
+    def get_valley_locations(self, biome: str, rng: np.random.Generator) -> list[MapSlice]:
         valleys = []
-        for biome in self.lake_biomes:
-            start_x = self.biome_order[biome] * BIOME_WIDTH
-            end_x = start_x + BIOME_WIDTH
-            start_y = self.surface_lvls[start_x]
-            for x in range(start_x + 1, end_x):
-                y = self.surface_lvls[x]
-                if x - start_x > self.max_width:
-                    start_x, start_y = x, y # skip the valley, too wide
-                    continue
-                if y < start_y: 
-                    if x - start_x >= self.min_width and randint(0, 100) < BIOMES[biome]['lake prob']:
-                        prev_val = None if not valleys else valleys[-1]
-                        if prev_val is None or start_x - prev_val.end_x >= prev_val.end_x - prev_val.start_x: # small lakes can be close together but larger lakes get spaced out
-                            valleys.append(MapSlice(start_x, start_y, x, y))
-                    start_x, start_y = x, y
-                    continue
+        start_x = self.biome_order[biome] * BIOME_WIDTH
+        end_x = start_x + BIOME_WIDTH
+        start_y = self.surface_lvls[start_x]
+        for x in range(start_x + 1, end_x):
+            y = self.surface_lvls[x]
+            if x - start_x > self.max_width:
+                start_x, start_y = x, y # skip the valley, too wide
+                continue
+            if y < start_y: 
+                if x - start_x >= self.min_width and rng.integers(0, 101) < BIOMES[biome]['lake prob']:
+                    prev_val = None if not valleys else valleys[-1]
+                    if prev_val is None or start_x - prev_val.end_x >= prev_val.end_x - prev_val.start_x: # small lakes can be close together but larger lakes get spaced out
+                        valleys.append(MapSlice(start_x, start_y, x, y))
+                start_x, start_y = x, y
+                continue
         return valleys
             
 
@@ -328,6 +396,7 @@ class TreeGen:
     def __init__(self, terrain: TerrainGen, proc_gen: ProcGen):
         self.tile_map, self.height_map = terrain.tile_map, terrain.height_map
         self.valid_spawn_point = terrain.valid_spawn_point
+        self.get_rng: callable = terrain.get_rng
         self.names_to_ids = proc_gen.names_to_ids
         self.biome_order = proc_gen.biome_order
 
@@ -337,9 +406,10 @@ class TreeGen:
     def get_tree_locations(self) -> None:
         for name, idx in ((k, i) for k, i in self.biome_order.items() if 'tree probs' in BIOMES[k].keys()):
             start_x = idx * BIOME_WIDTH
+            rolls = self.get_rng('trees', name).integers(0, 101, BIOME_WIDTH) # one per column whether or not it's used, so the draws don't depend on the terrain
             for x in range(start_x, start_x + BIOME_WIDTH):
                 y = int(self.height_map[x]) # surface level
-                if self.valid_spawn_point(x, y) and not self.get_tree_neighbors(x, y, 2, True, True) and randint(0, 100) <= self.get_tree_prob(name, x, y):
+                if self.valid_spawn_point(x, y) and not self.get_tree_neighbors(x, y, 2, True, True) and rolls[x - start_x] <= self.get_tree_prob(name, x, y):
                     self.map.add((x, y))
                     self.tile_map[x, y] = self.names_to_ids['tree base']
     
@@ -354,4 +424,42 @@ class TreeGen:
             num_neighbors += sum(1 for dx in range(1, sample_size + 1) if (x - dx, y) in self.map)
         if check_right:
             num_neighbors += sum(1 for dx in range(1, sample_size + 1) if (x + dx, y) in self.map)
-        return num_neighbors
\ No newline at end of file
+        return num_neighbors
+
+
+class SharedArray:
+    '''a copy of an array in shared memory, processes attach to it by the spec'''
+    def __init__(self, arr: np.ndarray):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self.array = np.ndarray(arr.shape, dtype=arr.dtype, buffer=self.shm.buf)
+        self.array[:] = arr
+        self.spec = (self.shm.name, arr.shape, arr.dtype.str)
+
+    @staticmethod
+    def attach(spec: tuple[str, tuple[int, ...], str]) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+        name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def release(self) -> None:
+        del self.array # the buffer can't be closed while an array still points into it
+        self.shm.close()
+        self.shm.unlink()
+
+
+gen_worker: dict[str, any] = {} # the terrain generator of a pool process & the shared memory it's attached to
+
+def init_gen_worker(terrain: TerrainGen, specs: dict[str, tuple]) -> None:
+    handles = {}
+    handles['tile map'], terrain.tile_map = SharedArray.attach(specs['tile map'])
+    terrain.cave_gen = CaveGen(terrain)
+    handles['cave map'], terrain.cave_gen.maps[terrain.current_biome] = SharedArray.attach(specs['cave map'])
+    terrain.lake_gen = LakeGen(terrain)
+    gen_worker.update(terrain=terrain, handles=handles)
+
+def gen_cave_columns(column_range: tuple[int, int]) -> None:
+    terrain = gen_worker['terrain']
+    terrain.cave_gen.gen_columns(terrain.current_biome, *column_range)
+
+def gen_band(biome: str) -> None:
+    gen_worker['terrain'].gen_band(biome)
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
     from ui import UI
+    from liquid_flow import LiquidFlow
 
 import pygame as pg
 
@@ -12,6 +13,8 @@ from alarm import Alarm
 from pump_ui import PumpUI
 
 class Pump(Machine):
+    save_columns = {**Machine.save_columns, 'direction': 'str', 'liquid': 'str'}
+
     def __init__(
         self, 
         save_data: dict[str, any],
@@ -30,6 +33,7 @@ class Pump(Machine):
             'lava': InvSlot(item='lava'),
             'honey': InvSlot(item='honey')
         }
+        self.load_inv(save_data)
         # ui needs the inv attribute
         self.init_ui(PumpUI)
         if save_data:
@@ -41,26 +45,26 @@ class Pump(Machine):
             self.direction = direction
             self.liquid = self.get_liquid_type()
     
-        self.extract_speed = {'water': 1200, 'lava': 2400}
+        self.extract_speed = {'water': 1200, 'lava': 2400, 'honey': 3000}
         self.fuel_burn_speed = {'wood': 1000, 'coal': 3000}
         self.alarms = {
             'extract liquid': Alarm(None, self.extract_liquid, False, False, True),
             'burn fuel': Alarm(self.ui.update_inv_slot, None, False, False, True, burn_fuel=True)
         }
         self.connected_pipe = None
+        self.liquid_flow: LiquidFlow = game_obj.physics_engine.liquid_flow
+        self.drained_volume = 0.0 # 1 unit of liquid is extracted per full tile of volume drained
 
-    def get_liquid_type(self) -> str | None:
-        x, y = self.tile_xy
+    def get_liquid_tile(self) -> tuple[int, int]:
         if isinstance(self, InletPump):
-            liquid_border_tile = pg.Vector2(self.rect.bottomleft if self.direction == 'left' else self.rect.bottomright) // TILE_SIZE
-            x, y = liquid_border_tile
-            liquid_tile_id = self.tile_map[int(x) + (1 if self.direction == 'right' else -1), int(y) + 1]
+            x, y = pg.Vector2(self.rect.bottomleft if self.direction == 'left' else self.rect.bottomright) // TILE_SIZE
+            return int(x) + (1 if self.direction == 'right' else -1), int(y) + 1
         else: # bc the outlet pumps are extracting a liquid, the direction variables work opposite of the inlet pump
-            liquid_border_tile = pg.Vector2(self.rect.bottomright if self.direction == 'left' else self.rect.bottomleft) // TILE_SIZE
-            x, y = liquid_border_tile
-            liquid_tile_id = self.tile_map[int(x) + (1 if self.direction == 'left' else -1), int(y) + 1]
+            x, y = pg.Vector2(self.rect.bottomright if self.direction == 'left' else self.rect.bottomleft) // TILE_SIZE
+            return int(x) + (1 if self.direction == 'left' else -1), int(y) + 1
 
-        name = self.game_obj.proc_gen.ids_to_names[liquid_tile_id]
+    def get_liquid_type(self) -> str | None:
+        name = self.game_obj.proc_gen.ids_to_names[self.tile_map[self.get_liquid_tile()]]
         if name in LIQUIDS:
             self.ui.liquid_icon = self.graphics['icons'][name].copy()
             icon = self.graphics['icons'][name].copy()
@@ -76,6 +80,11 @@ class Pump(Machine):
             return None
 
     def extract_liquid(self) -> None:
+        self.drained_volume += self.liquid_flow.drain(self.get_liquid_tile(), 1 - self.drained_volume)
+        if self.drained_volume < 1: # the source ran dry, wait for the liquid around it to flow back in
+            self.liquid = self.get_liquid_type()
+            return
+        self.drained_volume = 0.0
         if self.connected_pipe and not self.connected_pipe.item_holding:
             self.connected_pipe.item_holding = self.liquid
         else:
@@ -105,7 +114,7 @@ class Pump(Machine):
 
     def get_save_data(self) -> dict[str, any]:
         return {
-            'active': self.active, 
+            **super().get_save_data(), 
             'direction': self.direction, 
             'liquid': self.liquid
         }
@@ -0,0 +1,431 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from main import Main
+
+import numpy as np
+import json
+import struct
+import os
+import threading
+from dataclasses import dataclass
+from hashlib import blake2b
+from time import perf_counter
+
+from settings import SAVE_CHUNK_SIZE, SAVE_COMPACT_RATIO, AUTOSAVE_INTERVAL
+
+@dataclass(slots=True)
+class SaveSnapshot:
+    '''the save data split into what SaveFile writes, nothing in it is shared with the running game once the records are encoded'''
+    arrays: dict[str, np.ndarray] # keyed by their path in the save data
+    records: dict[str, bytes] # encoded sprite records, keyed by class
+    tree: dict[str, any] # everything else, with placeholders for the arrays & records
+
+
+class SaveFile:
+    '''
+    binary save container, numpy arrays anywhere in the save data are written as raw little-endian blocks & memory-mapped (or read) on load,
+    each sprite class's records are a block of their own (json + the raw bytes of any arrays in them) & everything else (ui, weather etc.) is kept in a small json index at the end of the file
+
+    layout: header (magic, version, index offset) | aligned blocks | json index
+    delta saves append patches for the edited chunks of an array, changed record blocks & a new index, then point the header at it,
+    so an interrupted save leaves the previous index in charge
+    '''
+    magic = b'MSAV'
+    version = 3
+    readable_versions = {1, 2, 3} # 1 kept the sprites in the index, 2 stored records as plain json. both are rewritten as the current version on the next save
+    header = struct.Struct('<4sIQ')
+    alignment = 64 # bytes, array blocks start on a multiple of this
+    record_section = 'sprites' # each entry is stored as its own block so unchanged ones can be reused
+    record_header = struct.Struct('<I') # length of a record's json, its arrays follow
+
+    @classmethod
+    def snapshot(cls, data: dict[str, any], copy: set[str] | None=None) -> SaveSnapshot:
+        '''
+        the arrays named in copy are copied & the sprite records are encoded right away, 
+        so the snapshot can be written while the game keeps editing the world
+        '''
+        arrays, records = {}, {}
+        tree = cls.extract_arrays(cls.extract_records(data, records), arrays, []) # records first, they keep their own arrays
+        for name in copy or ():
+            if name in arrays:
+                arrays[name] = arrays[name].copy()
+        return SaveSnapshot(arrays, records, tree)
+
+    @classmethod
+    def write(cls, path: str, data: dict[str, any] | SaveSnapshot) -> dict[str, int | bool]:
+        '''write the whole save to a temporary file & swap it in, returns how many bytes were written'''
+        snapshot = data if isinstance(data, SaveSnapshot) else cls.snapshot(data)
+        arrays, records, tree = snapshot.arrays, snapshot.records, snapshot.tree
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.header.pack(cls.magic, cls.version, 0)) # the index offset is filled in once the blocks are written
+            index = {
+                'arrays': {name: cls.write_block(f, arr) for name, arr in arrays.items()},
+                'records': {key: cls.write_record(f, payload) for key, payload in records.items()},
+                'data': tree
+            }
+            index_offset = cls.write_index(f, index)
+            num_bytes = f.tell()
+            f.seek(0)
+            f.write(cls.header.pack(cls.magic, cls.version, index_offset))
+        os.replace(tmp_path, path)
+        return {'bytes written': num_bytes, 'compacted': True}
+
+    @classmethod
+    def write_delta(
+        cls, 
+        path: str, 
+        data: dict[str, any] | SaveSnapshot, 
+        dirty_chunks: dict[str, set[tuple[int, int]]]
+    ) -> dict[str, int | bool]:
+        '''
+        update a save written from the same world with only what changed since then,
+        arrays listed in dirty_chunks only have those chunks (SAVE_CHUNK_SIZE tiles square) written,
+        arrays missing from it are assumed unchanged (the height & cave maps never change after generation).
+        the whole file is rewritten instead once most of it would be superseded blocks
+        '''
+        snapshot = data if isinstance(data, SaveSnapshot) else cls.snapshot(data)
+        arrays, records, tree = snapshot.arrays, snapshot.records, snapshot.tree
+        index = cls.read_index(path)
+        if index['version'] != cls.version: # an older layout can't be patched
+            return cls.write(path, snapshot)
+        file_size = os.path.getsize(path)
+
+        new_arrays, new_records = {}, {}
+        num_new_bytes = 0
+        for name, arr in arrays.items():
+            block = index['arrays'].get(name)
+            if block is None or block['shape'] != list(arr.shape) or block['dtype'] != arr.dtype.newbyteorder('<').str:
+                new_arrays[name] = arr
+                num_new_bytes += arr.nbytes
+            elif dirty_chunks.get(name):
+                num_new_bytes += sum(int(np.prod(cls.get_patch_shape(arr.shape, *chunk))) for chunk in dirty_chunks[name]) * arr.itemsize
+        for key, payload in records.items():
+            if key not in index['records'] or index['records'][key]['hash'] != cls.hash_record(payload):
+                new_records[key] = payload
+                num_new_bytes += len(payload)
+
+        superseded = file_size - cls.get_live_bytes(index)
+        if superseded + num_new_bytes > SAVE_COMPACT_RATIO * (file_size + num_new_bytes):
+            return cls.write(path, snapshot)
+
+        with open(path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            start = f.tell()
+            arrays_index = {}
+            for name, arr in arrays.items():
+                if name in new_arrays:
+                    arrays_index[name] = cls.write_block(f, arr)
+                    continue
+                block = arrays_index[name] = index['arrays'][name]
+                for chunk_x, chunk_y in dirty_chunks.get(name, ()):
+                    x, y = chunk_x * SAVE_CHUNK_SIZE, chunk_y * SAVE_CHUNK_SIZE
+                    block.setdefault('patches', {})[f'{chunk_x},{chunk_y}'] = cls.write_block(f, arr[x:x + SAVE_CHUNK_SIZE, y:y + SAVE_CHUNK_SIZE])['offset']
+            index = {
+                'arrays': arrays_index,
+                'records': {
+                    key: cls.write_record(f, payload) if key in new_records else index['records'][key] for key, payload in records.items()
+                },
+                'data': tree
+            }
+            index_offset = cls.write_index(f, index)
+            num_bytes = f.tell() - start
+            f.flush()
+            os.fsync(f.fileno()) # the blocks have to be on disk before the header points at them
+            f.seek(0)
+            f.write(cls.header.pack(cls.magic, cls.version, index_offset))
+        return {'bytes written': num_bytes + cls.header.size, 'compacted': False}
+
+    @classmethod
+    def write_block(cls, f: object, arr: np.ndarray) -> dict[str, any]:
+        f.write(b'\0' * (-f.tell() % cls.alignment))
+        arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+        block = {'offset': f.tell(), 'dtype': arr.dtype.str, 'shape': list(arr.shape)}
+        f.write(arr.tobytes())
+        return block
+
+    @classmethod
+    def write_record(cls, f: object, payload: bytes) -> dict[str, any]:
+        record = {'offset': f.tell(), 'size': len(payload), 'hash': cls.hash_record(payload)}
+        f.write(payload)
+        return record
+
+    @staticmethod
+    def write_index(f: object, index: dict[str, any]) -> int:
+        '''returns the offset the header needs to point at'''
+        index_offset = f.tell()
+        f.write(json.dumps(index).encode('utf-8'))
+        return index_offset
+
+    @staticmethod
+    def hash_record(payload: bytes) -> str:
+        return blake2b(payload, digest_size=16).hexdigest()
+
+    @classmethod
+    def get_live_bytes(cls, index: dict[str, any]) -> int:
+        '''bytes of the file still referenced by the index, everything else was superseded by later delta saves'''
+        num_bytes = cls.header.size + index['index size']
+        for block in index['arrays'].values():
+            num_elements = int(np.prod(block['shape'])) + sum(
+                int(np.prod(cls.get_patch_shape(block['shape'], *map(int, chunk.split(','))))) for chunk in block.get('patches', ())
+            )
+            num_bytes += num_elements * np.dtype(block['dtype']).itemsize
+        return num_bytes + sum(record['size'] for record in index['records'].values())
+
+    @classmethod
+    def extract_arrays(cls, value: any, arrays: dict[str, np.ndarray], path: list[str]) -> any:
+        '''moves every array out of the data into arrays (keyed by its path) & leaves a reference to it in its place'''
+        if isinstance(value, np.ndarray):
+            name = '/'.join(path)
+            arrays[name] = value
+            return {'__array__': name}
+        if isinstance(value, dict):
+            return {k: cls.extract_arrays(v, arrays, [*path, str(k)]) for k, v in value.items()}
+        return value
+
+    @classmethod
+    def extract_records(cls, tree: dict[str, any], records: dict[str, bytes]) -> dict[str, any]:
+        for key, value in tree.get(cls.record_section, {}).items():
+            records[key] = cls.encode_record(value)
+        return {**tree, cls.record_section: {'__records__': True}}
+
+    @classmethod
+    def encode_record(cls, value: any) -> bytes:
+        arrays = {}
+        tree = cls.extract_arrays(value, arrays, [])
+        blocks, offset = {}, 0
+        for name, arr in arrays.items():
+            arrays[name] = arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+            blocks[name] = {'offset': offset, 'dtype': arr.dtype.str, 'shape': list(arr.shape)}
+            offset += arr.nbytes
+        encoded = json.dumps({'data': tree, 'arrays': blocks}).encode('utf-8')
+        return b''.join([cls.record_header.pack(len(encoded)), encoded, *(arr.tobytes() for arr in arrays.values())])
+
+    @classmethod
+    def decode_record(cls, payload: bytes, version: int) -> any:
+        if version < 3:
+            return json.loads(payload.decode('utf-8'))
+        (size,) = cls.record_header.unpack_from(payload)
+        start = cls.record_header.size + size
+        record = json.loads(payload[cls.record_header.size:start].decode('utf-8'))
+        arrays = {
+            name: np.frombuffer(payload, dtype=block['dtype'], count=int(np.prod(block['shape'])), offset=start + block['offset']).reshape(block['shape'])
+            for name, block in record['arrays'].items()
+        }
+        return cls.insert_arrays(record['data'], arrays)
+
+    @classmethod
+    def read_index(cls, path: str) -> dict[str, any]:
+        with open(path, 'rb') as f:
+            magic, version, index_offset = cls.header.unpack(f.read(cls.header.size))
+            if magic != cls.magic or version not in cls.readable_versions:
+                raise ValueError(f'{path} is not a save file this version can read')
+            f.seek(index_offset)
+            encoded = f.read()
+        index = json.loads(encoded.decode('utf-8'))
+        index['index size'] = len(encoded)
+        index['version'] = version
+        return index
+
+    @classmethod
+    def read(cls, path: str, writable: bool=True, in_memory: bool=False) -> dict[str, any]:
+        '''
+        arrays are memory-mapped rather than read, so only the pages that are used get loaded,
+        writable maps are copy-on-write so neither the patches applied on top nor later edits reach the file.
+        in_memory reads them instead, for a file that gets replaced while they're in use (windows won't replace a mapped file & elsewhere the maps would be left on the old one)
+        '''
+        index = cls.read_index(path)
+        with open(path, 'rb') as f:
+            if in_memory:
+                arrays = {name: cls.read_block(f, block) for name, block in index['arrays'].items()}
+            else:
+                arrays = {name: cls.map_block(path, block, writable) for name, block in index['arrays'].items()}
+            records = {}
+            for key, record in index.get('records', {}).items():
+                f.seek(record['offset'])
+                records[key] = cls.decode_record(f.read(record['size']), index['version'])
+        data = cls.insert_arrays(index['data'], arrays)
+        if 'records' in index: # version 1 saves have the sprites in the index data
+            data[cls.record_section] = records
+        return data
+
+    @classmethod
+    def map_block(cls, path: str, block: dict[str, any], writable: bool) -> np.ndarray:
+        shape = tuple(block['shape'])
+        if not np.prod(shape): # can't map 0 bytes
+            return np.zeros(shape, dtype=block['dtype'])
+        patches = block.get('patches', {})
+        arr = np.memmap(path, dtype=block['dtype'], mode='c' if writable or patches else 'r', offset=block['offset'], shape=shape)
+        for chunk, offset in patches.items():
+            region = cls.get_patch_region(arr, chunk)
+            region[:] = np.memmap(path, dtype=block['dtype'], mode='r', offset=offset, shape=region.shape)
+        return arr
+
+    @classmethod
+    def read_block(cls, f: object, block: dict[str, any]) -> np.ndarray:
+        f.seek(block['offset'])
+        arr = np.fromfile(f, dtype=block['dtype'], count=int(np.prod(block['shape']))).reshape(block['shape'])
+        for chunk, offset in block.get('patches', {}).items():
+            region = cls.get_patch_region(arr, chunk)
+            f.seek(offset)
+            region[:] = np.fromfile(f, dtype=block['dtype'], count=region.size).reshape(region.shape)
+        return arr
+
+    @staticmethod
+    def get_patch_region(arr: np.ndarray, chunk: str) -> np.ndarray:
+        '''the part of the array a delta patch covers'''
+        chunk_x, chunk_y = map(int, chunk.split(','))
+        x, y = chunk_x * SAVE_CHUNK_SIZE, chunk_y * SAVE_CHUNK_SIZE
+        return arr[x:x + SAVE_CHUNK_SIZE, y:y + SAVE_CHUNK_SIZE]
+
+    @staticmethod
+    def get_patch_shape(shape: tuple[int, ...] | list[int], chunk_x: int, chunk_y: int) -> tuple[int, ...]:
+        '''SAVE_CHUNK_SIZE square, cut short along the far edges of an array that isn't a multiple of it'''
+        x, y = chunk_x * SAVE_CHUNK_SIZE, chunk_y * SAVE_CHUNK_SIZE
+        return (min(SAVE_CHUNK_SIZE, shape[0] - x), min(SAVE_CHUNK_SIZE, shape[1] - y), *shape[2:])
+
+    @classmethod
+    def insert_arrays(cls, value: any, arrays: dict[str, np.ndarray]) -> any:
+        if isinstance(value, dict):
+            if '__array__' in value:
+                return arrays[value['__array__']]
+            return {k: cls.insert_arrays(v, arrays) for k, v in value.items()}
+        return value
+
+
+class SaveTracker:
+    '''records which chunks of the saved world arrays were edited since the last save, so the next save only writes those'''
+    def __init__(self, game_obj: Main):
+        self.dirty_chunks: dict[str, set[tuple[int, int]]] = {'tile map': set(), 'ui/visited tiles': set()} # keyed by the arrays' path in the save data
+        self.save_path: str | None = 'save.bin' if game_obj.save_data is not None and os.path.exists('save.bin') else None # the file matching the world in memory
+        self.saved_state: tuple[dict[str, str], dict[str, any]] | None = None # the records & other data last written to save_path
+        game_obj.proc_gen.tile_listeners.append(self.update_tiles)
+
+    def update_tiles(self, tiles: list[tuple[int, int]]) -> None:
+        self.dirty_chunks['tile map'].update((x // SAVE_CHUNK_SIZE, y // SAVE_CHUNK_SIZE) for x, y in tiles)
+
+    def update_region(self, name: str, left: int, top: int, right: int, bottom: int) -> None:
+        '''right/bottom are exclusive'''
+        self.dirty_chunks[name].update(
+            (x, y)
+            for x in range(left // SAVE_CHUNK_SIZE, (right - 1) // SAVE_CHUNK_SIZE + 1)
+            for y in range(top // SAVE_CHUNK_SIZE, (bottom - 1) // SAVE_CHUNK_SIZE + 1)
+        )
+
+    def save(self, path: str, data: dict[str, any] | SaveSnapshot) -> dict[str, int | bool]:
+        dirty_chunks = self.take_dirty_chunks()
+        try:
+            return self.write(path, data, dirty_chunks)
+        except Exception:
+            self.restore_dirty_chunks(dirty_chunks)
+            raise
+
+    def write(self, path: str, data: dict[str, any] | SaveSnapshot, dirty_chunks: dict[str, set[tuple[int, int]]]) -> dict[str, int | bool]:
+        '''dirty_chunks are the chunks edited since save_path was last written, as taken by take_dirty_chunks'''
+        snapshot = data if isinstance(data, SaveSnapshot) else SaveFile.snapshot(data)
+        if path == self.save_path:
+            stats = SaveFile.write_delta(path, snapshot, dirty_chunks)
+        else:
+            stats = SaveFile.write(path, snapshot)
+        self.save_path = path
+        self.saved_state = self.get_state(snapshot)
+        return stats
+
+    def is_saved(self, path: str, snapshot: SaveSnapshot) -> bool:
+        '''whether path already holds everything in the snapshot, the arrays without dirty chunks never change after generation'''
+        return path == self.save_path and not any(self.dirty_chunks.values()) and self.get_state(snapshot) == self.saved_state
+
+    @staticmethod
+    def get_state(snapshot: SaveSnapshot) -> tuple[dict[str, str], dict[str, any]]:
+        '''what a save holds besides the array chunks'''
+        return {key: SaveFile.hash_record(payload) for key, payload in snapshot.records.items()}, snapshot.tree
+
+    def take_dirty_chunks(self) -> dict[str, set[tuple[int, int]]]:
+        '''hands over the chunks edited so far & starts recording the next save's'''
+        dirty_chunks = self.dirty_chunks
+        self.dirty_chunks = {name: set() for name in dirty_chunks}
+        return dirty_chunks
+
+    def restore_dirty_chunks(self, dirty_chunks: dict[str, set[tuple[int, int]]]) -> None:
+        '''a failed save still has to write these next time'''
+        for name, chunks in dirty_chunks.items():
+            self.dirty_chunks[name].update(chunks)
+
+
+class Autosave:
+    '''
+    saves the world every AUTOSAVE_INTERVAL seconds without stalling the game, 
+    a snapshot is taken between simulation steps (copying only the arrays that can still be edited) & written on a worker thread,
+    full saves are swapped in with an atomic rename & delta saves only point the header at their blocks once they're on disk
+    '''
+    def __init__(self, game_obj: Main, path: str='save.bin', interval: float=AUTOSAVE_INTERVAL):
+        self.get_save_data: callable = game_obj.get_world_save_data
+        self.save_tracker: SaveTracker = game_obj.save_tracker
+        self.path = path
+        self.interval = interval
+
+        self.timer = 0.0
+        self.thread: threading.Thread | None = None
+        self.dirty_chunks: dict[str, set[tuple[int, int]]] = {} # taken for the save in progress
+        self.result: dict[str, int | bool] | Exception | None = None # set by the worker thread, anything but the stats is a failed save
+        self.stats: dict[str, any] = {} # of the last save that finished
+
+    def update(self, dt: float) -> None:
+        '''called between simulation steps so the snapshot never sees a half-finished tick'''
+        self.timer += dt
+        if self.thread is not None:
+            if self.thread.is_alive():
+                return
+            self.finish()
+        if self.timer >= self.interval:
+            self.start()
+
+    def start(self, snapshot: SaveSnapshot | None=None) -> None:
+        start = perf_counter()
+        if snapshot is None:
+            snapshot = SaveFile.snapshot(self.get_save_data(), copy=set(self.save_tracker.dirty_chunks))
+        self.dirty_chunks = self.save_tracker.take_dirty_chunks()
+        self.stats['snapshot ms'] = (perf_counter() - start) * 1000
+        self.timer = 0.0
+        self.result = None
+        self.thread = threading.Thread(target=self.write, args=(snapshot,), daemon=True)
+        self.thread.start()
+
+    def write(self, snapshot: SaveSnapshot) -> None:
+        start = perf_counter()
+        try:
+            self.result = self.save_tracker.write(self.path, snapshot, self.dirty_chunks)
+        except Exception as e: # reported in the status rather than ending the worker thread silently
+            self.result = e
+        self.stats['write ms'] = (perf_counter() - start) * 1000
+
+    def finish(self) -> None:
+        self.thread.join()
+        self.thread = None
+        if isinstance(self.result, dict):
+            self.stats.update(self.result)
+            self.stats.pop('error', None)
+        else:
+            self.save_tracker.restore_dirty_chunks(self.dirty_chunks)
+            self.stats['error'] = str(self.result) or type(self.result).__name__
+        self.dirty_chunks = {}
+
+    def stop(self) -> None:
+        '''waits for the save in progress & saves once more with the final state of the world, unless nothing changed since'''
+        if self.thread is not None:
+            self.finish()
+        snapshot = SaveFile.snapshot(self.get_save_data()) # nothing edits the world while the last save is written, so nothing is copied
+        if not self.save_tracker.is_saved(self.path, snapshot):
+            self.start(snapshot)
+            self.finish()
+
+    def get_status(self) -> str:
+        status = f'autosave every {self.interval:.0f}s'
+        if self.thread is not None:
+            return f'{status} | saving...'
+        if 'error' in self.stats:
+            return f'{status} | last save failed: {self.stats["error"]}'
+        if 'write ms' in self.stats:
+            return f'{status} | last save {self.stats["write ms"]:.0f}ms ({self.stats["snapshot ms"]:.1f}ms paused), {self.stats["bytes written"] // 1024}KB'
+        return status
@@ -1,9 +1,15 @@
 RES = (1280, 720)
 FPS = 60
+SIM_RATE = 60 # fixed simulation ticks per second, independent of the frame rate
+MAX_SIM_STEPS = 5 # ticks run per frame at most, time beyond that is dropped so a slow frame can't snowball
 TILE_SIZE = 16
 MAP_SIZE = (3000, 200)
 MAX_PX_X = MAP_SIZE[0] * TILE_SIZE
 MAX_PX_Y = MAP_SIZE[1] * TILE_SIZE
+CHUNK_CACHE_MAX_MB = 64 # memory budget for baked chunk surfaces, the least recently rendered chunks are evicted past it
+ROTATION_ANGLE_STEP = 3 # degrees, rotations are snapped to multiples of this so the transform cache can reuse them
+TRANSFORM_CACHE_MAX_ENTRIES = 512
+SPRITE_CELL_SIZE = TILE_SIZE * 8 # side length (px) of the grid cells sprites are bucketed into for proximity queries
 
 BIOMES = { 
     'highlands': {
@@ -60,6 +66,8 @@ BIOMES = {
 }
 
 BIOME_WIDTH = MAP_SIZE[0] // (len(BIOMES) - 1) # -1 since the underworld spans the entire map
+WORLD_SEED = 3638 # TODO: add the option to enter a custom seed
+WORLD_GEN_WORKERS = 1 # processes generating the biome bands, the world is identical for any number
 TREE_BIOMES = {'forest', 'taiga'}
 
 TILES = {
@@ -88,6 +96,18 @@ TILE_REACH_RADIUS = 5
 TILE_ORE_RATIO = 50 # amount of ore 1 tile is worth
 
 LIQUIDS = {'water', 'lava', 'honey'}
+LIQUID_FLOW_RATES = {'water': 1.0, 'lava': 0.3, 'honey': 0.15} # how readily each liquid spreads sideways, relative to water
+LIQUID_MIN_LEVEL = 0.01 # shallower cells evaporate so a thin film can't keep spreading forever
+LIQUID_TILE_LEVEL = 0.1 # an empty tile only becomes a liquid tile (for the tile listeners) once filled this much, so a thin film flowing in & out doesn't flicker it
+LIQUID_CHUNK_SIZE = 32 # side length (tiles) of the regions the liquid simulation wakes & sleeps
+LIQUID_SETTLE_DIFF = 0.1 # neighboring cells closer in level than this don't flow sideways, so a surface settles with a slight slope instead of creeping towards flat
+LIQUID_SETTLE_VOLUME = 1.0 # tiles worth of liquid, a chunk gaining or losing less than this is only sloshing/trickling, not filling or draining
+LIQUID_SETTLE_TICKS = 300 # a chunk sleeps after this many ticks without a net change of LIQUID_SETTLE_VOLUME, even if its surface is still creeping
+LOOSE_TILES = {'sand'} # fall when the tile below them is cleared
+LOOSE_TILES_MAX_MOVES = 512 # loose tiles moved per tick at most, the rest wait for the next tick
+SAVE_CHUNK_SIZE = 64 # side length (tiles) of the blocks a delta save rewrites for each edited region of the world arrays
+SAVE_COMPACT_RATIO = 0.5 # the save file is rewritten from scratch once more than this share of it is superseded blocks
+AUTOSAVE_INTERVAL = 120 # seconds between autosaves
 
 GRAVITY = 1200
 
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from sprite_groups import FlagGroup
+
+import pygame as pg
+from collections import defaultdict
+from bisect import insort
+
+class SpatialGroup(pg.sprite.Group):
+    '''
+    sprite group that also buckets its sprites by the grid cell containing their center & by their z layer,
+    so proximity queries only visit the cells around a point and return sprites already in render order
+    '''
+    def __init__(self, cell_size: int, *sprites: pg.sprite.Sprite):
+        self.cell_size = cell_size
+        self.cells: defaultdict[tuple[int, int], dict[int, dict[pg.sprite.Sprite, None]]] = defaultdict(dict) # cell -> z -> sprites (dicts keep insertion order)
+        self.sprite_keys: dict[pg.sprite.Sprite, tuple[tuple[int, int], int]] = {} # sprite -> (cell, z) it's currently filed under
+        # sprites are added to their groups before their image/rect are assigned, so they're filed on the next query instead
+        self.unplaced: dict[pg.sprite.Sprite, None] = {}
+        self.z_layers: list[int] = [] # sorted
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite: pg.sprite.Sprite, layer: None=None) -> None:
+        super().add_internal(sprite)
+        self.unplaced[sprite] = None
+
+    def remove_internal(self, sprite: pg.sprite.Sprite) -> None:
+        super().remove_internal(sprite)
+        self.unplaced.pop(sprite, None)
+        if (key := self.sprite_keys.pop(sprite, None)) is not None:
+            self.remove_from_bucket(sprite, *key)
+
+    def get_cell(self, xy: tuple[int, int]) -> tuple[int, int]:
+        return (int(xy[0] // self.cell_size), int(xy[1] // self.cell_size))
+
+    def place(self, sprite: pg.sprite.Sprite) -> None:
+        cell, z = self.get_cell(sprite.rect.center), sprite.z
+        self.sprite_keys[sprite] = (cell, z)
+        bucket = self.cells[cell]
+        if z not in bucket:
+            bucket[z] = {}
+            if z not in self.z_layers:
+                insort(self.z_layers, z)
+        bucket[z][sprite] = None
+
+    def place_unplaced(self) -> None:
+        if self.unplaced:
+            for sprite in self.unplaced:
+                self.place(sprite)
+            self.unplaced.clear()
+
+    def remove_from_bucket(self, sprite: pg.sprite.Sprite, cell: tuple[int, int], z: int) -> None:
+        bucket = self.cells[cell]
+        del bucket[z][sprite]
+        if not bucket[z]:
+            del bucket[z]
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, sprite: pg.sprite.Sprite) -> None:
+        '''refile a sprite after its rect (or z) changes, a no-op while it stays within its cell'''
+        if (key := self.sprite_keys.get(sprite)) is not None and key != (self.get_cell(sprite.rect.center), sprite.z):
+            self.remove_from_bucket(sprite, *key)
+            self.place(sprite)
+
+    def get_sprites_in_radius(self, xy: tuple[int, int], x_dist: int, y_dist: int) -> list[pg.sprite.Sprite]:
+        '''sprites whose center is within x_dist/y_dist of xy, ordered by z'''
+        self.place_unplaced()
+        min_x, min_y = self.get_cell((xy[0] - x_dist, xy[1] - y_dist))
+        max_x, max_y = self.get_cell((xy[0] + x_dist, xy[1] + y_dist))
+        buckets = [
+            self.cells[cell] for cell in ((x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)) if cell in self.cells
+        ]
+        sprites = []
+        for z in self.z_layers:
+            for bucket in buckets:
+                if z in bucket:
+                    sprites.extend(spr for spr in bucket[z] if abs(spr.rect.centerx - xy[0]) < x_dist and abs(spr.rect.centery - xy[1]) < y_dist)
+        return sprites
+
+
+class Broadphase:
+    '''
+    pairs up overlapping sprites between registered groups once per tick & hands each pair to the group pair's callback,
+    candidates come from the sprite index cells around each sprite of the 1st group, so the cost follows how many sprites are nearby
+    '''
+    def __init__(self, sprite_index: SpatialGroup):
+        self.sprite_index = sprite_index
+        self.interactions: list[tuple[pg.sprite.Group, FlagGroup, callable]] = []
+        self.num_tests = self.num_pairs = 0 # during the last step
+
+    def register(self, group_a: pg.sprite.Group, group_b: FlagGroup, callback: callable) -> None:
+        '''
+        callback(sprite_a, sprite_b) is called for every sprite of group_a overlapping a sprite of group_b,
+        group_a should be the smaller group. the search around each sprite is bounded by the largest sprite that has joined group_b
+        '''
+        self.interactions.append((group_a, group_b, callback))
+
+    def get_pairs(self, group_a: pg.sprite.Group, group_b: FlagGroup) -> list[tuple[pg.sprite.Sprite, pg.sprite.Sprite]]:
+        if not group_a or not group_b:
+            return []
+        pairs, max_size = [], group_b.get_max_size()
+        for spr_a in group_a:
+            # the index files sprites by their center, so the search reaches as far as a center of the largest overlapping sprite could be
+            x_dist, y_dist = (spr_a.rect.width + max_size[0]) // 2 + 1, (spr_a.rect.height + max_size[1]) // 2 + 1
+            for spr_b in self.sprite_index.get_sprites_in_radius(spr_a.rect.center, x_dist, y_dist):
+                if spr_b in group_b and spr_b is not spr_a:
+                    self.num_tests += 1
+                    if spr_a.rect.colliderect(spr_b.rect):
+                        pairs.append((spr_a, spr_b))
+        return pairs
+
+    def step(self) -> None:
+        self.num_tests = self.num_pairs = 0
+        for group_a, group_b, callback in self.interactions:
+            pairs = self.get_pairs(group_a, group_b) # collected before any callbacks run since they may kill sprites
+            self.num_pairs += len(pairs)
+            for spr_a, spr_b in pairs:
+                callback(spr_a, spr_b)
+
+    def get_stats(self) -> dict[str, int]:
+        return {'tests': self.num_tests, 'pairs': self.num_pairs}
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from main import Main
+    from asset_manager import AnimationAtlas
 
 import pygame as pg
 from abc import ABC
@@ -28,7 +29,7 @@ class AnimatedSprite(pg.sprite.Sprite, ABC):
         self, 
         game_obj: Main,
         xy: tuple[int, int],
-        frames: dict[str, pg.Surface],
+        frames: AnimationAtlas,
         sprite_groups: list[pg.sprite.Group],
         move_speed: int,
         animation_speed: int | dict[str, int],
@@ -47,7 +48,7 @@ class AnimatedSprite(pg.sprite.Sprite, ABC):
 
         self.state = 'idle'
         self.frame_idx = 0
-        self.image = self.frames[self.state][self.frame_idx]
+        self.image = self.frames.get_frame(self.state, self.frame_idx, facing_left=True)
         self.rect = self.image.get_rect(midbottom=self.xy)
         self.direction = pg.Vector2()
         self.tile_xy = (self.xy[0] // TILE_SIZE, self.xy[1] // TILE_SIZE)
\ No newline at end of file
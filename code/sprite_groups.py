@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pygame as pg
+
+# capability bits a sprite carries while it's a member of the matching group,
+# checking a bit replaces testing membership against every group
+ACTIVE = 1 << 0 # has an update method
+ANIMATED = 1 << 1
+COLONIST = 1 << 2
+MECH = 1 << 3
+NATURE = 1 << 4
+CLOUD = 1 << 5
+TREE = 1 << 6
+ITEM = 1 << 7
+HAS_UI = 1 << 8
+SIMULATED = 1 << 9 # has a step method, advanced at the fixed simulation rate
+
+class FlagGroup(pg.sprite.Group):
+    '''sprite group that sets its capability bit on sprite.flags when a sprite joins & clears it when the sprite leaves'''
+    def __init__(self, flag: int, *sprites: pg.sprite.Sprite):
+        self.flag = flag
+        self.max_size = [0, 0] # of any sprite that has joined, never shrinks so it's always a safe bound for proximity searches
+        self.unsized: dict[pg.sprite.Sprite, None] = {} # sprites join before their rect is assigned, so they're measured on the next get_max_size
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite: pg.sprite.Sprite, layer: None=None) -> None:
+        super().add_internal(sprite)
+        sprite.flags = getattr(sprite, 'flags', 0) | self.flag
+        self.unsized[sprite] = None
+
+    def remove_internal(self, sprite: pg.sprite.Sprite) -> None:
+        super().remove_internal(sprite)
+        sprite.flags &= ~self.flag
+        self.unsized.pop(sprite, None)
+
+    def get_max_size(self) -> list[int]:
+        if self.unsized:
+            for sprite in self.unsized:
+                self.max_size[0] = max(self.max_size[0], sprite.rect.width)
+                self.max_size[1] = max(self.max_size[1], sprite.rect.height)
+            self.unsized.clear()
+        return self.max_size
@@ -5,13 +5,15 @@ if TYPE_CHECKING:
     from input_manager import Keyboard, Mouse
     import numpy as np
     from physics_engine import SpriteMovement, CollisionMap
+    from body_system import BodySystem
 
 import pygame as pg
 from random import choice, randint
-import re
 from os.path import join
 
-from settings import TILE_SIZE, TOOLS, Z_LAYERS, RES, TREE_BIOMES, ITEMS_CAN_FLIP
+from settings import TILE_SIZE, TOOLS, Z_LAYERS, RES, TREE_BIOMES, ITEMS_CAN_FLIP, SPRITE_CELL_SIZE
+from spatial_index import SpatialGroup, Broadphase
+from sprite_groups import FlagGroup, ACTIVE, ANIMATED, COLONIST, MECH, NATURE, CLOUD, TREE, ITEM, HAS_UI, SIMULATED
 from mining import Mining
 from crafting import Crafting
 from wood_gathering import WoodGathering
@@ -22,6 +24,9 @@ from pipe import Pipe
 from inserter import BurnerInserter, ElectricInserter
 from assembler import Assembler
 from pumps import InletPump, OutletPump
+from item_drop import ItemDrop
+from player import Player
+from sprite_records import SpriteRecords
 
 class SpriteManager:
     def __init__(self, game_obj: Main):
@@ -39,26 +44,33 @@ class SpriteManager:
         self.names_to_ids: dict[str, int] = game_obj.proc_gen.names_to_ids
         self.ids_to_names: dict[int, str] = game_obj.proc_gen.ids_to_names
         self.get_tile_material: callable = game_obj.proc_gen.get_tile_material
+        self.set_tile: callable = game_obj.proc_gen.set_tile
 
         self.sprite_movement: SpriteMovement = game_obj.physics_engine.sprite_movement
         self.collision_map: CollisionMap = game_obj.physics_engine.collision_map
+        self.body_system: BodySystem = game_obj.physics_engine.body_system
 
         self.keyboard: Keyboard = game_obj.input_manager.keyboard
         self.mouse: Mouse = game_obj.input_manager.mouse
 
         self.save_data: dict[str, any] | None = game_obj.save_data
 
-        self.all_sprites = pg.sprite.Group()
-        self.active_sprites = pg.sprite.Group() # has an update method
-        self.animated_sprites = pg.sprite.Group()
-        self.colonist_sprites = pg.sprite.Group()
-        self.mech_sprites = pg.sprite.Group()
-        self.nature_sprites = pg.sprite.Group()
-        self.cloud_sprites = pg.sprite.Group()
-        self.tree_sprites = pg.sprite.Group()
-        self.item_sprites = pg.sprite.Group()
-        self.sprites_with_ui = pg.sprite.Group()
+        self.all_sprites = SpatialGroup(SPRITE_CELL_SIZE) # every sprite is a member, so it doubles as the index for proximity queries
+        # membership is mirrored in each sprite's flags bitmask so the render loop can branch on it without probing every group
+        self.active_sprites = FlagGroup(ACTIVE) # has an update method
+        self.simulated_sprites = FlagGroup(SIMULATED) # has a step method
+        self.animated_sprites = FlagGroup(ANIMATED)
+        self.colonist_sprites = FlagGroup(COLONIST)
+        self.mech_sprites = FlagGroup(MECH)
+        self.nature_sprites = FlagGroup(NATURE)
+        self.cloud_sprites = FlagGroup(CLOUD)
+        self.tree_sprites = FlagGroup(TREE)
+        self.item_sprites = FlagGroup(ITEM)
+        self.sprites_with_ui = FlagGroup(HAS_UI)
         self.all_groups = {k: v for k, v in vars(self).items() if isinstance(v, pg.sprite.Group)}
+        self.sprite_movement.sprite_index = self.all_sprites
+        self.broadphase = Broadphase(self.all_sprites) # overlaps between groups that interact, found once per tick
+        self.broadphase.register(self.colonist_sprites, self.item_sprites, self.pick_up_item)
 
         self.mining = Mining(self)
 
@@ -74,6 +86,11 @@ class SpriteManager:
             )
         }
 
+        self.sprite_records = SpriteRecords() # the classes whose instances are saved
+        self.sprite_records.register(
+            Player, Tree, ItemDrop, BurnerFurnace, ElectricFurnace, BurnerDrill, ElectricDrill, InletPump, OutletPump
+        )
+
         self.ui = self.player = None # not initialized yet
     
     def init_trees(self) -> None:
@@ -97,6 +114,22 @@ class SpriteManager:
             for xy in tiles_covered:
                self.items_init_when_placed[item](**self.get_cls_init_params(item, xy))
 
+    def init_saved_sprites(self) -> None:
+        '''rebuilds the saved item drops & machines a class at a time, the machines' tiles are already in the loaded tile map'''
+        if not self.save_data:
+            return
+        item_placement = self.game_obj.item_placement
+        for row in self.save_data['sprites'].get('item drop', ()):
+            if 'name' in row: # saves from before item drops recorded their item only have a position
+                ItemDrop(
+                    row['xy'], self.assets['graphics'][row['name']], Z_LAYERS['main'], [self.all_sprites, self.item_sprites], self, 
+                    pg.Vector2(0, 1), row['name'], amount=row['amount']
+                )
+        for name in self.items_init_when_placed:
+            for i, row in enumerate(self.save_data['sprites'].get(name, ())):
+                tile_xy = (row['xy'][0] // TILE_SIZE, row['xy'][1] // TILE_SIZE)
+                item_placement.init_obj(name, item_placement.get_tiles_covered(tile_xy, self.assets['graphics'][name]), save_idx=i)
+
     def update_clouds(self, player: pg.sprite.Sprite) -> None:
         if not self.cloud_sprites:
             surface_lvl = self.height_map[player.rect.x // TILE_SIZE]
@@ -106,10 +139,10 @@ class SpriteManager:
                         pg.Vector2(player.rect.x + RES[0] + (50 * (i + 1)), surface_lvl + randint(-2000, -1500)),
                         self.cloud_graphics_folder[randint(0, len(self.cloud_graphics_folder) - 1)],
                         Z_LAYERS['clouds'],
-                        [self.all_sprites, self.nature_sprites, self.cloud_sprites],
+                        [self.all_sprites, self.simulated_sprites, self.nature_sprites, self.cloud_sprites],
                         randint(1, 3),
                         player,
-                        self.rect_in_sprite_radius
+                        self.all_sprites
                     )
 
     @staticmethod
@@ -122,17 +155,15 @@ class SpriteManager:
     @staticmethod
     def end_action(sprite: pg.sprite.Sprite) -> None:
         sprite.state = 'idle'
-        idle_img = sprite.frames['idle'][0]
-        sprite.image = idle_img if sprite.facing_left else pg.transform.flip(idle_img, True, False)
-
-    def pick_up_item(self, obj: object, name: str, amount: int=1) -> None:
-        for sprite in self.get_sprites_in_radius(obj.rect, self.human_sprites):
-            inv = sprite.inventory
-            if sprite.rect.colliderect(obj.rect) and not (name in inv.contents.keys() and inv.contents[name]['amount'] == inv.slot_capacity[name]):
-                inv.add_item(name, amount)
-                self.ui.render_new_item_name(name, obj.rect, amount)
-                obj.kill()
-                return
+        sprite.image = sprite.frames.get_frame('idle', 0, sprite.facing_left)
+
+    def pick_up_item(self, sprite: pg.sprite.Sprite, item: pg.sprite.Sprite) -> None:
+        '''called by the broadphase for each colonist overlapping an item drop'''
+        inv = sprite.inventory
+        if item.alive() and not (item.name in inv.contents.keys() and inv.contents[item.name]['amount'] == inv.slot_capacity[item.name]): # another colonist may have picked it up this tick
+            inv.add_item(item.name, item.amount)
+            self.ui.render_new_item_name(item.name, item.rect, item.amount)
+            item.kill()
 
     def get_sprites_in_radius(
             self, 
@@ -141,7 +172,9 @@ class SpriteManager:
             x_dist: int=(RES[0] // 2), 
             y_dist: int=(RES[1] // 2)
         )-> list[pg.sprite.Sprite]:
-        return [spr for spr in group if self.rect_in_sprite_radius(spr, rect, x_dist, y_dist)]
+        '''sprites in the group whose center is within x_dist/y_dist of the rect's center, ordered by z'''
+        sprites = self.all_sprites.get_sprites_in_radius(rect.center, x_dist, y_dist)
+        return sprites if group is self.all_sprites else [spr for spr in sprites if spr in group]
     
     def rect_in_sprite_radius(
         self, 
@@ -156,9 +189,6 @@ class SpriteManager:
         rect_xy = rect.center if rect_world_space else rect.center + self.cam_offset
         return abs(spr_xy[0] - rect_xy[0]) < x_dist and abs(spr_xy[1] - rect_xy[1]) < y_dist
     
-    def get_sprite_groups(self, sprite: pg.sprite.Sprite) -> set[pg.sprite.Group]:
-        return set(group for group in self.all_groups.values() if sprite in group)
-
     def check_dir_flip(self, sprite: pg.sprite.Sprite) -> None:
         if sprite.rect.collidepoint(self.mouse.xy_world) and self.keyboard.pressed_keys[self.keyboard.key_bindings['rotate item']]:
             sprite.image = pg.transform.flip(sprite.image, True, False)
@@ -172,7 +202,7 @@ class SpriteManager:
     ) -> dict[str, any]:
         tile_x, tile_y = tiles_covered if isinstance(tiles_covered, tuple) else tiles_covered[0] # only extract the topleft coordinate for multi-tile items
         params = {
-            'save_data': self.save_data['sprites'][name][save_idx] if self.save_data else None,
+            'save_data': self.save_data['sprites'][name][save_idx] if self.save_data and save_idx is not None else None,
             'xy': (tile_x * TILE_SIZE, tile_y * TILE_SIZE), 
             'image': self.assets['graphics'][name], 
             'sprite_groups': [self.all_sprites, self.active_sprites, self.mech_sprites, self.sprites_with_ui], 
@@ -188,13 +218,25 @@ class SpriteManager:
     
     @staticmethod
     def cls_name_to_str(cls: pg.sprite.Sprite) -> str:
-        return re.sub(r'(?<!^)(?=[A-Z])', ' ', cls.__name__).lower()
+        return SpriteRecords.cls_name_to_str(cls)
+
+    def step(self, player: pg.sprite.Sprite, dt: float) -> None:
+        '''advance everything that moves at the fixed simulation rate'''
+        for sprite in self.simulated_sprites:
+            sprite.step(dt)
+        self.broadphase.step()
+        self.mining.update(dt)
+
+    def save_prev_positions(self, player: pg.sprite.Sprite) -> None:
+        '''record where sprites were before a simulation step so rendering can interpolate towards where they are after'''
+        player.prev_xy = player.rect.topleft
+        for sprite in self.simulated_sprites:
+            sprite.prev_xy = sprite.rect.topleft
 
     def update(self, player: pg.sprite.Sprite, dt: float) -> None:
         for sprite in self.active_sprites:
             sprite.update(dt)
 
-        self.mining.update(dt)
         self.wood_gathering.update(player, self.mouse.buttons_held, self.mouse.xy_world)
         self.update_clouds(player)
 
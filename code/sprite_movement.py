@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Sequence
 if TYPE_CHECKING:
     from physics_engine import PhysicsEngine
+    from spatial_index import SpatialGroup
     import numpy as np
     import pygame as pg
 
@@ -14,14 +15,15 @@ class SpriteMovement:
         self.max_x = MAP_SIZE[0] * TILE_SIZE
         self.max_y = MAP_SIZE[1] * TILE_SIZE
         self.tile_collision_update: callable = physics_engine.collision_detection.tile_collision_update
+        self.sprite_index: SpatialGroup | None = None # assigned by the sprite manager once its groups exist
 
         self.key_move_left: int = physics_engine.key_bindings['move left']
         self.key_move_right: int = physics_engine.key_bindings['move right']
-        self.key_jump: int = physics_engine.key_bindings['jump']
 
         self.active_states: set[str] = {'jumping', 'mining', 'chopping'} # TODO: revisit this line in case more relevant states are added
 
     def move_sprite(self, sprite: pg.sprite.Sprite, direction_x: int, dt: float) -> None:
+        prev_rect = sprite.rect.copy()
         if direction_x:
             if hasattr(sprite, 'underwater') and sprite.underwater:
                 direction_x = 0.5 if direction_x > 0 else -0.5
@@ -32,9 +34,11 @@ class SpriteMovement:
                 sprite.state = 'idle'
                 sprite.frame_index = 0
         
-        self.tile_collision_update(sprite, 'x')
+        self.tile_collision_update(sprite, 'x', prev_rect)
+        prev_rect = sprite.rect.copy()
         self.update_movement_y(sprite, dt) # always called since it handles gravity
-        self.tile_collision_update(sprite, 'y')
+        self.tile_collision_update(sprite, 'y', prev_rect)
+        self.sprite_index.move(sprite)
 
     def update_movement_x(self, sprite: pg.sprite.Sprite, direction_x: int, dt: float) -> None:
         sprite.direction.x = direction_x
@@ -51,13 +55,13 @@ class SpriteMovement:
 
         sprite.rect.y = min(sprite.rect.y, self.max_y - sprite.rect.height) # don't add a top limit until the space biome borders are set, if any
 
-    def jump(self, sprite: pg.sprite.Sprite, pressed_keys: Sequence[bool]) -> None:
-        if pressed_keys[self.key_jump] and sprite.grounded and sprite.state != 'jumping':
+    def jump(self, sprite: pg.sprite.Sprite, jump_pressed: bool) -> None:
+        if jump_pressed and sprite.grounded and sprite.state != 'jumping':
             sprite.direction.y -= sprite.jump_height
             sprite.grounded = False
             sprite.state = 'jumping'
             sprite.frame_index = 0
 
-    def update(self, player: pg.sprite.Sprite, held_keys: Sequence[bool], pressed_keys: Sequence[bool], dt: float):
+    def update(self, player: pg.sprite.Sprite, held_keys: Sequence[bool], jump_pressed: bool, dt: float):
         self.move_sprite(player, held_keys[self.key_move_right] - held_keys[self.key_move_left], dt)
-        self.jump(player, pressed_keys)
\ No newline at end of file
+        self.jump(player, jump_pressed)
\ No newline at end of file
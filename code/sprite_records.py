@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import pygame as pg
+import numpy as np
+import re
+from itertools import islice
+
+class SpriteRecords:
+    '''
+    registry of the sprite classes that are saved, each class lists its save_columns (field -> codec)
+    & its instances are written as one set of columns rather than a dict per instance,
+    so numbers & positions become arrays (stored as raw blocks by SaveFile) & repeated strings are stored once
+
+    codecs: 'xy' (int32 pairs), 'int', 'bool', 'str' (category codes, may be None),
+    'inventory' (SpriteInventory data as item id/amount/slot arrays), 'inv slots' (a machine's slot name -> item & amount)
+    & 'json' (kept as a list of values)
+    '''
+    def __init__(self):
+        self.keys: dict[type, str] = {} # exact class -> key in the save data
+        self.columns: dict[str, dict[str, str]] = {}
+
+    def register(self, *classes: type) -> None:
+        for cls in classes:
+            key = self.cls_name_to_str(cls)
+            self.keys[cls] = key
+            self.columns[key] = cls.save_columns
+
+    def collect(self, sprites: pg.sprite.Group) -> dict[str, dict[str, any]]:
+        '''encodes every registered sprite in the group, in the group's order'''
+        by_key = {}
+        for sprite in sprites:
+            key = self.keys.get(type(sprite))
+            if key is not None:
+                by_key.setdefault(key, []).append(sprite.get_save_data())
+        return {key: self.encode(self.columns[key], rows) for key, rows in by_key.items()}
+
+    @classmethod
+    def encode(cls, columns: dict[str, str], rows: list[dict[str, any]]) -> dict[str, any]:
+        return {
+            'count': len(rows),
+            'columns': {field: cls.encode_column(codec, [row[field] for row in rows]) for field, codec in columns.items()}
+        }
+
+    @staticmethod
+    def encode_column(codec: str, values: list[any]) -> dict[str, any]:
+        match codec:
+            case 'xy':
+                return {'codec': codec, 'values': np.asarray(values, dtype=np.int32).reshape(-1, 2)}
+            case 'int':
+                return {'codec': codec, 'values': np.asarray(values, dtype=np.int64)}
+            case 'bool':
+                return {'codec': codec, 'values': np.asarray([bool(v) for v in values], dtype=bool)}
+            case 'str':
+                categories = list(dict.fromkeys(values))
+                codes = {value: i for i, value in enumerate(categories)}
+                return {'codec': codec, 'categories': categories, 'codes': np.array([codes[v] for v in values], dtype=np.int32)}
+            case 'inventory':
+                contents = [inv['contents'] for inv in values]
+                names = list(dict.fromkeys(name for items in contents for name in items))
+                ids = {name: i for i, name in enumerate(names)}
+                return {
+                    'codec': codec,
+                    'names': names,
+                    'items': np.array([ids[name] for items in contents for name in items], dtype=np.int32),
+                    'amounts': np.array([data['amount'] for items in contents for data in items.values()], dtype=np.int64),
+                    'slots': np.array([data['index'] for items in contents for data in items.values()], dtype=np.int32),
+                    'counts': np.array([len(items) for items in contents], dtype=np.int32), # items per inventory
+                    'selected': np.array([inv['index'] for inv in values], dtype=np.int32)
+                }
+            case 'inv slots':
+                slots = [(name, data['item'], data['amount']) for inv in values for name, data in inv.items()]
+                slot_names, items = list(dict.fromkeys(s[0] for s in slots)), list(dict.fromkeys(s[1] for s in slots))
+                slot_ids, item_ids = {name: i for i, name in enumerate(slot_names)}, {item: i for i, item in enumerate(items)}
+                return {
+                    'codec': codec,
+                    'slot names': slot_names,
+                    'items': items, # None for an empty slot
+                    'slots': np.array([slot_ids[s[0]] for s in slots], dtype=np.int32),
+                    'item codes': np.array([item_ids[s[1]] for s in slots], dtype=np.int32),
+                    'amounts': np.array([s[2] for s in slots], dtype=np.int64),
+                    'counts': np.array([len(inv) for inv in values], dtype=np.int32) # slots per machine
+                }
+            case 'json':
+                return {'codec': codec, 'values': values}
+        raise ValueError(f'unknown save column codec: {codec}')
+
+    @classmethod
+    def decode(cls, data: dict[str, any] | list[dict[str, any]]) -> list[dict[str, any]]:
+        '''the columns of a class back to one dict per instance, saves from before the columns already are'''
+        if isinstance(data, list):
+            return data
+        names = list(data['columns'])
+        values = [cls.decode_column(column) for column in data['columns'].values()]
+        return [dict(zip(names, row)) for row in zip(*values)] if names else [{} for _ in range(data['count'])]
+
+    @staticmethod
+    def decode_column(column: dict[str, any]) -> list[any]:
+        match column['codec']:
+            case 'xy' | 'int' | 'bool':
+                return np.asarray(column['values']).tolist()
+            case 'str':
+                categories = column['categories']
+                return [categories[i] for i in np.asarray(column['codes']).tolist()]
+            case 'inventory':
+                names = column['names']
+                items = [names[i] for i in np.asarray(column['items']).tolist()]
+                amounts, slots = np.asarray(column['amounts']).tolist(), np.asarray(column['slots']).tolist()
+                inventories, start = [], 0
+                for count, selected in zip(np.asarray(column['counts']).tolist(), np.asarray(column['selected']).tolist()):
+                    end = start + count
+                    inventories.append({
+                        'contents': {name: {'amount': a, 'index': i} for name, a, i in zip(items[start:end], amounts[start:end], slots[start:end])},
+                        'index': selected
+                    })
+                    start = end
+                return inventories
+            case 'inv slots':
+                slot_names, items = column['slot names'], column['items']
+                slots = zip(
+                    [slot_names[i] for i in np.asarray(column['slots']).tolist()], 
+                    [items[i] for i in np.asarray(column['item codes']).tolist()], 
+                    np.asarray(column['amounts']).tolist()
+                )
+                return [{name: {'item': item, 'amount': amount} for name, item, amount in islice(slots, count)} for count in np.asarray(column['counts']).tolist()]
+            case 'json':
+                return column['values']
+        raise ValueError(f'unknown save column codec: {column["codec"]}')
+
+    @classmethod
+    def decode_all(cls, sprites: dict[str, any]) -> dict[str, list[dict[str, any]]]:
+        return {key: cls.decode(data) for key, data in sprites.items()}
+
+    @staticmethod
+    def cls_name_to_str(cls: type) -> str:
+        return re.sub(r'(?<!^)(?=[A-Z])', ' ', cls.__name__).lower()
@@ -0,0 +1,8 @@
+'''
+the game's modules are imported flat from the code folder, run the tests from there: python -m pytest -q tests
+'''
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,94 @@
+import numpy as np
+import pygame as pg
+import pytest
+
+from benchmarks import get_physics_engine
+from proc_gen import ProcGen
+from settings import MAP_SIZE, TILE_SIZE, GRAVITY
+
+NUM_DROPS, NUM_TICKS, DT = 200, 180, 1 / 60
+
+@pytest.fixture(scope='module')
+def world() -> tuple[np.ndarray, list[tuple[int, int, pg.Vector2]]]:
+    '''rolling stone hills with floating one-tile ledges & ramps, plus drops scattered in the sky'''
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(5)
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    surface = 100 + (10 * np.sin(np.arange(MAP_SIZE[0]) / 15)).astype(int)
+    for x, y in enumerate(surface):
+        tile_map[x, y:] = names_to_ids['stone']
+    tile_map[rng.integers(0, MAP_SIZE[0], 300), rng.integers(60, 90, 300)] = names_to_ids['dirt']
+    ramp_xs = rng.integers(1, MAP_SIZE[0] - 1, 100)
+    for x, ramp in zip(ramp_xs, rng.choice(['stone ramp left', 'stone ramp right'], 100)):
+        tile_map[x, surface[x] - 1] = names_to_ids[ramp]
+    drops = [
+        (int(x), int(y), pg.Vector2(int(dx), 1)) for x, y, dx in zip(
+            rng.integers(0, MAP_SIZE[0] * TILE_SIZE, NUM_DROPS), rng.integers(0, 50 * TILE_SIZE, NUM_DROPS), rng.integers(-1, 2, NUM_DROPS)
+        )
+    ]
+    drops += [(int(x) * TILE_SIZE + TILE_SIZE // 2, 50 * TILE_SIZE, pg.Vector2(0, 1)) for x in ramp_xs] # dropped onto the ramps
+    return tile_map, drops
+
+
+def run_sprites(tile_map: np.ndarray, drops: list[tuple[int, int, pg.Vector2]]) -> list[list[tuple[int, int]]]:
+    '''the original per-sprite ItemDrop movement, returns each drop's topleft after every tick'''
+    sprite_movement = get_physics_engine(tile_map.copy()).sprite_movement
+    sprites = []
+    for x, y, direction in drops:
+        sprite = pg.sprite.Sprite()
+        sprite.rect, sprite.direction = pg.Rect(x, y, TILE_SIZE, TILE_SIZE), pg.Vector2(direction)
+        sprite.move_speed, sprite.gravity = 1, GRAVITY // 3
+        sprites.append(sprite)
+    paths = [[] for _ in sprites]
+    for _ in range(NUM_TICKS):
+        for sprite, path in zip(sprites, paths):
+            sprite_movement.move_sprite(sprite, sprite.direction.x, DT)
+            if sprite.direction.x and int(sprite.direction.y) == 0:
+                sprite.direction.x = 0
+            path.append(sprite.rect.topleft)
+    return paths
+
+
+def add_bodies(physics_engine, drops: list[tuple[int, int, pg.Vector2]]) -> list[pg.sprite.Sprite]:
+    sprites = []
+    for x, y, direction in drops:
+        sprite = pg.sprite.Sprite()
+        sprite.rect = pg.Rect(x, y, TILE_SIZE, TILE_SIZE)
+        physics_engine.body_system.add(sprite, direction, GRAVITY // 3, 1)
+        sprites.append(sprite)
+    return sprites
+
+
+def test_matches_per_sprite_movement(world) -> None:
+    tile_map, drops = world
+    physics_engine = get_physics_engine(tile_map.copy())
+    sprites = add_bodies(physics_engine, drops)
+    paths = [[] for _ in sprites]
+    for _ in range(NUM_TICKS):
+        physics_engine.body_system.step(DT)
+        for sprite, path in zip(sprites, paths):
+            path.append(sprite.rect.topleft)
+    expected = run_sprites(tile_map, drops)
+    mismatched = [i for i, (a, b) in enumerate(zip(paths, expected)) if a != b]
+    assert not mismatched, f'{len(mismatched)}/{len(drops)} drops left the per-sprite path, e.g. drop {mismatched[0]}'
+
+
+def test_landed_bodies_sleep_until_the_ground_changes(world) -> None:
+    tile_map, drops = world
+    physics_engine = get_physics_engine(tile_map.copy())
+    body_system = physics_engine.body_system
+    sprites = add_bodies(physics_engine, drops)
+    for _ in range(NUM_TICKS):
+        body_system.step(DT)
+    assert body_system.get_stats() == {'awake': 0, 'asleep': len(drops)}
+
+    sprite = sprites[0]
+    tiles = [(x, sprite.rect.bottom // TILE_SIZE) for x in range(sprite.rect.left // TILE_SIZE, (sprite.rect.right - 1) // TILE_SIZE + 1)]
+    for xy in tiles:
+        physics_engine.tile_map[xy] = 0
+    physics_engine.notify_tile_listeners(tiles)
+    assert not body_system.asleep[sprite.body_idx]
+    bottom = sprite.rect.bottom
+    for _ in range(30):
+        body_system.step(DT)
+    assert sprite.rect.bottom > bottom
@@ -0,0 +1,49 @@
+import numpy as np
+import pygame as pg
+import pytest
+
+from benchmarks import init_headless_display, get_chunk_manager, bake_chunk_per_tile
+from proc_gen import ProcGen
+from settings import MAP_SIZE
+
+@pytest.fixture
+def chunk_manager():
+    '''random tiles under a band of sky, with 2x2 machines & some tiles being mined'''
+    init_headless_display()
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    rng = np.random.default_rng(1)
+    tile_map = rng.choice([i for name, i in names_to_ids.items() if name not in {'burner furnace', 'assembler'}], MAP_SIZE)
+    tile_map[:, :MAP_SIZE[1] // 4] = names_to_ids['air']
+    for x, y in zip(rng.integers(0, MAP_SIZE[0] - 1, 200), rng.integers(0, MAP_SIZE[1] - 1, 200)):
+        tile_map[x:x + 2, y:y + 2] = names_to_ids['item extended']
+        tile_map[x, y] = names_to_ids['burner furnace']
+    chunk_manager = get_chunk_manager(tile_map)
+    chunk_manager.mining_map.update({(int(x), int(y)): {} for x, y in zip(rng.integers(0, 200, 50), rng.integers(0, MAP_SIZE[1], 50))})
+    yield chunk_manager
+    chunk_manager.prefetcher.stop()
+
+
+def get_pixels(surf: pg.Surface) -> bytes:
+    return pg.image.tobytes(surf, 'RGBA')
+
+
+def test_atlas_bake_matches_per_tile_blits(chunk_manager) -> None:
+    chunks = [(x, y) for x in range(chunk_manager.num_chunks_x) for y in range(chunk_manager.num_chunks_y)]
+    differing = [chunk for chunk in chunks if get_pixels(chunk_manager.get_chunk_img(chunk)) != get_pixels(bake_chunk_per_tile(chunk_manager, chunk))]
+    assert not differing, f'{len(differing)}/{len(chunks)} chunks differ, e.g. {differing[0]}'
+
+
+def test_patched_chunks_match_a_fresh_bake(chunk_manager) -> None:
+    names_to_ids = chunk_manager.names_to_ids
+    chunks = [(0, 0), (3, 5), (chunk_manager.num_chunks_x - 1, chunk_manager.num_chunks_y - 1)]
+    for chunk in chunks:
+        chunk_manager.get_chunk_img(chunk) # cached, so the edits below patch it
+    tiles = []
+    for chunk_x, chunk_y in chunks:
+        x, y = chunk_x * chunk_manager.num_chunk_tiles, chunk_y * chunk_manager.num_chunk_tiles
+        tiles += [(x, y), (x + 1, y), (min(x + 5, MAP_SIZE[0] - 1), min(y + 7, MAP_SIZE[1] - 1))]
+    for i, xy in enumerate(tiles):
+        chunk_manager.tile_map[xy] = (names_to_ids['air'], names_to_ids['stone'], names_to_ids['water'])[i % 3]
+    chunk_manager.update_tiles(tiles)
+    for chunk in chunks:
+        assert get_pixels(chunk_manager.get_chunk_img(chunk)) == get_pixels(bake_chunk_per_tile(chunk_manager, chunk))
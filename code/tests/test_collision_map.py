@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pygame as pg
+
+from benchmarks import gen_rect_map, search_rect_map, get_cave_tile_map
+from collision_detection import CollisionMap
+from proc_gen import ProcGen
+from settings import MAP_SIZE, TILE_SIZE
+
+def get_colliding(rects: list[pg.Rect], sprite: SimpleNamespace) -> list[tuple[int, ...]]:
+    return sorted(tuple(rect) for rect in rects if sprite.rect.colliderect(rect))
+
+
+def test_grid_matches_the_rect_map() -> None:
+    names_to_ids, ids_to_names, _ = ProcGen.get_tile_ids()
+    tile_map = get_cave_tile_map(4)
+    physics_engine = SimpleNamespace(tile_map=tile_map, names_to_ids=names_to_ids, ids_to_names=ids_to_names, tile_listeners=[])
+    grid = CollisionMap(physics_engine)
+    rng = np.random.default_rng(4)
+    sprites = [
+        SimpleNamespace(rect=pg.Rect(int(x), int(y), 24, 40))
+        for x, y in zip(rng.integers(0, (MAP_SIZE[0] - 2) * TILE_SIZE, 500), rng.integers(0, (MAP_SIZE[1] - 3) * TILE_SIZE, 500))
+    ]
+    rect_map = gen_rect_map(tile_map, names_to_ids['air'])
+    for sprite in sprites:
+        assert get_colliding(grid.search_map(sprite), sprite) == get_colliding(search_rect_map(rect_map, sprite), sprite)
+
+    # mined & placed tiles
+    tiles = [(int(x), int(y)) for x, y in zip(rng.integers(0, MAP_SIZE[0], 2000), rng.integers(0, MAP_SIZE[1], 2000))]
+    for i, xy in enumerate(tiles):
+        tile_map[xy] = names_to_ids['air'] if i % 2 else names_to_ids['stone']
+    grid.update_tiles(tiles)
+    rect_map = gen_rect_map(tile_map, names_to_ids['air'])
+    for sprite in sprites:
+        assert get_colliding(grid.search_map(sprite), sprite) == get_colliding(search_rect_map(rect_map, sprite), sprite)
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks import get_lakes_tile_map, get_physics_engine
+from settings import LIQUIDS
+
+MAX_FLOW_TICKS = 12000 # 200s of game time, honey (the slowest) settles in about 9000
+
+@pytest.mark.parametrize('liquid', sorted(LIQUIDS))
+def test_breached_lake_settles(liquid: str) -> None:
+    tile_map = get_lakes_tile_map(40, liquid)
+    physics_engine = get_physics_engine(tile_map)
+    liquid_flow = physics_engine.liquid_flow
+    liquid_flow.step()
+    assert not liquid_flow.active_chunks # full basins are already at rest
+
+    wall = [(40, y) for y in range(100, 120)]
+    tile_map[40, 100:120] = 0
+    physics_engine.notify_tile_listeners(wall)
+    volume = liquid_flow.get_stats()['volume']
+    seen = tile_map.copy() # the tile map as the listeners know it
+    def listener(tiles: list[tuple[int, int]]) -> None:
+        for xy in tiles:
+            assert tile_map[xy] != seen[xy], f'{xy} was sent to the listeners without changing'
+            seen[xy] = tile_map[xy]
+    physics_engine.tile_listeners.append(listener)
+
+    ticks = 0
+    while liquid_flow.active_chunks and ticks < MAX_FLOW_TICKS:
+        liquid_flow.step()
+        ticks += 1
+    assert not liquid_flow.active_chunks, f'still flowing after {MAX_FLOW_TICKS} ticks'
+    assert (seen == tile_map).all() # every edit reached the listeners
+    assert volume - liquid_flow.get_stats()['volume'] < volume * 0.001 # only thin films evaporate
+    assert (tile_map[41:100, 100:120] != 0).any() # it did flow out of the basin
@@ -0,0 +1,54 @@
+import numpy as np
+
+from benchmarks import get_physics_engine
+from proc_gen import ProcGen
+from settings import MAP_SIZE
+
+def settle_by_scanning(tile_map: np.ndarray, is_loose: np.ndarray, can_fall_into: np.ndarray) -> np.ndarray:
+    '''drop every loose tile found by scanning the whole map, until nothing moves'''
+    tile_map = tile_map.copy()
+    while True:
+        xs, ys = np.nonzero(is_loose[tile_map[:, :-1]] & can_fall_into[tile_map[:, 1:]])
+        if not xs.size:
+            return tile_map
+        tile_map[xs, ys], tile_map[xs, ys + 1] = tile_map[xs, ys + 1], tile_map[xs, ys]
+
+
+def test_sand_collapses_into_a_dug_out_cave() -> None:
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    tile_map[:, 100:] = names_to_ids['sand']
+    tile_map[:, 160:] = names_to_ids['stone']
+    tile_map[1030:1035, 110:115] = names_to_ids['dirt'] # holds up the sand above it
+    physics_engine = get_physics_engine(tile_map)
+    loose_tiles = physics_engine.loose_tiles
+    cave = [(x, y) for x in range(1000, 1040) for y in range(130, 160)]
+    tile_map[1000:1040, 130:160] = names_to_ids['air']
+    expected = settle_by_scanning(tile_map, loose_tiles.is_loose, loose_tiles.can_fall_into)
+
+    physics_engine.notify_tile_listeners(cave)
+    for _ in range(200):
+        loose_tiles.step()
+    assert not loose_tiles.frontier
+    np.testing.assert_array_equal(tile_map, expected)
+
+
+def test_sand_displaces_liquid_without_creating_any() -> None:
+    names_to_ids = ProcGen.get_tile_ids()[0]
+    tile_map = np.zeros(MAP_SIZE, dtype=np.uint8)
+    tile_map[:, 150:] = names_to_ids['stone']
+    tile_map[500:520, 140:150] = names_to_ids['water']
+    tile_map[500:520, 120:130] = names_to_ids['sand']
+    tile_map[499, 120:150] = tile_map[520, 120:150] = names_to_ids['stone']
+    physics_engine = get_physics_engine(tile_map)
+    liquid_flow, loose_tiles = physics_engine.liquid_flow, physics_engine.loose_tiles
+    volume = liquid_flow.get_stats()['volume']
+
+    tiles = [(x, 129) for x in range(500, 520)]
+    physics_engine.notify_tile_listeners(tiles)
+    for _ in range(100):
+        loose_tiles.step()
+        liquid_flow.step()
+    assert (tile_map[500:520, 140:150] == names_to_ids['sand']).all() # sank to the bottom
+    assert liquid_flow.get_stats()['volume'] == volume
+    assert (tile_map == names_to_ids['water']).sum() == 200
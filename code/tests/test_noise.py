@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from perlin_noise import PerlinNoise
+from settings import BIOMES, MAP_SIZE
+
+noise = pytest.importorskip('noise') # the reference implementation the kernel replaced
+
+@pytest.mark.parametrize('biome', list(BIOMES))
+def test_matches_the_noise_package(biome: str) -> None:
+    kernel = PerlinNoise(3638)
+    h, c = BIOMES[biome]['height map'], BIOMES[biome]['cave map']
+    xs = np.arange(MAP_SIZE[0])
+    expected_1d = [noise.pnoise1(x / h['scale'], h['octaves'], h['persistence'], h['lacunarity'], base=kernel.base) for x in xs]
+    np.testing.assert_array_equal(
+        kernel.pnoise1(xs / h['scale'], h['octaves'], h['persistence'], h['lacunarity']), np.array(expected_1d, dtype=np.float32)
+    )
+
+    # a sample of the map, every point of it through the noise package takes seconds
+    rng = np.random.default_rng(0)
+    grid_x, grid_y = rng.integers(0, MAP_SIZE[0], 5000), rng.integers(0, MAP_SIZE[1], 5000)
+    expected_2d = [
+        noise.pnoise2(x / c['scale'], y / c['scale'], c['octaves'], c['persistence'], c['lacunarity'], repeatx=-1, repeaty=-1, base=kernel.base)
+        for x, y in zip(grid_x, grid_y)
+    ]
+    np.testing.assert_array_equal(
+        kernel.pnoise2(grid_x / c['scale'], grid_y / c['scale'], c['octaves'], c['persistence'], c['lacunarity'], repeat_x=-1, repeat_y=-1),
+        np.array(expected_2d, dtype=np.float32)
+    )
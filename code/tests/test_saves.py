@@ -0,0 +1,145 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks import get_world_save_data
+from proc_gen import ProcGen
+from save_file import SaveFile, SaveTracker, Autosave
+from settings import SAVE_CHUNK_SIZE
+
+def get_tracker() -> SaveTracker:
+    return SaveTracker(SimpleNamespace(save_data=None, proc_gen=SimpleNamespace(tile_listeners=[])))
+
+
+def assert_same_world(loaded: dict[str, any], data: dict[str, any]) -> None:
+    for key in ('tile map', 'height map'):
+        np.testing.assert_array_equal(loaded[key], data[key])
+    np.testing.assert_array_equal(loaded['ui']['visited tiles'], data['ui']['visited tiles'])
+    for key, arr in data['cave maps'].items():
+        np.testing.assert_array_equal(loaded['cave maps'][key], arr)
+    assert loaded['sprites'] == data['sprites']
+
+
+def test_full_save_round_trip(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = get_world_save_data()
+    SaveFile.write(path, data)
+    assert_same_world(SaveFile.read(path), data)
+
+
+def test_delta_saves_round_trip(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    rng = np.random.default_rng(8)
+    data = get_world_save_data()
+    tracker = get_tracker()
+    tracker.save(path, data)
+    width, height = data['tile map'].shape
+    num_deltas = 0
+    for i in range(30):
+        tiles = list(zip(rng.integers(0, width, 10).tolist(), rng.integers(0, height, 10).tolist()))
+        for xy in tiles: # mining
+            data['tile map'][xy] = 0
+        tracker.update_tiles(tiles)
+        x = int(rng.integers(0, width - 40)) # the camera moving over new ground
+        data['ui']['visited tiles'][x:x + 40, 50:90] = True
+        tracker.update_region('ui/visited tiles', x, 50, x + 40, 90)
+        data['sprites']['item drop'] = [*data['sprites']['item drop'], {'xy': [x, 900]}]
+        num_deltas += not tracker.save(path, data)['compacted']
+        assert_same_world(SaveFile.read(path), data)
+    assert num_deltas
+
+
+def test_arrays_read_into_memory_survive_replacing_the_file(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = get_world_save_data()
+    SaveFile.write(path, data)
+    loaded = SaveFile.read(path, in_memory=True)
+    assert not any(isinstance(arr, np.memmap) for arr in (loaded['tile map'], loaded['tile map'].base))
+    np.testing.assert_array_equal(loaded['tile map'], data['tile map'])
+
+    loaded['tile map'][:, :10] = 0 # edited in game, then saved over the file the world was loaded from
+    SaveFile.write(path, loaded)
+    np.testing.assert_array_equal(SaveFile.read(path)['tile map'], loaded['tile map'])
+
+
+def test_in_memory_read_applies_delta_patches(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = get_world_save_data()
+    tracker = get_tracker()
+    tracker.save(path, data)
+    tiles = [(0, 0), (len(data['tile map']) - 1, len(data['tile map'][0]) - 1)] # the last one is in a partial edge chunk
+    for xy in tiles:
+        data['tile map'][xy] = 7
+    tracker.update_tiles(tiles)
+    assert not tracker.save(path, data)['compacted']
+    for loaded in (SaveFile.read(path), SaveFile.read(path, in_memory=True)):
+        np.testing.assert_array_equal(loaded['tile map'], data['tile map'])
+
+
+def test_make_save_leaves_copying_to_the_snapshot() -> None:
+    data = get_world_save_data()
+    proc_gen = SimpleNamespace(
+        tile_map=data['tile map'], height_map=data['height map'], tree_map=data['tree map'], cave_maps=data['cave maps'], biome_order=data['biome order']
+    )
+    save_data = ProcGen.make_save(proc_gen)
+    assert save_data['tile map'] is proc_gen.tile_map and save_data['height map'] is proc_gen.height_map
+    snapshot = SaveFile.snapshot(save_data, copy={'tile map'})
+    assert not np.shares_memory(snapshot.arrays['tile map'], proc_gen.tile_map)
+
+
+def test_stopping_autosave_only_writes_what_changed(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = get_world_save_data()
+    game_obj = SimpleNamespace(save_data=None, proc_gen=SimpleNamespace(tile_listeners=[]), get_world_save_data=lambda: data)
+    game_obj.save_tracker = get_tracker()
+    autosave = Autosave(game_obj, path, interval=0)
+    autosave.update(0)
+    autosave.stop()
+    assert autosave.stats['compacted'] # the first save
+    modified = os.stat(path).st_mtime_ns
+
+    autosave.stop() # nothing changed since
+    assert os.stat(path).st_mtime_ns == modified and autosave.thread is None
+
+    data['sprites']['item drop'] = [*data['sprites']['item drop'], {'xy': [0, 900]}] # sprites aren't tracked by chunk
+    autosave.stop()
+    assert SaveFile.read(path)['sprites'] == data['sprites']
+
+    data['tile map'][0, 0] = 9
+    game_obj.save_tracker.update_tiles([(0, 0)])
+    autosave.stop()
+    assert SaveFile.read(path)['tile map'][0, 0] == 9
+
+
+def test_autosave_writes_the_world_as_it_was_when_started(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = get_world_save_data()
+    game_obj = SimpleNamespace(save_data=None, proc_gen=SimpleNamespace(tile_listeners=[]), get_world_save_data=lambda: data)
+    game_obj.save_tracker = get_tracker()
+    autosave = Autosave(game_obj, path, interval=0)
+    for i in range(5):
+        data['tile map'][i, 20] = i + 1
+        game_obj.save_tracker.update_tiles([(i, 20)])
+        expected = data['tile map'].copy()
+        autosave.update(0)
+        data['tile map'][:, :10] = 255 # edits made while the worker writes mustn't reach this save
+        autosave.thread.join()
+        autosave.finish()
+        np.testing.assert_array_equal(SaveFile.read(path)['tile map'], expected)
+        data['tile map'][:, :10] = expected[:, :10]
+        game_obj.save_tracker.update_region('tile map', 0, 0, len(expected), 10)
+
+
+def test_live_bytes_count_edge_patches_at_their_size(tmp_path) -> None:
+    path = str(tmp_path / 'save.bin')
+    data = {'tile map': np.zeros((SAVE_CHUNK_SIZE + 6, SAVE_CHUNK_SIZE + 5), dtype=np.uint8), 'sprites': {}}
+    tracker = get_tracker()
+    tracker.save(path, data)
+    data['tile map'][-1, -1] = data['tile map'][0, 0] = 3
+    tracker.update_tiles([(0, 0), (SAVE_CHUNK_SIZE + 5, SAVE_CHUNK_SIZE + 4)])
+    assert not tracker.save(path, data)['compacted']
+
+    index = SaveFile.read_index(path)
+    patch_bytes = SAVE_CHUNK_SIZE ** 2 + 6 * 5 # a full chunk & the corner one
+    assert SaveFile.get_live_bytes(index) == SaveFile.header.size + index['index size'] + data['tile map'].nbytes + patch_bytes
@@ -0,0 +1,43 @@
+import numpy as np
+import pygame as pg
+
+from benchmarks import get_crowded_groups
+from settings import MAP_SIZE, RES, TILE_SIZE, Z_LAYERS, SPRITE_CELL_SIZE
+from spatial_index import SpatialGroup, Broadphase
+
+def scan(group: SpatialGroup, xy: tuple[int, int], x_dist: int, y_dist: int) -> list[pg.sprite.Sprite]:
+    '''what the render query did before the index: every sprite, filtered & sorted by z'''
+    return sorted((s for s in group if abs(s.rect.centerx - xy[0]) < x_dist and abs(s.rect.centery - xy[1]) < y_dist), key=lambda s: s.z)
+
+
+def test_radius_queries_match_a_scan() -> None:
+    rng = np.random.default_rng(3)
+    group = SpatialGroup(SPRITE_CELL_SIZE)
+    for x, y, z in zip(rng.integers(0, MAP_SIZE[0] * TILE_SIZE, 2000), rng.integers(0, MAP_SIZE[1] * TILE_SIZE, 2000), rng.choice(list(Z_LAYERS.values()), 2000)):
+        sprite = pg.sprite.Sprite(group)
+        sprite.rect, sprite.z = pg.Rect(int(x), int(y), TILE_SIZE, TILE_SIZE * 2), int(z)
+    points = list(zip(rng.integers(0, MAP_SIZE[0] * TILE_SIZE, 100).tolist(), rng.integers(0, MAP_SIZE[1] * TILE_SIZE, 100).tolist()))
+    x_dist, y_dist = RES[0] // 2, RES[1] // 2
+    for xy in points:
+        found, expected = group.get_sprites_in_radius(xy, x_dist, y_dist), scan(group, xy, x_dist, y_dist)
+        assert set(found) == set(expected) and [s.z for s in found] == [s.z for s in expected]
+
+    sprites = list(group)
+    for sprite in sprites[::3]: # moved across cells
+        sprite.rect.x = (sprite.rect.x + SPRITE_CELL_SIZE * 3) % (MAP_SIZE[0] * TILE_SIZE)
+        group.move(sprite)
+    for sprite in sprites[1::7]:
+        sprite.kill()
+    for xy in points:
+        assert set(group.get_sprites_in_radius(xy, x_dist, y_dist)) == set(scan(group, xy, x_dist, y_dist))
+
+
+def test_broadphase_finds_every_overlapping_pair() -> None:
+    all_sprites, colonists, items = get_crowded_groups(1000, 20, 1000, 6)
+    broadphase = Broadphase(all_sprites)
+    found = set()
+    broadphase.register(colonists, items, lambda colonist, item: found.add((colonist, item)))
+    broadphase.step()
+    expected = {(colonist, item) for colonist in colonists for item in items if colonist.rect.colliderect(item.rect)}
+    assert expected and found == expected # includes the drops much wider than a tile
+    assert broadphase.get_stats()['pairs'] == len(expected)
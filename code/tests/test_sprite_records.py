@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from save_file import SaveFile
+from sprite_records import SpriteRecords
+
+NAMES = ['wood', 'stone', 'iron', 'copper', 'coal']
+
+
+def round_trip(columns: dict[str, str], rows: list[dict[str, any]]) -> list[dict[str, any]]:
+    payload = SaveFile.encode_record(SpriteRecords.encode(columns, rows))
+    return SpriteRecords.decode(SaveFile.decode_record(payload, SaveFile.version))
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(10)
+
+
+def get_furnace_rows(rng: np.random.Generator, num_furnaces: int=200) -> list[dict[str, any]]:
+    slot = lambda: {'item': str(rng.choice(NAMES)) if rng.random() < 0.8 else None, 'amount': int(rng.integers(0, 50))}
+    return [
+        {'xy': [int(x), int(y)], 'active': bool(x % 2), 'inv': {'input burn fuel': slot(), 'input smelt': slot(), 'output': slot()}}
+        for x, y in rng.integers(0, 10000, (num_furnaces, 2))
+    ]
+
+
+def test_item_drops_round_trip(rng: np.random.Generator) -> None:
+    from item_drop import ItemDrop
+
+    rows = [{'xy': [int(x), int(y)], 'name': str(rng.choice(NAMES)), 'amount': int(a)} for x, y, a in rng.integers(0, 10000, (5000, 3))]
+    assert round_trip(ItemDrop.save_columns, rows) == rows
+
+
+def test_machines_round_trip(rng: np.random.Generator) -> None:
+    from drills import Drill
+    from furnaces import Furnace
+
+    furnaces = get_furnace_rows(rng)
+    drills = [
+        {**furnace, 'ore data': {'iron': {'amount': 40, 'locations': [[1, 2], [2, 5]]}}, 'target ore': 'iron', 'num ore available': 40, 'ore col': 1, 'ore row': 3}
+        for furnace in furnaces
+    ]
+    assert round_trip(Furnace.save_columns, furnaces) == furnaces
+    assert round_trip(Drill.save_columns, drills) == drills
+
+
+def test_colonist_inventories_round_trip(rng: np.random.Generator) -> None:
+    from colonist import Colonist
+
+    rows = []
+    for i in range(50):
+        names = rng.permutation(NAMES)[:rng.integers(0, len(NAMES) + 1)].tolist() # some inventories are empty
+        rows.append({
+            'xy': [i * 10, 20],
+            'current biome': 'forest' if i % 3 else 'desert',
+            'inventory data': {'contents': {name: {'amount': int(rng.integers(1, 99)), 'index': j} for j, name in enumerate(names)}, 'index': i % 5},
+            'facing left': bool(i % 2),
+            'hp': 100 - i,
+            'oxygen lvl': 50,
+            'item holding': None if i % 4 else 'pickaxe'
+        })
+    assert round_trip(Colonist.save_columns, rows) == rows
+
+
+def test_rows_from_older_saves_pass_through(rng: np.random.Generator) -> None:
+    rows = get_furnace_rows(rng, 5)
+    assert SpriteRecords.decode_all({'burner furnace': rows}) == {'burner furnace': rows}
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+
+from benchmarks import get_proc_gen
+from world_cache import WorldCache
+
+
+def assert_same_world(a: object, b: object) -> None:
+    np.testing.assert_array_equal(a.tile_map, b.tile_map)
+    np.testing.assert_array_equal(a.height_map, b.height_map)
+    assert a.tree_map == b.tree_map and a.player_spawn_point == b.player_spawn_point
+
+
+def test_cached_world_matches_the_generated_one(tmp_path) -> None:
+    world_cache = WorldCache(str(tmp_path))
+    generated = get_proc_gen(world_cache) # stores the world on the way out
+    assert_same_world(get_proc_gen(world_cache), generated)
+
+
+def test_seed_alone_decides_the_world() -> None:
+    worlds = []
+    for i, num_workers in enumerate((1, 2)):
+        random.seed(i) # scrambles the global random states between runs
+        np.random.seed(i)
+        worlds.append(get_proc_gen(WorldCache(enabled=False), num_workers))
+    a, b = worlds
+    assert_same_world(a, b)
+    for key, arr in a.cave_maps.items():
+        np.testing.assert_array_equal(arr, b.cave_maps[key])
@@ -41,6 +41,7 @@ class UI:
             setattr(self, '_'.join(key.split(' ')), self.keyboard.key_bindings[key])
             
         self.active_item_names = []
+        self.autosave_status: tuple[str, pg.Surface | None] = ('', None)
     
     def get_craft_window_height(self) -> int:
         inv_grid_height = self.inventory_ui.slot_len * (self.player.inventory.num_slots // self.inventory_ui.num_cols)
@@ -144,6 +145,15 @@ class UI:
         self.gen_bg(rect)
         self.screen.blit(image, rect)
 
+    def render_autosave_status(self) -> None:
+        status = self.game_obj.autosave.get_status()
+        if status != self.autosave_status[0]: # only changes when a save starts/finishes
+            self.autosave_status = (status, self.asset_manager.fonts['item label small'].render(status, True, self.asset_manager.colors['text']))
+        image = self.autosave_status[1]
+        rect = image.get_rect(bottomleft = (5, RES[1] - 5))
+        self.gen_bg(rect)
+        self.screen.blit(image, rect)
+
     def update(self) -> None:
         self.update_render_states()
         self.mouse_grid.update()
@@ -152,6 +162,8 @@ class UI:
         self.craft_window.update() # keep above the inventory ui otherwise item names may be rendered behind the window
         self.inventory_ui.update()
         self.update_item_name_data()
+        if self.HUD.render:
+            self.render_autosave_status()
         
 
 class MouseGrid:
@@ -18,16 +18,16 @@ class WoodGathering:
         self.cam_offset: pg.Vector2 = sprite_manager.cam_offset
         
         self.get_tool_strength: callable = sprite_manager.get_tool_strength
-        self.pick_up_item: callable = sprite_manager.pick_up_item
-        self.rect_in_sprite_radius: callable = sprite_manager.rect_in_sprite_radius
+        self.get_sprites_in_radius: callable = sprite_manager.get_sprites_in_radius
 
         self.reach_radius = TILE_SIZE * 3
 
     def make_cut(self, sprite: pg.sprite.Sprite, mouse_button_held: dict[str, bool], mouse_world_xy: tuple[int, int]) -> None:
         if mouse_button_held['left']:
             if sprite.item_holding and sprite.item_holding.split()[-1] == 'axe':
-                if tree := next((t for t in self.tree_sprites if self.rect_in_sprite_radius(sprite, t.rect) and t.rect.collidepoint(mouse_world_xy)), None):
-                    tree.cut_down(sprite, self.get_tool_strength, self.pick_up_item)
+                trees_in_reach = self.get_sprites_in_radius(sprite.rect, self.tree_sprites, x_dist=self.reach_radius)
+                if tree := next((t for t in trees_in_reach if t.rect.collidepoint(mouse_world_xy)), None):
+                    tree.cut_down(sprite, self.get_tool_strength)
 
     def update(self, player: pg.sprite.Sprite, mouse_button_held: dict[str, bool], mouse_world_xy: tuple[int, int]) -> None:
         self.make_cut(player, mouse_button_held, mouse_world_xy)
\ No newline at end of file
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from os.path import join
+from hashlib import blake2b
+
+from settings import MAP_SIZE, BIOME_WIDTH, BIOMES, RES, TILE_SIZE
+from save_file import SaveFile
+
+class WorldCache:
+    '''
+    generated worlds stored in a directory of save files (see SaveFile), named after a hash of everything the generation depends on,
+    so launching without a save maps the arrays of an identical world instead of generating it again
+    '''
+    version = 2 # bump when the generation code changes what a given seed produces
+    biome_settings = ('height map', 'elevation', 'tile probs', 'cave map', 'lake prob', 'tree probs') # the BIOMES entries the generation reads
+
+    def __init__(self, directory: str=join('..', 'world_cache'), enabled: bool=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    def get_key(self, seed: int, names_to_ids: dict[str, int]) -> str:
+        params = {
+            'version': self.version,
+            'seed': seed,
+            'map size': MAP_SIZE,
+            'biome width': BIOME_WIDTH,
+            'biomes': {biome: {k: v for k, v in params.items() if k in self.biome_settings} for biome, params in BIOMES.items()},
+            'res': RES, # the lake widths & minimum cave depths are in screens
+            'tile size': TILE_SIZE,
+            'tile ids': names_to_ids,
+        }
+        return blake2b(json.dumps(params, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return join(self.directory, f'{key}.bin')
+
+    def load(self, key: str) -> dict[str, any] | None:
+        '''the arrays are copy-on-write maps of the cached file, edits made in game never reach it'''
+        if not self.enabled or not os.path.exists(self.get_path(key)):
+            return None
+        try:
+            return SaveFile.read(self.get_path(key))
+        except (OSError, ValueError): # written by an older version of the container, it'll be replaced
+            return None
+
+    def store(self, key: str, data: dict[str, any]) -> None:
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            SaveFile.write(self.get_path(key), data) # swapped in by a rename, so runs sharing the cache never read a partial file
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)